@@ -0,0 +1,93 @@
+# compares per-item decode and encode cost of the pydantic Movie model against the
+# MovieView read codec used by get_sessions
+# usage: python benchmarks/codec_benchmark.py [--items 200] [--cinemas 8] [--repeat 20]
+import argparse
+from decimal import Decimal
+import json
+from pathlib import Path
+import sys
+import timeit
+
+SRC_DIR = Path(__file__).parent.parent / 'src'
+sys.path.insert(0, str(SRC_DIR))
+
+from models.movie import Movie  # noqa: E402
+from models.movie_view import MovieView  # noqa: E402
+
+
+def _items(count: int, cinemas: int) -> list[dict]:
+    # shaped like the items boto3 returns, numbers included as Decimal
+    return [
+        {
+            'id': f'id-{i}',
+            'title': f'Movie {i}',
+            'release_year': Decimal(1982),
+            'image_url': f'https://img-store.com/movie-{i}.jpg',
+            'region': 'Auckland',
+            'region_code': 'auckland',
+            'cinemas': [
+                {'name': f'Cinema {j}', 'homepage_url': f'https://cinema-{j}.com'}
+                for j in range(cinemas)
+            ],
+            'showtimes': [f'2025-06-{day:02}' for day in range(1, 15)],
+            'last_showtime': '2025-06-14',
+        }
+        for i in range(count)
+    ]
+
+
+def _pydantic_decode(items: list[dict]) -> list[Movie]:
+    return [Movie(**item) for item in items]
+
+
+def _pydantic_encode(movies: list[Movie]) -> str:
+    # what get_sessions did before the read codec
+    return json.dumps(
+        {
+            'sessions': [
+                json.loads(
+                    movie.model_dump_json(exclude={'id', 'region'}, by_alias=True)
+                )
+                for movie in movies
+            ]
+        }
+    )
+
+
+def _view_decode(items: list[dict]) -> list[MovieView]:
+    return [MovieView.from_item(item) for item in items]
+
+
+def _view_encode(views: list[MovieView]) -> str:
+    return json.dumps({'sessions': [view.to_json() for view in views]})
+
+
+def _per_item_us(func, arg, items: int, repeat: int) -> float:
+    best = min(timeit.repeat(lambda: func(arg), number=1, repeat=repeat))
+    return best / items * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, default=200)
+    parser.add_argument('--cinemas', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    items = _items(args.items, args.cinemas)
+    movies = _pydantic_decode(items)
+    views = _view_decode(items)
+    assert json.loads(_pydantic_encode(movies)) == json.loads(_view_encode(views))
+
+    print(f'{"codec":<10}{"decode":>14}{"encode":>14}')
+    for name, decode, encode, decoded in (
+        ('pydantic', _pydantic_decode, _pydantic_encode, movies),
+        ('view', _view_decode, _view_encode, views),
+    ):
+        decode_us = _per_item_us(decode, items, args.items, args.repeat)
+        encode_us = _per_item_us(encode, decoded, args.items, args.repeat)
+        print(f'{name:<10}{decode_us:>11.2f}us{encode_us:>11.2f}us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+# local stand-in for the cinema site, serving synthetic pages in the shape the scrapers
+# expect with configurable size, latency and error rate
+import asyncio
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+import random
+import sys
+
+from aiohttp import web
+
+SRC_DIR = Path(__file__).parent.parent / 'src'
+sys.path.insert(0, str(SRC_DIR))
+
+from scrape_cinemas.scraper import (  # noqa: E402
+    CINEMA_DETAILS_END,
+    CINEMA_DETAILS_START,
+    CINEMAS_END,
+    CINEMAS_START,
+)
+from scrape_sessions.scraper import (  # noqa: E402
+    MOVIE_DETAILS_END,
+    MOVIE_DETAILS_START,
+    MOVIES_END,
+    MOVIES_START,
+)
+
+
+@dataclass
+class FakeSiteConfig:
+    movies: int = 40
+    cinemas: int = 20
+    showtimes: int = 14
+    # number of filler elements padding each page, roughly 100 bytes each
+    filler: int = 200
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 0
+
+
+class FakeSite:
+    def __init__(self, config: FakeSiteConfig):
+        self.config = config
+        self.requests = Counter()
+        self.errors = 0
+        self._random = random.Random(config.seed)
+        self._runner = None
+        self.host = None
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/now-playing/{region_slug}', self._now_showing)
+        app.router.add_get('/movie/{movie_slug}/', self._movie_details)
+        app.router.add_get(
+            '/movie/times/{movie_slug}/{region_slug}', self._movie_showtimes
+        )
+        app.router.add_get(
+            '/movie/sessions/{movie_slug}/{showtime}/region/', self._movie_venues
+        )
+        app.router.add_get('/cinemas/{region_slug}/', self._cinemas)
+        app.router.add_get('/cinema/{cinema_slug}', self._cinema_details)
+        app.router.add_route('HEAD', '/', self._root)
+        return app
+
+    async def start(self) -> str:
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        self.host = f'http://127.0.0.1:{self._runner.addresses[0][1]}'
+        return self.host
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @property
+    def request_count(self) -> int:
+        return sum(self.requests.values())
+
+    async def _respond(self, page: str, body: str) -> web.Response:
+        self.requests[page] += 1
+        delay = self.config.latency + self._random.uniform(
+            0, self.config.latency_jitter
+        )
+        if delay:
+            await asyncio.sleep(delay)
+        if self._random.random() < self.config.error_rate:
+            self.errors += 1
+            return web.Response(status=503, headers={'Retry-After': '0'})
+        return web.Response(text=body, content_type='text/html')
+
+    def _filler(self, name: str) -> str:
+        return ''.join(
+            f'<p class="{name}">{name} {i} lorem ipsum dolor sit amet</p>'
+            for i in range(self.config.filler)
+        )
+
+    async def _root(self, request: web.Request) -> web.Response:
+        return web.Response()
+
+    async def _now_showing(self, request: web.Request) -> web.Response:
+        movies = ''.join(
+            f'<article class="movie-list-carousel-item"><h3 class="movie-list-carousel-item__heading">'
+            f'<a href="/movie/movie-{i}/">Movie {i} (2024)</a></h3></article>'
+            for i in range(self.config.movies)
+        )
+        body = (
+            f'<html><head>{self._filler("meta")}</head><body>{MOVIES_START}{movies}</div>'
+            f'{MOVIES_END}{self._filler("footer")}</body></html>'
+        )
+        return await self._respond('now_showing', body)
+
+    async def _movie_details(self, request: web.Request) -> web.Response:
+        slug = request.match_info['movie_slug']
+        body = (
+            f'<html><head>{self._filler("meta")}</head><body>{MOVIE_DETAILS_START}'
+            f'<div class="single-movie__featured-image"><img src="https://img.example.com/{slug}.jpg"/></div>'
+            f'<div class="single-movie__release-year">2024</div>{self._filler("cast")}'
+            f'{MOVIE_DETAILS_END}{self._filler("footer")}</body></html>'
+        )
+        return await self._respond('details', body)
+
+    async def _movie_showtimes(self, request: web.Request) -> web.Response:
+        today = date.today()
+        days = ''.join(
+            '<li class="times-calendar__el"><span class="times-calendar__el-grouper">'
+            f'<span class="times-calendar__el__date">{day.day}</span>'
+            f'<span class="times-calendar__el__month">{day.strftime("%b")}</span></span></li>'
+            for day in (today + timedelta(days=i) for i in range(self.config.showtimes))
+        )
+        body = (
+            f'<html><body><ul class="times-calendar__inner">{days}</ul></body></html>'
+        )
+        return await self._respond('showtimes', body)
+
+    async def _movie_venues(self, request: web.Request) -> web.Response:
+        # each movie plays at a deterministic subset of the cinemas
+        offset = sum(map(ord, request.match_info['movie_slug']))
+        venues = ''.join(
+            f'<div class="movie-times__cinema__copy"><h4>Cinema {(offset + i) % self.config.cinemas} (Central)</h4></div>'
+            for i in range(max(self.config.cinemas // 2, 1))
+        )
+        body = f'<html><body>{venues}{self._filler("session")}</body></html>'
+        return await self._respond('venues', body)
+
+    async def _cinemas(self, request: web.Request) -> web.Response:
+        cinemas = ''.join(
+            f'<div class="more-cinemas__single-entry"><a class="more-cinemas__link" href="/cinema/cinema-{i}/">'
+            f'<h2 class="more-cinemas__title">Cinema {i}</h2></a></div>'
+            for i in range(self.config.cinemas)
+        )
+        body = (
+            f'<html><head>{self._filler("meta")}</head><body><div class="{CINEMAS_START}">'
+            f'{cinemas}</div><div class="{CINEMAS_END}"></div>{self._filler("footer")}</body></html>'
+        )
+        return await self._respond('cinemas', body)
+
+    async def _cinema_details(self, request: web.Request) -> web.Response:
+        slug = request.match_info['cinema_slug']
+        body = (
+            f'<html><head>{self._filler("meta")}</head><body>{CINEMA_DETAILS_START}'
+            f'<ul class="cinema-info__block"><li><a href="https://{slug}.example.com">https://{slug}.example.com</a></li></ul>'
+            f'{CINEMA_DETAILS_END}{self._filler("footer")}</body></html>'
+        )
+        return await self._respond('cinema_details', body)
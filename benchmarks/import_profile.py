@@ -0,0 +1,85 @@
+# reports what each lambda handler costs to import in a fresh interpreter, which is
+# what a cold start pays before the first event is handled
+# usage: python benchmarks/import_profile.py [--top 10] [--repeat 3] [handler ...]
+import argparse
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = Path(__file__).parent.parent / 'src'
+
+HANDLERS = [
+    'get_sessions.handler',
+    'scrape_sessions.handler',
+    'scrape_cinemas.handler',
+]
+
+_INIT_SCRIPT = (
+    'import time; start = time.perf_counter(); import {module}; '
+    'print((time.perf_counter() - start) * 1000)'
+)
+
+
+def _import_times(module: str) -> list[tuple[str, int, int]]:
+    # -X importtime writes "import time: self | cumulative | module" lines to stderr
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:') :].split('|')
+        times.append((name.strip(), int(self_us), int(cumulative_us)))
+    return times
+
+
+def _init_ms(module: str) -> float:
+    # wall time of the import including module level work such as creating clients
+    result = subprocess.run(
+        [sys.executable, '-c', _INIT_SCRIPT.format(module=module)],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def _top_level_packages(times: list[tuple[str, int, int]]) -> dict[str, int]:
+    # self time summed per top level package shows which dependency is to blame
+    packages = {}
+    for name, self_us, _ in times:
+        package = name.strip().split('.')[0]
+        packages[package] = packages.get(package, 0) + self_us
+    return packages
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('handlers', nargs='*', default=HANDLERS)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    for module in args.handlers:
+        init_ms = statistics.median(_init_ms(module) for _ in range(args.repeat))
+        times = _import_times(module)
+        total_ms = sum(self_us for _, self_us, _ in times) / 1000
+        print(f'{module}: import {total_ms:.1f}ms, import + init {init_ms:.1f}ms')
+
+        packages = sorted(
+            _top_level_packages(times).items(), key=lambda item: item[1], reverse=True
+        )
+        for package, self_us in packages[: args.top]:
+            print(f'  {package:<24}{self_us / 1000:>8.1f}ms')
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+# compares per-page parse cost of the bs4 and lxml parse engines
+# usage: python benchmarks/parse_benchmark.py [--repeat 20] [--scale 200]
+import argparse
+from pathlib import Path
+import sys
+import timeit
+
+SRC_DIR = Path(__file__).parent.parent / 'src'
+sys.path.insert(0, str(SRC_DIR))
+
+from cinema_index import CinemaIndex  # noqa: E402
+from parse_engine import PARSE_ENGINES  # noqa: E402
+from scrape_cinemas.scraper import _enrich_cinema_with_url, _parse_cinema_listings  # noqa: E402
+from scrape_sessions.scraper import (  # noqa: E402
+    _parse_movie_details,
+    _parse_movie_showtimes,
+    _parse_movie_venues,
+    _parse_now_showing_movies,
+)
+
+
+def _now_showing_page(scale: int) -> str:
+    movies = ''.join(
+        f'<article class="movie-list-carousel-item"><div class="movie-list-carousel-item__info">'
+        f'<h3 class="movie-list-carousel-item__heading"><a href="/movie/movie-{i}/">Movie {i} (2024)</a></h3>'
+        f'<p class="synopsis">{"lorem ipsum " * 20}</p></div></article>'
+        for i in range(scale)
+    )
+    return f'<div class="container__outer playing-now">{movies}</div>'
+
+
+def _movie_details_page(scale: int) -> str:
+    filler = ''.join(f'<p class="cast">actor {i}</p>' for i in range(scale))
+    return (
+        f'<main><div class="movie">{filler}'
+        '<div class="single-movie__featured-image"><img src="img-store.com/movie.jpg"/></div>'
+        '<div class="single-movie__release-year">1982</div></div></main>'
+    )
+
+
+def _movie_showtimes_page(scale: int) -> str:
+    days = ''.join(
+        '<li class="times-calendar__el"><button><span class="times-calendar__el__day">Sat</span>'
+        f'<span class="times-calendar__el-grouper"><span class="times-calendar__el__date">{i % 28 + 1}</span>'
+        '<span class="times-calendar__el__month">May</span></span></button></li>'
+        for i in range(scale)
+    )
+    return f'<ul class="times-calendar__inner">{days}</ul>'
+
+
+def _movie_venues_page(scale: int) -> tuple[str, dict]:
+    venues = ''.join(
+        '<article class="timetable__article movie-times__article">'
+        f'<div class="movie-times__cinema__copy"><h4>Cinema {i} (Central)</h4></div></article>'
+        for i in range(scale)
+    )
+    cinemas = {f'Cinema {i}': f'https://cinema-{i}.com' for i in range(scale)}
+    return venues, cinemas
+
+
+def _cinemas_page(scale: int) -> str:
+    cinemas = ''.join(
+        f'<div class="more-cinemas__single-entry"><a class="more-cinemas__link" href="/cinema/cinema-{i}/">'
+        f'<div class="more-cinemas__meta"><h2 class="more-cinemas__title">Cinema {i}</h2></div></a></div>'
+        for i in range(scale)
+    )
+    return f'<div class="all-cinemas-list">{cinemas}</div>'
+
+
+def _cinema_details_page(scale: int) -> str:
+    filler = ''.join(f'<p class="amenity">amenity {i}</p>' for i in range(scale))
+    return (
+        f'<div class="mega-divider"></div>{filler}<ul class="cinema-info__block">'
+        '<li><a href="https://cinema.com">https://cinema.com</a></li></ul>'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--scale', type=int, default=200)
+    args = parser.parse_args()
+
+    venues_html, cinemas = _movie_venues_page(args.scale)
+    pages = {
+        'now_showing': lambda engine, html=_now_showing_page(args.scale): list(
+            _parse_now_showing_movies(html, engine)
+        ),
+        'movie_details': lambda engine, html=_movie_details_page(args.scale): (
+            _parse_movie_details(html, engine)
+        ),
+        'movie_showtimes': lambda engine, html=_movie_showtimes_page(args.scale): (
+            _parse_movie_showtimes(html, engine)
+        ),
+        # a fresh index per call so neither engine is timed against the other's memo
+        'movie_venues': lambda engine: _parse_movie_venues(
+            venues_html, CinemaIndex(cinemas), engine
+        ),
+        'cinemas': lambda engine, html=_cinemas_page(args.scale): list(
+            _parse_cinema_listings(html, engine)
+        ),
+        'cinema_details': lambda engine, html=_cinema_details_page(args.scale): (
+            _enrich_cinema_with_url(
+                'Cinema', 'cinema', 'Region', 'region', html, engine
+            )
+        ),
+    }
+
+    print(
+        f'{"page":<16}'
+        + ''.join(f'{engine + " ms":>12}' for engine in PARSE_ENGINES)
+        + f'{"speedup":>10}'
+    )
+    for page, parse in pages.items():
+        timings = {}
+        for engine in PARSE_ENGINES:
+            total = timeit.timeit(lambda: parse(engine), number=args.repeat)
+            timings[engine] = total / args.repeat * 1000
+        baseline, fast = (timings[engine] for engine in PARSE_ENGINES)
+        print(
+            f'{page:<16}'
+            + ''.join(f'{timings[engine]:>12.3f}' for engine in PARSE_ENGINES)
+            + f'{baseline / fast:>9.1f}x'
+        )
+
+
+if __name__ == '__main__':
+    main()
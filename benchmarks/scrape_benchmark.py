@@ -0,0 +1,197 @@
+# runs the real scrape_cinemas and scrape_sessions coroutines end to end against the
+# local fake site, no network access needed
+# usage: python benchmarks/scrape_benchmark.py [--movies 40] [--cinemas 20] [--latency 0.02]
+#        [--error-rate 0.05] [--engine lxml] [--regions 1]
+#        [--host https://...] [--record capture.okha | --replay capture.okha]
+# --record archives every response so the same run can later be replayed with --replay,
+# which needs no server at all and makes parser changes comparable run to run
+import argparse
+import asyncio
+import logging
+from pathlib import Path
+import resource
+import statistics
+import sys
+import time
+from urllib.parse import urlsplit
+
+SRC_DIR = Path(__file__).parent.parent / 'src'
+sys.path.insert(0, str(SRC_DIR))
+
+from fake_site import FakeSite, FakeSiteConfig  # noqa: E402
+from http_archive import (  # noqa: E402
+    HttpArchiveReader,
+    HttpArchiveWriter,
+    RecordingSession,
+    ReplaySession,
+)
+from metrics import MemorySink, metrics  # noqa: E402
+from models.region import Region  # noqa: E402
+from parse_engine import PARSE_ENGINES, get_parse_engine  # noqa: E402
+from retry_policy import RetryPolicy  # noqa: E402
+from scrape_cinemas.scraper import scrape_cinemas  # noqa: E402
+from scrape_sessions.scraper import scrape_sessions  # noqa: E402
+from web_utils import create_client_session  # noqa: E402
+
+
+def _percentile(values: list[float], percentile: float) -> float:
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[percentile - 1]
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is kilobytes on linux and bytes on macos
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+async def _run(args: argparse.Namespace) -> dict:
+    site = None
+    host = args.host
+    reader = HttpArchiveReader(args.replay) if args.replay else None
+    writer = HttpArchiveWriter(args.record) if args.record else None
+    if reader is not None:
+        host = host or _archive_host(reader)
+    elif host is None:
+        site = FakeSite(
+            FakeSiteConfig(
+                movies=args.movies,
+                cinemas=args.cinemas,
+                showtimes=args.showtimes,
+                filler=args.filler,
+                latency=args.latency,
+                latency_jitter=args.latency_jitter,
+                error_rate=args.error_rate,
+                seed=args.seed,
+            )
+        )
+        host = await site.start()
+
+    regions = [
+        Region(name=f'Region {i}', slug=f'region-{i}') for i in range(args.regions)
+    ]
+    # retry delays are kept short so injected errors measure retry overhead, not sleeps
+    retry_policy = RetryPolicy(base_delay=0.01)
+    try:
+        async with create_client_session() as client_session:
+            http_session = client_session
+            if reader is not None:
+                http_session = ReplaySession(reader)
+            elif writer is not None:
+                http_session = RecordingSession(client_session, writer)
+
+            start = time.perf_counter()
+            cinemas = await scrape_cinemas(
+                regions[0],
+                host,
+                parse_engine=args.engine,
+                http_session=http_session,
+                retry_policy=retry_policy,
+            )
+            cinemas_wall = time.perf_counter() - start
+
+            details_memo = {}
+            results = await asyncio.gather(
+                *(
+                    scrape_sessions(
+                        region,
+                        host,
+                        cinemas,
+                        parse_engine=args.engine,
+                        http_session=http_session,
+                        details_memo=details_memo,
+                        retry_policy=retry_policy,
+                    )
+                    for region in regions
+                )
+            )
+            wall = time.perf_counter() - start
+    finally:
+        if site is not None:
+            await site.stop()
+        if writer is not None:
+            writer.close()
+            print(f'recorded {len(writer)} responses to {args.record}')
+        if reader is not None:
+            reader.close()
+
+    return {
+        'cinemas': len(cinemas),
+        'movies': sum(len(movies or []) for movies in results),
+        'requests': dict(site.requests) if site is not None else {},
+        'errors': site.errors if site is not None else 0,
+        'cinemas_wall': cinemas_wall,
+        'wall': wall,
+        'retry_stats': retry_policy.stats(),
+    }
+
+
+def _archive_host(reader: HttpArchiveReader) -> str:
+    parts = urlsplit(reader.urls()[0])
+    return f'{parts.scheme}://{parts.netloc}'
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--movies', type=int, default=40)
+    parser.add_argument('--cinemas', type=int, default=20)
+    parser.add_argument('--showtimes', type=int, default=14)
+    parser.add_argument('--filler', type=int, default=200)
+    parser.add_argument('--regions', type=int, default=1)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--latency-jitter', type=float, default=0.01)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--engine', choices=PARSE_ENGINES, default=get_parse_engine())
+    parser.add_argument('--host', help='scrape this host instead of the fake site')
+    archive = parser.add_mutually_exclusive_group()
+    archive.add_argument('--record', help='archive every response to this file')
+    archive.add_argument('--replay', help='serve responses from this archive')
+    args = parser.parse_args()
+    # injected errors would otherwise log a warning per retry
+    logging.basicConfig(level=logging.ERROR)
+
+    # the scrapers record fetch and parse timings through the shared metrics recorder
+    sink = MemorySink()
+    metrics.sink = sink
+    result = asyncio.run(_run(args))
+    metrics.flush()
+
+    fetch_latencies = sink.values('http_request_latency')
+    request_count = len(fetch_latencies)
+    print(f'engine               {args.engine}')
+    print(f'cinemas scraped      {result["cinemas"]}')
+    print(f'movies scraped       {result["movies"]}')
+    print(f'requests served      {request_count} {result["requests"]}')
+    print(f'injected errors      {result["errors"]}')
+    print(f'retries              {result["retry_stats"]["retries"]}')
+    print(
+        f'wall time            {result["wall"]:.3f}s (cinemas {result["cinemas_wall"]:.3f}s)'
+    )
+    print(f'pages/s              {request_count / result["wall"]:.1f}')
+    print(
+        f'fetch latency        p50 {_percentile(fetch_latencies, 50):.2f}ms'
+        f'  p99 {_percentile(fetch_latencies, 99):.2f}ms'
+    )
+    for page in (
+        'now_showing',
+        'details',
+        'showtimes',
+        'venues',
+        'cinemas',
+        'cinema_details',
+    ):
+        parse_times = sink.values('parse_time', page=page)
+        if parse_times:
+            print(
+                f'parse {page:<15}p50 {_percentile(parse_times, 50):.2f}ms'
+                f'  p99 {_percentile(parse_times, 99):.2f}ms  n={len(parse_times)}'
+            )
+    print(f'peak rss             {_peak_rss_mb():.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
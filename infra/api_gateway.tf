@@ -24,6 +24,18 @@ resource "aws_apigatewayv2_route" "sessions_route" {
   target    = "integrations/${aws_apigatewayv2_integration.lambda.id}"
 }
 
+resource "aws_apigatewayv2_route" "sessions_by_cinema_route" {
+  api_id    = aws_apigatewayv2_api.http.id
+  route_key = "GET /sessions/{region_code}/cinemas/{cinema}"
+  target    = "integrations/${aws_apigatewayv2_integration.lambda.id}"
+}
+
+resource "aws_apigatewayv2_route" "sessions_by_date_route" {
+  api_id    = aws_apigatewayv2_api.http.id
+  route_key = "GET /sessions/{region_code}/dates/{date}"
+  target    = "integrations/${aws_apigatewayv2_integration.lambda.id}"
+}
+
 resource "aws_apigatewayv2_stage" "default" {
   api_id      = aws_apigatewayv2_api.http.id
   name        = "$default"
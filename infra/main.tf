@@ -72,12 +72,72 @@ resource "aws_dynamodb_table" "movies" {
     type = "S"
   }
 
+  attribute {
+    name = "region_generation"
+    type = "S"
+  }
+
   global_secondary_index {
     name            = "region_by_last_showtime"
     hash_key        = "region_code"
     range_key       = "last_showtime"
     projection_type = "ALL"
   }
+
+  # each scrape writes a new generation of the region, reads go to the current one
+  global_secondary_index {
+    name            = "region_generation_by_last_showtime"
+    hash_key        = "region_generation"
+    range_key       = "last_showtime"
+    projection_type = "ALL"
+  }
+
+  # superseded generations expire instead of being deleted
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+}
+
+resource "aws_dynamodb_table" "regions" {
+  name         = "${local.application}_regions"
+  billing_mode = "PAY_PER_REQUEST"
+
+  hash_key  = "region_code"
+  range_key = "kind"
+
+  attribute {
+    name = "region_code"
+    type = "S"
+  }
+
+  attribute {
+    name = "kind"
+    type = "S"
+  }
+}
+
+resource "aws_dynamodb_table" "movie_details" {
+  name         = "${local.application}_movie_details"
+  billing_mode = "PAY_PER_REQUEST"
+
+  hash_key  = "host"
+  range_key = "slug"
+
+  attribute {
+    name = "host"
+    type = "S"
+  }
+
+  attribute {
+    name = "slug"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
 }
 
 data "aws_iam_policy_document" "dynamodb_access_policy" {
@@ -88,11 +148,16 @@ data "aws_iam_policy_document" "dynamodb_access_policy" {
       aws_dynamodb_table.cinemas.arn,
       aws_dynamodb_table.movies.arn,
       "${aws_dynamodb_table.movies.arn}/index/region_by_last_showtime",
+      "${aws_dynamodb_table.movies.arn}/index/region_generation_by_last_showtime",
+      aws_dynamodb_table.regions.arn,
+      aws_dynamodb_table.movie_details.arn,
     ]
 
     actions = [
       "dynamodb:Query",
       "dynamodb:BatchWriteItem",
+      "dynamodb:GetItem",
+      "dynamodb:PutItem",
     ]
   }
 }
@@ -146,6 +211,7 @@ resource "aws_lambda_function" "scrape_cinemas" {
     variables = {
       SCRAPE_HOST_NZ = var.scrape_host_nz
       SCRAPE_HOST_AU = var.scrape_host_au
+      PARSE_ENGINE   = "lxml"
     }
   }
 }
@@ -157,7 +223,7 @@ resource "aws_lambda_function" "scrape_sessions" {
   handler     = "handler.lambda_handler"
   runtime     = "python3.12"
   memory_size = 512
-  timeout     = 60
+  timeout     = 180
 
   filename         = "${path.module}/../build/scrape_sessions.zip"
   source_code_hash = filebase64sha256("../build/scrape_sessions.zip")
@@ -166,6 +232,7 @@ resource "aws_lambda_function" "scrape_sessions" {
     variables = {
       SCRAPE_HOST_NZ = var.scrape_host_nz
       SCRAPE_HOST_AU = var.scrape_host_au
+      PARSE_ENGINE   = "lxml"
     }
   }
 }
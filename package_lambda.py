@@ -29,6 +29,15 @@ def package_scraper_lambdas():
         (SRC_DIR / 'models', temp_dir / 'models'),
         (SRC_DIR / 'repositories', temp_dir / 'repositories'),
         (SRC_DIR / 'web_utils.py', temp_dir / 'web_utils.py'),
+        (SRC_DIR / 'cinema_index.py', temp_dir / 'cinema_index.py'),
+        (SRC_DIR / 'crawl_scheduler.py', temp_dir / 'crawl_scheduler.py'),
+        (SRC_DIR / 'http_cache.py', temp_dir / 'http_cache.py'),
+        (SRC_DIR / 'http_archive.py', temp_dir / 'http_archive.py'),
+        (SRC_DIR / 'details_cache.py', temp_dir / 'details_cache.py'),
+        (SRC_DIR / 'parse_engine.py', temp_dir / 'parse_engine.py'),
+        (SRC_DIR / 'parse_stage.py', temp_dir / 'parse_stage.py'),
+        (SRC_DIR / 'retry_policy.py', temp_dir / 'retry_policy.py'),
+        (SRC_DIR / 'metrics.py', temp_dir / 'metrics.py'),
         (SRC_DIR / 'exceptions.py', temp_dir / 'exceptions.py'),
     ]
     for src, dest in to_copy:
@@ -73,12 +82,46 @@ def package_get_sessions_lambda():
     print(f'packaging {_lambda}')
 
     files_to_copy = [
+        (
+            SRC_DIR / 'repositories' / 'bulk_writer.py',
+            temp_dir / 'repositories' / 'bulk_writer.py',
+        ),
         (
             SRC_DIR / 'repositories' / 'movie_repository.py',
             temp_dir / 'repositories' / 'movie_repository.py',
         ),
+        (
+            SRC_DIR / 'repositories' / 'query.py',
+            temp_dir / 'repositories' / 'query.py',
+        ),
+        (
+            SRC_DIR / 'repositories' / 'reconcile.py',
+            temp_dir / 'repositories' / 'reconcile.py',
+        ),
+        (
+            SRC_DIR / 'repositories' / 'region_repository.py',
+            temp_dir / 'repositories' / 'region_repository.py',
+        ),
+        (
+            SRC_DIR / 'repositories' / 'showtimes_codec.py',
+            temp_dir / 'repositories' / 'showtimes_codec.py',
+        ),
+        (
+            SRC_DIR / _lambda / 'response_cache.py',
+            temp_dir / _lambda / 'response_cache.py',
+        ),
+        (
+            SRC_DIR / _lambda / 'response_encoding.py',
+            temp_dir / _lambda / 'response_encoding.py',
+        ),
+        (SRC_DIR / 'metrics.py', temp_dir / 'metrics.py'),
         (SRC_DIR / 'models' / 'movie.py', temp_dir / 'models' / 'movie.py'),
         (SRC_DIR / 'models' / 'cinema.py', temp_dir / 'models' / 'cinema.py'),
+        (SRC_DIR / 'models' / 'ids.py', temp_dir / 'models' / 'ids.py'),
+        (
+            SRC_DIR / 'models' / 'movie_view.py',
+            temp_dir / 'models' / 'movie_view.py',
+        ),
     ]
     for src, dest in files_to_copy:
         dest.parent.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,163 @@
+from difflib import SequenceMatcher
+import re
+from typing import Mapping, NamedTuple, Optional
+
+# words that venue pages add or leave off cinema names, 'Rialto' and 'Rialto Cinemas'
+# are taken to be the same cinema unless another cinema also reduces to 'rialto'
+GENERIC_WORDS = frozenset(
+    ('the', 'cinema', 'cinemas', 'theatre', 'theatres', 'theater')
+)
+
+# close enough for a typo or a dropped letter, not for two cinemas of the same chain
+DEFAULT_FUZZY_CUTOFF = 0.88
+# short names are too alike for fuzzy matching to tell apart
+MIN_FUZZY_LENGTH = 5
+
+
+class CinemaMatch(NamedTuple):
+    name: str
+    homepage_url: Optional[str]
+
+
+def normalise_cinema_name(name: str) -> str:
+    # 'Hoyts  (Sylvia Park)' -> 'hoyts', 'Event Cinemas - Albany' -> 'eventcinemasalbany'
+    return _name_key(re.sub(r'\([^)]*\)', '', name))
+
+
+def _name_key(name: str) -> str:
+    return re.sub(r'[\W_]+', '', name.casefold())
+
+
+def _parenthetical(name: str) -> str:
+    # 'Hoyts (Sylvia Park)' -> 'sylviapark', the branch that the alias forms drop
+    return ''.join(map(_name_key, re.findall(r'\(([^)]*)\)', name)))
+
+
+def _without_generic_words(name: str) -> str:
+    words = re.sub(r'\([^)]*\)', '', name).split()
+    return ''.join(
+        key for key in map(_name_key, words) if key and key not in GENERIC_WORDS
+    )
+
+
+class CinemaIndex:
+    # lookup from venue names as they appear on movie pages to the cinemas of a
+    # region. keys and aliases are built once per scrape and each distinct venue name
+    # is resolved once, later movies showing at the same venue hit the memo
+    def __init__(
+        self,
+        cinemas: Mapping[str, Optional[object]],
+        aliases: Optional[Mapping[str, str]] = None,
+        fuzzy_cutoff: float = DEFAULT_FUZZY_CUTOFF,
+    ):
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.hits = 0
+        self.alias_hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+        self._keys: dict[str, CinemaMatch] = {}
+        self._aliases: dict[str, CinemaMatch] = {}
+        self._resolved: dict[str, Optional[CinemaMatch]] = {}
+
+        for name, homepage_url in cinemas.items():
+            match = CinemaMatch(
+                name, str(homepage_url) if homepage_url is not None else None
+            )
+            self._keys.setdefault(_name_key(name), match)
+
+        # 'Hoyts (Sylvia Park)' and 'Hoyts (Botany)' both reduce to 'hoyts', so a
+        # reduced name is only an alias when a single cinema reduces to it
+        candidates: dict[str, set[CinemaMatch]] = {}
+        for match in self._keys.values():
+            for alias in (
+                normalise_cinema_name(match.name),
+                _without_generic_words(match.name),
+            ):
+                if alias and alias not in self._keys:
+                    candidates.setdefault(alias, set()).add(match)
+        for alias, matches in candidates.items():
+            if len(matches) == 1:
+                self._aliases[alias] = next(iter(matches))
+
+        # explicit aliases map a venue name to the cinema it stands for
+        for alias, name in (aliases or {}).items():
+            match = self._keys.get(_name_key(name))
+            if match is not None:
+                self._aliases[_name_key(alias)] = match
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'alias_hits': self.alias_hits,
+            'fuzzy_hits': self.fuzzy_hits,
+            'misses': self.misses,
+            'names': len(self._resolved),
+        }
+
+    def resolve(self, venue_name: str) -> Optional[CinemaMatch]:
+        try:
+            match = self._resolved[venue_name]
+        except KeyError:
+            match = self._resolved[venue_name] = self._lookup(venue_name)
+        else:
+            if match is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return match
+
+    def _lookup(self, venue_name: str) -> Optional[CinemaMatch]:
+        key = _name_key(venue_name)
+        match = self._keys.get(key)
+        if match is not None:
+            self.hits += 1
+            return match
+
+        # the reduced forms drop the venue's parenthetical, so 'Hoyts (Botany)' may only
+        # match 'Hoyts (Sylvia Park)' through them if the branches agree
+        branch = _parenthetical(venue_name)
+        for alias in (
+            key,
+            normalise_cinema_name(venue_name),
+            _without_generic_words(venue_name),
+        ):
+            match = self._aliases.get(alias)
+            if match is not None and (
+                alias == key or not branch or _parenthetical(match.name) in ('', branch)
+            ):
+                self.alias_hits += 1
+                return match
+
+        match = self._fuzzy_lookup(key)
+        if match is not None:
+            self.fuzzy_hits += 1
+            return match
+
+        self.misses += 1
+        return None
+
+    def _fuzzy_lookup(self, key: str) -> Optional[CinemaMatch]:
+        # the cutoff bounds how far a name may drift and a tie between two cinemas is a
+        # miss. only runs once per unknown venue name thanks to the memo
+        if len(key) < MIN_FUZZY_LENGTH:
+            return None
+
+        matcher = SequenceMatcher(b=key)
+        best, best_ratio, tied = None, self.fuzzy_cutoff, False
+        for candidate, match in self._keys.items():
+            matcher.set_seq1(candidate)
+            # cheap upper bounds on the ratio rule out most candidates
+            if (
+                matcher.real_quick_ratio() < best_ratio
+                or matcher.quick_ratio() < best_ratio
+            ):
+                continue
+            ratio = matcher.ratio()
+            if ratio > best_ratio or (best is None and ratio == best_ratio):
+                best, best_ratio, tied = match, ratio, False
+            elif ratio == best_ratio:
+                tied = True
+        return None if tied else best
@@ -0,0 +1,114 @@
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+import heapq
+import itertools
+import logging
+import time
+from typing import AsyncIterator
+from urllib.parse import urlsplit
+
+# lower value is served first
+PRIORITY_NOW_SHOWING = 0
+PRIORITY_SHOWTIMES = 1
+PRIORITY_VENUES = 1
+PRIORITY_DETAILS = 2
+
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_MAX_PER_HOST = 6
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerStats:
+    def __init__(self):
+        self.request_count = 0
+        self.max_queue_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_enqueue(self, queue_depth: int):
+        self.request_count += 1
+        self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+
+    def record_wait(self, wait: float):
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def summary(self) -> dict:
+        mean_wait = self.total_wait / self.request_count if self.request_count else 0.0
+        return {
+            'requests': self.request_count,
+            'max_queue_depth': self.max_queue_depth,
+            'mean_wait_ms': round(mean_wait * 1000, 1),
+            'max_wait_ms': round(self.max_wait * 1000, 1),
+        }
+
+
+class CrawlScheduler:
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_per_host: int = DEFAULT_MAX_PER_HOST,
+    ):
+        if max_concurrency < 1 or max_per_host < 1:
+            raise ValueError('scheduler limits must be at least 1')
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self.stats = SchedulerStats()
+        self._waiting: list[tuple[int, int, str, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._active = 0
+        self._active_by_host: dict[str, int] = defaultdict(int)
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiting)
+
+    @asynccontextmanager
+    async def slot(self, url: str, priority: int) -> AsyncIterator[None]:
+        host = urlsplit(url).netloc.lower()
+        enqueued_at = time.monotonic()
+        grant = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (priority, next(self._sequence), host, grant))
+        self.stats.record_enqueue(self.queue_depth)
+        self._dispatch()
+
+        try:
+            await grant
+        except asyncio.CancelledError:
+            # the slot may have been granted just before the waiter was cancelled
+            if grant.done() and not grant.cancelled():
+                self._release(host)
+            raise
+
+        wait = time.monotonic() - enqueued_at
+        self.stats.record_wait(wait)
+        logger.debug(f'scheduler granted slot after {wait * 1000:.1f}ms: {url}')
+        try:
+            yield
+        finally:
+            self._release(host)
+
+    def _release(self, host: str):
+        self._active -= 1
+        self._active_by_host[host] -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        # hosts at their limit are skipped so lower priority work on other hosts can still run
+        deferred = []
+        while self._waiting and self._active < self.max_concurrency:
+            entry = heapq.heappop(self._waiting)
+            _, _, host, grant = entry
+            if grant.done():
+                continue
+            if self._active_by_host[host] >= self.max_per_host:
+                deferred.append(entry)
+                continue
+            self._active += 1
+            self._active_by_host[host] += 1
+            grant.set_result(None)
+
+        for entry in deferred:
+            heapq.heappush(self._waiting, entry)
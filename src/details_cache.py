@@ -0,0 +1,86 @@
+import time
+from typing import Iterable, Optional
+
+# release year and poster rarely change once a movie is listed, failed pages are retried
+# sooner in case the page was only broken temporarily
+DEFAULT_TTL = 30 * 24 * 60 * 60
+DEFAULT_NEGATIVE_TTL = 24 * 60 * 60
+
+
+class MovieDetailsCache:
+    # holds movie details items keyed by (host, slug). items are loaded from and written
+    # back to persistent storage by the caller, the cache only tracks what changed
+    def __init__(
+        self,
+        items: Iterable[dict] = (),
+        ttl: float = DEFAULT_TTL,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self._items: dict[tuple[str, str], dict] = {}
+        self._pending: dict[tuple[str, str], dict] = {}
+        for item in items:
+            self._items[(item['host'], item['slug'])] = item
+
+    def get(self, host: str, slug: str) -> Optional[dict]:
+        # returns the cached item, which is either details or a failure marker, or none
+        # when the page has to be fetched
+        item = self._items.get((host, slug))
+        if item is None or float(item['expires_at']) <= time.time():
+            self.misses += 1
+            return None
+
+        if item.get('failed'):
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return item
+
+    def put(self, host: str, slug: str, details: dict):
+        self._set(
+            {
+                'host': host,
+                'slug': slug,
+                'release_year': details['release_year'],
+                'image_url': details['image_url'],
+                'expires_at': int(time.time() + self.ttl),
+            }
+        )
+
+    def put_failure(self, host: str, slug: str):
+        self._set(
+            {
+                'host': host,
+                'slug': slug,
+                'failed': True,
+                'expires_at': int(time.time() + self.negative_ttl),
+            }
+        )
+
+    def pending(self) -> list[dict]:
+        return list(self._pending.values())
+
+    def clear_pending(self):
+        self._pending.clear()
+
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'negative_hits': self.negative_hits,
+            'misses': self.misses,
+            'pending': len(self._pending),
+        }
+
+    def _set(self, item: dict):
+        key = (item['host'], item['slug'])
+        self._items[key] = item
+        self._pending[key] = item
+
+
+def to_details(item: dict) -> dict:
+    # dynamodb returns numbers as decimals
+    return {'release_year': int(item['release_year']), 'image_url': item['image_url']}
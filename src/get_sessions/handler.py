@@ -1,13 +1,35 @@
-from datetime import datetime
+import base64
+from bisect import bisect_left
+from datetime import date, datetime
 import json
 import logging
 import os
+from typing import NamedTuple, Optional
 from zoneinfo import ZoneInfo
 
 import boto3
 
-from models.movie import Movie
-from repositories.movie_repository import get_movies_by_region
+from get_sessions.response_cache import CachedResponse, ResponseCache, etag_matches
+from get_sessions.response_encoding import (
+    IDENTITY,
+    applied_encoding,
+    encode_body,
+    encoded_etag,
+    negotiate_encoding,
+)
+from metrics import metrics
+from models.ids import name_key
+from models.movie_view import FIELD_ATTRIBUTES
+from repositories.movie_repository import get_movie_views_by_region
+from repositories.region_repository import (
+    CINEMA_INDEX,
+    DATE_INDEX,
+    RegionPointer,
+    get_region_index,
+    get_region_pointer,
+    get_region_snapshot,
+)
+from repositories.showtimes_codec import trim_showtimes
 
 
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
@@ -20,9 +42,37 @@ REGION_TIMEZONES = {
     'brisbane-central': 'Australia/Brisbane',
 }
 
+MAX_PAGE_SIZE = 100
+
+# survives across warm invocations, the tables are created during init so the first
+# request does not pay for loading the dynamodb resource model
+response_cache = ResponseCache()
+dynamodb = boto3.resource('dynamodb', region_name='ap-southeast-2')
+movies_table = dynamodb.Table('operation-kino_movies')
+regions_table = dynamodb.Table('operation-kino_regions')
+
+
+class SessionsQuery(NamedTuple):
+    # everything besides the region that shapes a response, also its cache key
+    lookup: Optional[tuple[str, str]] = None
+    date_from: Optional[str] = None
+    date_to: Optional[str] = None
+    fields: Optional[tuple[str, ...]] = None
+    offset: int = 0
+    limit: Optional[int] = None
+
 
 def lambda_handler(event, context):
-    region_code = event['pathParameters']['region_code']
+    try:
+        with metrics.timer('handler_latency'):
+            return _get_sessions(event)
+    finally:
+        metrics.flush(function='get_sessions')
+
+
+def _get_sessions(event: dict) -> dict:
+    path_parameters = event['pathParameters']
+    region_code = path_parameters['region_code']
 
     if not region_code:
         return {'statusCode': 400, 'body': 'missing region'}
@@ -30,24 +80,58 @@ def lambda_handler(event, context):
     timezone = REGION_TIMEZONES.get(region_code.lower())
 
     try:
-        dynamodb = boto3.resource('dynamodb', region_name='ap-southeast-2')
-
-        movies_table = dynamodb.Table('operation-kino_movies')
-        sessions = get_movies_by_region(movies_table, region_code, timezone)
-        if not sessions:
-            logger.warning(f'no sessions found for <{region_code}>')
+        query = _parse_query(path_parameters, event.get('queryStringParameters'))
+    except ValueError as e:
+        return {'statusCode': 400, 'body': str(e)}
 
-        sessions_filtered = _filter_past_showtimes(sessions, timezone)
+    try:
+        # a new version is written whenever a scrape changes the region, and the local
+        # date is part of the key because past showtimes are filtered out per day
+        pointer = get_region_pointer(regions_table, region_code)
+        cache_key = (region_code, datetime.now(ZoneInfo(timezone)).date(), query)
+        cached_response = response_cache.get(cache_key, pointer.version)
+        if cached_response is None:
+            metrics.increment('response_cache_misses')
+            if query.lookup is None:
+                sessions = _render_sessions(
+                    movies_table, regions_table, region_code, timezone, query, pointer
+                )
+            else:
+                sessions = _render_index(
+                    movies_table, regions_table, region_code, timezone, query, pointer
+                )
+            body = json.dumps(_shape_response(sessions, query))
+            cached_response = response_cache.put(cache_key, pointer.version, body)
+        else:
+            metrics.increment('response_cache_hits')
 
-        sessions_json = [
-            json.loads(session.model_dump_json(exclude={'id', 'region'}, by_alias=True))
-            for session in sessions_filtered
-        ]
+        headers = event.get('headers') or {}
+        # the etag is compared before compressing so a 304 never pays for it
+        encoding = applied_encoding(
+            cached_response.body, negotiate_encoding(headers.get('accept-encoding'))
+        )
+        etag = encoded_etag(cached_response.etag, encoding)
+        if etag_matches(headers.get('if-none-match'), etag):
+            metrics.increment('not_modified_responses')
+            return {
+                'statusCode': 304,
+                'headers': {'ETag': etag, 'Vary': 'Accept-Encoding'},
+            }
 
+        body, encoding = _encode_response(cached_response, encoding)
+        response_headers = {
+            'Content-Type': 'application/json',
+            'ETag': etag,
+            'Vary': 'Accept-Encoding',
+        }
+        if encoding != IDENTITY:
+            response_headers['Content-Encoding'] = encoding
+        metrics.increment('response_bytes', len(body), encoding=encoding)
         return {
             'statusCode': 200,
-            'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps({'sessions': sessions_json}),
+            'headers': response_headers,
+            'body': body,
+            'isBase64Encoded': encoding != IDENTITY,
         }
     except Exception as e:
         return {
@@ -56,13 +140,250 @@ def lambda_handler(event, context):
         }
 
 
-def _filter_past_showtimes(sessions: list[Movie], timezone: str):
-    now = datetime.now(ZoneInfo(timezone)).date()
+def _encode_response(cached_response: CachedResponse, encoding: str) -> tuple[str, str]:
+    # compressed once per cached body and coding rather than on every request
+    encoded = cached_response.encoded.get(encoding)
+    if encoded is None:
+        encoded = encode_body(cached_response.body, encoding)
+        cached_response.encoded[encoding] = encoded
+    return encoded
+
+
+def _parse_query(
+    path_parameters: dict, query_parameters: Optional[dict]
+) -> SessionsQuery:
+    query_parameters = query_parameters or {}
+    date_from, date_to = _parse_date_range(query_parameters)
+    offset, limit = _parse_page(query_parameters)
+    return SessionsQuery(
+        lookup=_parse_lookup(path_parameters),
+        date_from=date_from,
+        date_to=date_to,
+        fields=_parse_fields(query_parameters),
+        offset=offset,
+        limit=limit,
+    )
+
+
+def _parse_date_range(
+    query_parameters: Optional[dict],
+) -> tuple[Optional[str], Optional[str]]:
+    # optional from and to query parameters, inclusive iso dates
+    query_parameters = query_parameters or {}
+    date_range = []
+    for name in ('from', 'to'):
+        value = query_parameters.get(name) or None
+        if value is not None:
+            try:
+                value = date.fromisoformat(value).isoformat()
+            except ValueError:
+                raise ValueError(f'invalid {name} date: {value}')
+        date_range.append(value)
+
+    date_from, date_to = date_range
+    if date_from and date_to and date_from > date_to:
+        raise ValueError('from date is after to date')
+    return date_from, date_to
+
+
+def _parse_fields(query_parameters: dict) -> Optional[tuple[str, ...]]:
+    # fields=title,showtimes limits each session to those keys
+    fields = query_parameters.get('fields')
+    if not fields:
+        return None
+
+    requested = {field.strip() for field in fields.split(',') if field.strip()}
+    if not requested or not requested <= FIELD_ATTRIBUTES.keys():
+        raise ValueError(f'invalid fields: {fields}')
+    # kept in response order so the same selection always shares a cache entry
+    return tuple(field for field in FIELD_ATTRIBUTES if field in requested)
+
+
+def _parse_page(query_parameters: dict) -> tuple[int, Optional[int]]:
+    # pages are opt in with limit, the cursor from one page is passed to get the next
+    limit = query_parameters.get('limit')
+    cursor = query_parameters.get('cursor')
+    if limit is None:
+        if cursor:
+            raise ValueError('cursor given without limit')
+        return 0, None
+
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise ValueError(f'invalid limit: {limit}')
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+
+    offset = _decode_cursor(cursor) if cursor else 0
+    return offset, limit
 
-    def filter_showtimes(session: Movie):
-        session.showtimes = [
-            st for st in session.showtimes if datetime.fromisoformat(st).date() >= now
+
+def _encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({'offset': offset}).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> int:
+    try:
+        offset = json.loads(base64.urlsafe_b64decode(cursor.encode()))['offset']
+    except (ValueError, TypeError, KeyError):
+        raise ValueError(f'invalid cursor: {cursor}')
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError(f'invalid cursor: {cursor}')
+    return offset
+
+
+def _parse_lookup(path_parameters: dict) -> Optional[tuple[str, str]]:
+    # /sessions/{region_code}/cinemas/{cinema} and /sessions/{region_code}/dates/{date}
+    cinema = path_parameters.get('cinema')
+    if cinema is not None:
+        cinema_key = name_key(cinema)
+        if not cinema_key:
+            raise ValueError(f'invalid cinema: {cinema}')
+        return CINEMA_INDEX, cinema_key
+
+    showtime = path_parameters.get('date')
+    if showtime is not None:
+        try:
+            return DATE_INDEX, date.fromisoformat(showtime).isoformat()
+        except ValueError:
+            raise ValueError(f'invalid date: {showtime}')
+
+    return None
+
+
+def _shape_response(sessions: list[dict], query: SessionsQuery) -> dict:
+    # sessions keep the order they were stored in, by last showtime, so offsets are
+    # stable until the next scrape changes the region
+    if query.limit is not None:
+        end = query.offset + query.limit
+        page = sessions[query.offset : end]
+        next_cursor = _encode_cursor(end) if end < len(sessions) else None
+    else:
+        page = sessions
+        next_cursor = None
+
+    if query.fields is not None:
+        page = [
+            {field: session[field] for field in query.fields if field in session}
+            for session in page
         ]
-        return session
 
-    return list(map(filter_showtimes, sessions))
+    response = {'sessions': page}
+    if next_cursor is not None:
+        response['nextCursor'] = next_cursor
+    return response
+
+
+def _render_index(
+    movies_table,
+    regions_table,
+    region_code: str,
+    timezone: str,
+    query: SessionsQuery,
+    pointer: RegionPointer,
+) -> list[dict]:
+    # index items are written by the scrape alongside the snapshot, a missing one
+    # means nothing in the region matches
+    index, key = query.lookup
+    metrics.increment('index_lookups', index=index)
+    region_index = get_region_index(regions_table, region_code, index, key)
+    if region_index is None:
+        return []
+    if region_index['version'] != pointer.version or region_index['sessions'] is None:
+        # written for another version, the scrape behind the pointer has not
+        # reconciled the indexes yet or a slower one raced it, or the index was too
+        # large to store and only its marker was written
+        logger.warning(f'unusable index <{index}#{key}> for <{region_code}>')
+        metrics.increment('index_misses', index=index)
+        return _lookup_sessions(
+            _render_sessions(
+                movies_table,
+                regions_table,
+                region_code,
+                timezone,
+                query._replace(lookup=None, fields=None),
+                pointer,
+            ),
+            query.lookup,
+        )
+
+    today = datetime.now(ZoneInfo(timezone)).date().isoformat()
+    return _trim_snapshot(
+        region_index['sessions'], max(query.date_from or today, today), query.date_to
+    )
+
+
+def _lookup_sessions(sessions: list[dict], lookup: tuple[str, str]) -> list[dict]:
+    # the sessions the index item for the lookup would have held
+    index, key = lookup
+    if index == CINEMA_INDEX:
+        return [
+            session
+            for session in sessions
+            if any(name_key(cinema['name']) == key for cinema in session['cinemas'])
+        ]
+    return [
+        {**session, 'showtimes': [key]}
+        for session in sessions
+        if key in session['showtimes']
+    ]
+
+
+def _render_sessions(
+    movies_table,
+    regions_table,
+    region_code: str,
+    timezone: str,
+    query: SessionsQuery = SessionsQuery(),
+    pointer: RegionPointer = RegionPointer(None, None),
+) -> list[dict]:
+    snapshot = get_region_snapshot(regions_table, region_code)
+    if snapshot is not None and snapshot['version'] != pointer.version:
+        # left behind by an earlier version, the movies query has the current one
+        logger.warning(f'stale snapshot for <{region_code}>')
+        snapshot = None
+    if snapshot is not None:
+        metrics.increment('snapshot_hits')
+        today = datetime.now(ZoneInfo(timezone)).date().isoformat()
+        return _trim_snapshot(
+            snapshot['sessions'], max(query.date_from or today, today), query.date_to
+        )
+
+    logger.warning(f'no snapshot found for <{region_code}>, querying movies')
+    metrics.increment('snapshot_misses')
+    # only the current generation is read, past showtimes are dropped by the
+    # repository while decoding the items and only the attributes behind the
+    # requested fields are read
+    sessions = get_movie_views_by_region(
+        movies_table,
+        region_code,
+        timezone,
+        query.date_from,
+        query.date_to,
+        query.fields,
+        pointer.generation,
+    )
+    if not sessions:
+        logger.warning(f'no sessions found for <{region_code}>')
+
+    return [session.to_json(query.fields) for session in sessions]
+
+
+def _trim_snapshot(
+    sessions: list[dict], date_from: str, date_to: Optional[str] = None
+) -> list[dict]:
+    # snapshots are sorted by last showtime so ended movies are a prefix to skip
+    first_running = bisect_left(
+        sessions, date_from, key=lambda session: session['lastShowtime']
+    )
+    trimmed = []
+    for session in sessions[first_running:]:
+        showtimes = session['showtimes']
+        showtimes_in_range = trim_showtimes(showtimes, date_from, date_to)
+        if not showtimes_in_range:
+            continue
+        if len(showtimes_in_range) != len(showtimes):
+            session = {**session, 'showtimes': showtimes_in_range}
+        trimmed.append(session)
+    return trimmed
@@ -0,0 +1,70 @@
+from collections import OrderedDict
+import hashlib
+import time
+from typing import Hashable, NamedTuple, Optional
+
+DEFAULT_MAX_ENTRIES = 32
+DEFAULT_TTL = 300
+
+
+class CachedResponse(NamedTuple):
+    version: Optional[str]
+    etag: str
+    body: str
+    expires_at: float
+    # compressed bodies by coding, filled in as clients ask for them
+    encoded: dict[str, tuple[str, str]]
+
+
+class ResponseCache:
+    # lives at module scope so warm invocations reuse rendered bodies. an entry is only
+    # served while the region version written by the scrape still matches
+    def __init__(
+        self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, CachedResponse] = OrderedDict()
+
+    def get(self, key: Hashable, version: Optional[str]) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.version != version or entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Hashable, version: Optional[str], body: str) -> CachedResponse:
+        entry = CachedResponse(
+            version=version,
+            etag=make_etag(body),
+            body=body,
+            expires_at=time.monotonic() + self.ttl,
+            encoded={},
+        )
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        self._entries.clear()
+
+
+def make_etag(body: str) -> str:
+    return '"' + hashlib.sha1(body.encode('utf-8')).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+
+    # weak comparison as per rfc 9110, W/"x" matches "x"
+    candidates = (tag.strip().removeprefix('W/') for tag in if_none_match.split(','))
+    return etag.removeprefix('W/') in candidates
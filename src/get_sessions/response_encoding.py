@@ -0,0 +1,77 @@
+import base64
+import gzip
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:
+    # brotli is optional, without it responses are only ever gzipped
+    brotli = None
+
+IDENTITY = 'identity'
+GZIP = 'gzip'
+BROTLI = 'br'
+
+# small bodies cost more to base64 and decompress than they save
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def supported_encodings() -> tuple[str, ...]:
+    return (BROTLI, GZIP) if brotli is not None else (GZIP,)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> str:
+    # picks the supported coding with the highest q value, brotli wins a tie
+    if not accept_encoding:
+        return IDENTITY
+
+    weights = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding] = weight
+
+    best, best_weight = IDENTITY, 0.0
+    for coding in supported_encodings():
+        weight = weights.get(coding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def applied_encoding(body: str, encoding: str) -> str:
+    # the coding encode_body will apply, known without compressing so a conditional
+    # request can be answered with a 304 first
+    if encoding == IDENTITY or len(body.encode('utf-8')) < MIN_COMPRESS_BYTES:
+        return IDENTITY
+    return encoding
+
+
+def encode_body(body: str, encoding: str) -> tuple[str, str]:
+    # returns the body as api gateway expects it, base64 when compressed, along with
+    # the coding that was actually applied
+    encoding = applied_encoding(body, encoding)
+    if encoding == IDENTITY:
+        return body, IDENTITY
+    raw = body.encode('utf-8')
+    if encoding == BROTLI:
+        compressed = brotli.compress(raw, quality=BROTLI_QUALITY)
+    else:
+        compressed = gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)
+    return base64.b64encode(compressed).decode('ascii'), encoding
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    # each coding is a different representation so it needs its own strong etag
+    if encoding == IDENTITY:
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
@@ -0,0 +1,318 @@
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+import json
+import logging
+import os
+from pathlib import Path
+import struct
+from typing import AsyncIterator, Iterator, NamedTuple, Optional
+import zlib
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+# archive layout: magic, then one entry per response as
+#   [meta length][body length][meta json][zlib body]
+# and finally the json index of url -> entry offset followed by the index offset.
+# entries are flushed as they are added and carry their url, so an archive whose
+# writer never closed is indexed by scanning them instead
+ARCHIVE_MAGIC = b'OKHTTPARCHIVE1\n'
+_ENTRY_HEADER = struct.Struct('>II')
+_FOOTER = struct.Struct('>Q')
+
+logger = logging.getLogger(__name__)
+
+# conditional requests are not recorded so every archived entry has a full body
+_CONDITIONAL_HEADERS = ('If-None-Match', 'If-Modified-Since')
+# bodies are archived after aiohttp has decoded them
+_DROPPED_RESPONSE_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+
+class ArchivedResponse(NamedTuple):
+    url: str
+    status: int
+    headers: list[tuple[str, str]]
+    body: bytes
+
+
+class HttpArchiveWriter:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._file = open(self.path, 'wb')
+        self._file.write(ARCHIVE_MAGIC)
+        self._index: dict[str, int] = {}
+
+    def add(self, url: str, status: int, headers: list[tuple[str, str]], body: bytes):
+        # a url fetched more than once keeps its latest response
+        meta = json.dumps({'url': url, 'status': status, 'headers': headers}).encode(
+            'utf-8'
+        )
+        compressed_body = zlib.compress(body)
+        self._index[url] = self._file.tell()
+        self._file.write(_ENTRY_HEADER.pack(len(meta), len(compressed_body)))
+        self._file.write(meta)
+        self._file.write(compressed_body)
+        self._file.flush()
+
+    def close(self):
+        if self._file.closed:
+            return
+        index_offset = self._file.tell()
+        self._file.write(json.dumps(self._index).encode('utf-8'))
+        self._file.write(_FOOTER.pack(index_offset))
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __enter__(self) -> 'HttpArchiveWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class HttpArchiveReader:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        if self._file.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+            self._file.close()
+            raise ValueError(f'not an http archive: {self.path}')
+
+        index = self._read_index()
+        if index is None:
+            logger.warning(f'http archive was not closed, scanning entries: {path}')
+            index = self._scan_index()
+        self._index: dict[str, int] = index
+
+    def get(self, url: str) -> Optional[ArchivedResponse]:
+        offset = self._index.get(url)
+        if offset is None:
+            return None
+
+        self._file.seek(offset)
+        meta_length, body_length = _ENTRY_HEADER.unpack(
+            self._file.read(_ENTRY_HEADER.size)
+        )
+        meta = json.loads(self._file.read(meta_length))
+        body = zlib.decompress(self._file.read(body_length))
+        return ArchivedResponse(
+            meta['url'],
+            meta['status'],
+            [tuple(header) for header in meta['headers']],
+            body,
+        )
+
+    def urls(self) -> list[str]:
+        return list(self._index)
+
+    def _read_index(self) -> Optional[dict[str, int]]:
+        end = self._file.seek(0, 2)
+        if end < len(ARCHIVE_MAGIC) + _FOOTER.size:
+            return None
+        footer_offset = self._file.seek(end - _FOOTER.size)
+        (index_offset,) = _FOOTER.unpack(self._file.read(_FOOTER.size))
+        if not len(ARCHIVE_MAGIC) <= index_offset < footer_offset:
+            return None
+
+        self._file.seek(index_offset)
+        try:
+            index = json.loads(self._file.read(footer_offset - index_offset))
+        except ValueError:
+            return None
+        return index if isinstance(index, dict) else None
+
+    def _scan_index(self) -> dict[str, int]:
+        # stops at the first entry cut short, everything before it is intact
+        index = {}
+        end = self._file.seek(0, 2)
+        offset = self._file.seek(len(ARCHIVE_MAGIC))
+        while offset + _ENTRY_HEADER.size <= end:
+            meta_length, body_length = _ENTRY_HEADER.unpack(
+                self._file.read(_ENTRY_HEADER.size)
+            )
+            entry_end = offset + _ENTRY_HEADER.size + meta_length + body_length
+            if entry_end > end:
+                break
+            try:
+                url = json.loads(self._file.read(meta_length))['url']
+            except (ValueError, KeyError):
+                break
+            index[url] = offset
+            offset = self._file.seek(entry_end)
+        return index
+
+    def close(self):
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __enter__(self) -> 'HttpArchiveReader':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class RecordingSession:
+    # stands in for the aiohttp session passed to fetch_bytes and stream_html and writes
+    # every response it hands out to the archive. a streamed response the scraper stops
+    # reading at its end marker is still read to the end, so the capture can be
+    # replayed with other markers
+    def __init__(self, session: aiohttp.ClientSession, writer: HttpArchiveWriter):
+        self.session = session
+        self.writer = writer
+
+    @asynccontextmanager
+    async def get(
+        self, url: str, headers: Optional[dict] = None, **kwargs
+    ) -> AsyncIterator['_RecordingResponse']:
+        headers = {
+            name: value
+            for name, value in (headers or {}).items()
+            if name not in _CONDITIONAL_HEADERS
+        }
+        async with self.session.get(url, headers=headers, **kwargs) as response:
+            recording = _RecordingResponse(response)
+            try:
+                yield recording
+            finally:
+                await recording.drain()
+                self.writer.add(
+                    url,
+                    response.status,
+                    [
+                        (name, value)
+                        for name, value in response.headers.items()
+                        if name.lower() not in _DROPPED_RESPONSE_HEADERS
+                    ],
+                    bytes(recording.body),
+                )
+
+    def head(self, url: str, **kwargs):
+        return self.session.head(url, **kwargs)
+
+
+@contextmanager
+def archive_session_from_env(session: aiohttp.ClientSession) -> Iterator:
+    # HTTP_ARCHIVE_RECORD captures every response of a run to that file and
+    # HTTP_ARCHIVE_REPLAY serves a capture back without touching the network
+    replay_path = os.getenv('HTTP_ARCHIVE_REPLAY')
+    record_path = os.getenv('HTTP_ARCHIVE_RECORD')
+    if replay_path:
+        with HttpArchiveReader(replay_path) as reader:
+            yield ReplaySession(reader)
+    elif record_path:
+        with HttpArchiveWriter(record_path) as writer:
+            yield RecordingSession(session, writer)
+            logger.info(f'recorded {len(writer)} responses to {record_path}')
+    else:
+        yield session
+
+
+class ReplaySession:
+    # serves archived responses without touching the network, urls missing from the
+    # archive answer 404 so the scraper treats them as a failed page
+    def __init__(self, reader: HttpArchiveReader):
+        self.reader = reader
+        self.misses: list[str] = []
+
+    @asynccontextmanager
+    async def get(self, url: str, **kwargs) -> AsyncIterator['_ReplayResponse']:
+        archived = self.reader.get(url)
+        if archived is None:
+            self.misses.append(url)
+            archived = ArchivedResponse(url, 404, [], b'')
+        yield _ReplayResponse(archived)
+
+    @asynccontextmanager
+    async def head(self, url: str, **kwargs) -> AsyncIterator['_ReplayResponse']:
+        yield _ReplayResponse(ArchivedResponse(url, 200, [], b''))
+
+
+class _RecordingContent:
+    def __init__(self, recording: '_RecordingResponse'):
+        self._recording = recording
+
+    async def iter_chunked(self, chunk_size: int) -> AsyncIterator[bytes]:
+        async for chunk in self._recording._response.content.iter_chunked(chunk_size):
+            self._recording.body += chunk
+            yield chunk
+        self._recording.complete = True
+
+
+class _RecordingResponse:
+    def __init__(self, response: aiohttp.ClientResponse):
+        self._response = response
+        self.body = bytearray()
+        self.complete = False
+        self.content = _RecordingContent(self)
+
+    async def drain(self):
+        # reads whatever the scraper left unread, a failure keeps what was read so far
+        if self.complete:
+            return
+        try:
+            self.body += await self._response.content.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f'recorded a partial body for {self._response.url}: {e}')
+        self.complete = True
+
+    @property
+    def status(self) -> int:
+        return self._response.status
+
+    @property
+    def headers(self):
+        return self._response.headers
+
+    def raise_for_status(self):
+        self._response.raise_for_status()
+
+    async def read(self) -> bytes:
+        body = await self._response.read()
+        self.body[:] = body
+        self.complete = True
+        return body
+
+    def close(self):
+        # the connection stays open until the rest of the body is recorded
+        pass
+
+
+class _ReplayContent:
+    def __init__(self, body: bytes):
+        self._body = body
+
+    async def iter_chunked(self, chunk_size: int) -> AsyncIterator[bytes]:
+        for start in range(0, len(self._body), chunk_size):
+            yield self._body[start : start + chunk_size]
+
+
+class _ReplayResponse:
+    def __init__(self, archived: ArchivedResponse):
+        self._archived = archived
+        self.status = archived.status
+        self.headers = CIMultiDictProxy(CIMultiDict(archived.headers))
+        self.content = _ReplayContent(archived.body)
+
+    def raise_for_status(self):
+        if self.status < 400:
+            return
+        url = URL(self._archived.url)
+        raise aiohttp.ClientResponseError(
+            aiohttp.RequestInfo(url, 'GET', CIMultiDictProxy(CIMultiDict()), url),
+            (),
+            status=self.status,
+            message='archived response',
+            headers=self.headers,
+        )
+
+    async def read(self) -> bytes:
+        return self._archived.body
+
+    def close(self):
+        pass
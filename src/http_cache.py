@@ -0,0 +1,189 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import time
+from typing import Mapping, Optional
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+INDEX_FILENAME = 'index.json'
+BLOBS_DIRNAME = 'blobs'
+
+logger = logging.getLogger(__name__)
+
+
+class HttpCache:
+    # bodies are stored once per sha256 digest and the index maps request keys to
+    # digests and validators, so identical pages fetched via different urls share a blob
+    def __init__(
+        self,
+        cache_dir: str | Path,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age: float = 0,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.blobs_dir = self.cache_dir / BLOBS_DIRNAME
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self._index: dict[str, dict] = self._load_index()
+
+    def fresh_body(self, key: str) -> Optional[bytes]:
+        entry = self._index.get(key)
+        if entry is None or not self.max_age:
+            return None
+        if time.time() - entry['stored_at'] >= self.max_age:
+            return None
+
+        body = self._read_blob(key, entry)
+        if body is not None:
+            self.hits += 1
+        return body
+
+    def request_headers(self, key: str) -> dict:
+        entry = self._index.get(key)
+        if entry is None or not self._blob_path(entry['digest']).exists():
+            return {}
+
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def not_modified(self, key: str, response_headers: Mapping) -> Optional[bytes]:
+        entry = self._index.get(key)
+        if entry is None:
+            logger.warning(f'received not modified response without cache entry: {key}')
+            return None
+
+        body = self._read_blob(key, entry)
+        if body is None:
+            return None
+
+        entry['etag'] = response_headers.get('ETag') or entry.get('etag')
+        entry['last_modified'] = response_headers.get('Last-Modified') or entry.get(
+            'last_modified'
+        )
+        entry['stored_at'] = time.time()
+        self.revalidations += 1
+        return body
+
+    def store(self, key: str, body: bytes, response_headers: Mapping):
+        self.misses += 1
+        # whatever was cached for the key is outdated now, including its blob unless
+        # another entry still shares it
+        self._drop(key)
+        etag = response_headers.get('ETag')
+        last_modified = response_headers.get('Last-Modified')
+        if not etag and not last_modified and not self.max_age:
+            # nothing to revalidate against so there is no point keeping the body
+            return
+        if len(body) > self.max_bytes:
+            return
+
+        digest = hashlib.sha256(body).hexdigest()
+        blob_path = self._blob_path(digest)
+        if not blob_path.exists():
+            _atomic_write(blob_path, body)
+
+        now = time.time()
+        self._index[key] = {
+            'digest': digest,
+            'size': len(body),
+            'etag': etag,
+            'last_modified': last_modified,
+            'stored_at': now,
+            'accessed_at': now,
+        }
+        self._evict()
+
+    def save(self):
+        _atomic_write(
+            self.cache_dir / INDEX_FILENAME, json.dumps(self._index).encode('utf-8')
+        )
+
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'revalidations': self.revalidations,
+            'misses': self.misses,
+            'entries': len(self._index),
+            'bytes': self._total_bytes(),
+        }
+
+    def _read_blob(self, key: str, entry: dict) -> Optional[bytes]:
+        try:
+            body = self._blob_path(entry['digest']).read_bytes()
+        except OSError:
+            logger.warning(f'cache blob missing for {key}, dropping entry')
+            self._index.pop(key, None)
+            return None
+
+        entry['accessed_at'] = time.time()
+        return body
+
+    def _evict(self):
+        # least recently used entries go first, blobs are removed once nothing references them
+        total_bytes = self._total_bytes()
+        if total_bytes <= self.max_bytes:
+            return
+
+        by_access = sorted(self._index.items(), key=lambda item: item[1]['accessed_at'])
+        for key, entry in by_access:
+            if total_bytes <= self.max_bytes:
+                break
+            if self._drop(key):
+                total_bytes -= entry['size']
+
+    def _drop(self, key: str) -> bool:
+        # returns whether the entry's blob was deleted along with it
+        entry = self._index.pop(key, None)
+        if entry is None or self._is_referenced(entry['digest']):
+            return False
+        self._blob_path(entry['digest']).unlink(missing_ok=True)
+        return True
+
+    def _total_bytes(self) -> int:
+        sizes = {entry['digest']: entry['size'] for entry in self._index.values()}
+        return sum(sizes.values())
+
+    def _is_referenced(self, digest: str) -> bool:
+        return any(entry['digest'] == digest for entry in self._index.values())
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.blobs_dir / digest
+
+    def _load_index(self) -> dict[str, dict]:
+        index_path = self.cache_dir / INDEX_FILENAME
+        if not index_path.exists():
+            return {}
+        try:
+            return json.loads(index_path.read_text())
+        except (OSError, ValueError) as e:
+            logger.warning(f'discarding unreadable http cache index: {e}')
+            return {}
+
+
+def create_http_cache_from_env() -> Optional[HttpCache]:
+    # meant for local and benchmark runs that scrape the same pages repeatedly. it is
+    # left unset in the lambdas because /tmp belongs to a single container and does
+    # not survive the week between scheduled scrapes, so it would never hit there
+    cache_dir = os.getenv('HTTP_CACHE_DIR')
+    if not cache_dir:
+        return None
+
+    max_bytes = int(os.getenv('HTTP_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+    max_age = float(os.getenv('HTTP_CACHE_MAX_AGE', 0))
+    return HttpCache(cache_dir, max_bytes=max_bytes, max_age=max_age)
+
+
+def _atomic_write(path: Path, data: bytes):
+    temp_path = path.with_name(f'.{path.name}.tmp')
+    temp_path.write_bytes(data)
+    os.replace(temp_path, path)
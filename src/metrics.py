@@ -0,0 +1,183 @@
+from collections import defaultdict
+from contextlib import contextmanager
+import functools
+import json
+import threading
+import time
+from typing import Callable, Iterator, Optional, Protocol
+
+NAMESPACE = 'OperationKino'
+
+UNIT_COUNT = 'Count'
+UNIT_BYTES = 'Bytes'
+UNIT_MILLISECONDS = 'Milliseconds'
+
+# cloudwatch rejects emf records with more than 100 values for a metric
+MAX_VALUES_PER_RECORD = 100
+
+
+class MetricsSink(Protocol):
+    def emit(self, record: dict) -> None: ...
+
+
+class EmfSink:
+    # lambda ships stdout to cloudwatch logs, which extracts metrics from emf json lines
+    def emit(self, record: dict) -> None:
+        print(json.dumps(record, separators=(',', ':')), flush=True)
+
+
+class MemorySink:
+    def __init__(self):
+        self.records: list[dict] = []
+
+    def emit(self, record: dict) -> None:
+        self.records.append(record)
+
+    def values(self, name: str, **dimensions) -> list[float]:
+        # every value recorded for a metric across records matching the dimensions
+        values = []
+        for record in self.records:
+            if name not in record:
+                continue
+            if any(record.get(key) != value for key, value in dimensions.items()):
+                continue
+            value = record[name]
+            values.extend(value if isinstance(value, list) else [value])
+        return values
+
+
+class Metrics:
+    # counters are summed and observations are kept as value lists until flush, so a
+    # whole invocation becomes one emf record per dimension set instead of a log line
+    # per request. parse jobs and dynamodb calls record from worker threads
+    def __init__(self, namespace: str = NAMESPACE, sink: Optional[MetricsSink] = None):
+        self.namespace = namespace
+        self.sink = sink or EmfSink()
+        self._lock = threading.Lock()
+        self._reset()
+
+    def increment(
+        self, name: str, value: float = 1, unit: str = UNIT_COUNT, **dimensions
+    ):
+        key = _dimensions_key(dimensions)
+        with self._lock:
+            self._units[name] = unit
+            self._counters[key][name] += value
+
+    def observe(self, name: str, value: float, unit: str, **dimensions):
+        key = _dimensions_key(dimensions)
+        with self._lock:
+            self._units[name] = unit
+            self._observations[key][name].append(value)
+
+    @contextmanager
+    def timer(self, name: str, **dimensions) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.observe(name, round(elapsed, 3), UNIT_MILLISECONDS, **dimensions)
+
+    def flush(self, **dimensions) -> list[dict]:
+        # the given dimensions, eg. the function name, are added to every record
+        with self._lock:
+            counters, observations, units = (
+                self._counters,
+                self._observations,
+                self._units,
+            )
+            self._reset()
+
+        records = []
+        for key in counters.keys() | observations.keys():
+            record_dimensions = {**dict(key), **dimensions}
+            values = {name: total for name, total in counters.get(key, {}).items()}
+            pending = dict(observations.get(key, {}))
+            while values or pending:
+                for name in list(pending):
+                    values[name] = pending[name][:MAX_VALUES_PER_RECORD]
+                    pending[name] = pending[name][MAX_VALUES_PER_RECORD:]
+                    if not pending[name]:
+                        del pending[name]
+                records.append(self._to_record(record_dimensions, values, units))
+                values = {}
+
+        for record in records:
+            self.sink.emit(record)
+        return records
+
+    def drain(self) -> tuple:
+        # everything recorded since the last flush as plain picklable data, cleared so
+        # a process pool worker can hand it back to the parent after each job
+        with self._lock:
+            counters, observations, units = (
+                self._counters,
+                self._observations,
+                self._units,
+            )
+            self._reset()
+        return (
+            {key: dict(values) for key, values in counters.items()},
+            {key: dict(values) for key, values in observations.items()},
+            units,
+        )
+
+    def merge(self, drained: tuple):
+        counters, observations, units = drained
+        with self._lock:
+            self._units.update(units)
+            for key, values in counters.items():
+                for name, value in values.items():
+                    self._counters[key][name] += value
+            for key, values in observations.items():
+                for name, value in values.items():
+                    self._observations[key][name].extend(value)
+
+    def _to_record(self, dimensions: dict, values: dict, units: dict) -> dict:
+        return {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [
+                    {
+                        'Namespace': self.namespace,
+                        'Dimensions': [sorted(dimensions)],
+                        'Metrics': [
+                            {'Name': name, 'Unit': units[name]}
+                            for name in sorted(values)
+                        ],
+                    }
+                ],
+            },
+            **dimensions,
+            **values,
+        }
+
+    def _reset(self):
+        self._counters: dict[tuple, dict[str, float]] = defaultdict(
+            lambda: defaultdict(float)
+        )
+        self._observations: dict[tuple, dict[str, list[float]]] = defaultdict(
+            lambda: defaultdict(list)
+        )
+        self._units: dict[str, str] = {}
+
+
+def timed(name: str, **dimensions) -> Callable:
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with metrics.timer(name, **dimensions):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _dimensions_key(dimensions: dict) -> tuple:
+    return tuple(sorted((key, str(value)) for key, value in dimensions.items()))
+
+
+# shared by everything in the process, handlers flush it once per invocation
+metrics = Metrics()
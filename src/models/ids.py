@@ -0,0 +1,14 @@
+import re
+from uuid import UUID, uuid5
+
+# fixed namespace so the same region and slug always map to the same id across runs
+ID_NAMESPACE = UUID('5b0d6f38-2c1f-4d6e-9a57-8e4b1f0c7a21')
+
+
+def stable_id(region_code: str, slug: str) -> str:
+    return str(uuid5(ID_NAMESPACE, f'{region_code}/{slug}'))
+
+
+def name_key(name: str) -> str:
+    # url safe lookup key for a display name, 'Rialto Cinemas' -> 'rialto-cinemas'
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
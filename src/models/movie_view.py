@@ -0,0 +1,73 @@
+from typing import Iterable, NamedTuple, Optional
+
+# read side counterparts of Movie and CinemaSummary for get_sessions. items were
+# validated by the scrapers before they were written, so decoding only converts the
+# dynamodb types and encoding writes the camelCase response keys directly instead of
+# going through pydantic validation and alias generation per item
+
+# response fields and the item attributes each one is decoded from
+FIELD_ATTRIBUTES = {
+    'title': ('title',),
+    'releaseYear': ('release_year',),
+    'imageUrl': ('image_url',),
+    'regionCode': ('region_code',),
+    'cinemas': ('cinemas',),
+    'showtimes': ('showtimes',),
+    'lastShowtime': ('last_showtime',),
+}
+
+
+class CinemaSummaryView(NamedTuple):
+    name: str
+    homepage_url: Optional[str]
+
+    @classmethod
+    def from_item(cls, item: dict) -> 'CinemaSummaryView':
+        return cls(item['name'], item.get('homepage_url'))
+
+    def to_json(self) -> dict:
+        return {'name': self.name, 'homepageUrl': self.homepage_url}
+
+
+class MovieView(NamedTuple):
+    title: str
+    release_year: int
+    image_url: Optional[str]
+    region_code: str
+    cinemas: list[CinemaSummaryView]
+    showtimes: list[str]
+    last_showtime: str
+
+    @classmethod
+    def from_item(cls, item: dict) -> 'MovieView':
+        # items read with a projection only carry the requested attributes, the others
+        # are left empty and dropped again by to_json
+        release_year = item.get('release_year')
+        return cls(
+            item.get('title'),
+            # dynamodb hands numbers back as Decimal
+            int(release_year) if release_year is not None else None,
+            item.get('image_url'),
+            item.get('region_code'),
+            [CinemaSummaryView.from_item(cinema) for cinema in item.get('cinemas', [])],
+            list(item.get('showtimes', [])),
+            item.get('last_showtime'),
+        )
+
+    def to_json(self, fields: Optional[Iterable[str]] = None) -> dict:
+        if fields is not None:
+            return {
+                field: value
+                for field, value in self.to_json().items()
+                if field in fields
+            }
+        # same keys and order as Movie.model_dump(exclude={'id', 'region'}, by_alias=True)
+        return {
+            'title': self.title,
+            'releaseYear': self.release_year,
+            'imageUrl': self.image_url,
+            'regionCode': self.region_code,
+            'cinemas': [cinema.to_json() for cinema in self.cinemas],
+            'showtimes': self.showtimes,
+            'lastShowtime': self.last_showtime,
+        }
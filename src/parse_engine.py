@@ -0,0 +1,76 @@
+import os
+from typing import Optional
+
+from lxml import etree
+from lxml import html as lxml_html
+
+# bs4 is the reference implementation, lxml runs the same selectors as precompiled
+# xpath directly against the lxml tree without building a soup on top of it
+ENGINE_SOUP = 'bs4'
+ENGINE_LXML = 'lxml'
+PARSE_ENGINES = (ENGINE_SOUP, ENGINE_LXML)
+
+
+def get_parse_engine() -> str:
+    engine = os.getenv('PARSE_ENGINE', ENGINE_SOUP).lower()
+    if engine not in PARSE_ENGINES:
+        raise ValueError(f'unsupported parse engine: <{engine}>')
+    return engine
+
+
+def make_soup(html: str):
+    # bs4 is only imported by the reference engine so lxml runs never pay for it
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(html, 'lxml')
+
+
+def parse_html(html: str | bytes) -> Optional[lxml_html.HtmlElement]:
+    if not html or not html.strip():
+        return None
+    try:
+        return lxml_html.document_fromstring(html)
+    except ValueError:
+        if not isinstance(html, str):
+            raise
+        # str input with an xml encoding declaration has to go through bytes
+        return parse_html(html.encode('utf-8'))
+    except etree.ParserError:
+        return None
+
+
+def class_xpath(tag: str, class_name: str) -> etree.XPath:
+    # equivalent of soup.find_all(tag, class_=class_name) from the context element
+    return etree.XPath(
+        f".//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]"
+    )
+
+
+def first_xpath(tag: str, class_name: Optional[str] = None) -> etree.XPath:
+    # equivalent of soup.find(tag[, class_name]) from the context element
+    if class_name is None:
+        return etree.XPath(f'(.//{tag})[1]')
+    return etree.XPath(
+        f"(.//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')])[1]"
+    )
+
+
+def find_first(
+    xpath: etree.XPath, element: Optional[lxml_html.HtmlElement]
+) -> Optional[lxml_html.HtmlElement]:
+    if element is None:
+        return None
+    matches = xpath(element)
+    return matches[0] if matches else None
+
+
+def find_all(
+    xpath: etree.XPath, element: Optional[lxml_html.HtmlElement]
+) -> list[lxml_html.HtmlElement]:
+    if element is None:
+        return []
+    return xpath(element)
+
+
+def to_html(element: lxml_html.HtmlElement) -> str:
+    return lxml_html.tostring(element, encoding='unicode', with_tail=False)
@@ -0,0 +1,87 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import logging
+import os
+from typing import Callable, Optional, TypeVar
+
+from metrics import metrics
+
+PARSE_MODE_INLINE = 'inline'
+PARSE_MODE_THREAD = 'thread'
+PARSE_MODE_PROCESS = 'process'
+PARSE_MODES = (PARSE_MODE_INLINE, PARSE_MODE_THREAD, PARSE_MODE_PROCESS)
+
+DEFAULT_PARSE_MODE = PARSE_MODE_THREAD
+
+T = TypeVar('T')
+
+logger = logging.getLogger(__name__)
+
+
+class ParseStage:
+    # runs parse jobs off the event loop so downloads keep flowing while pages are parsed.
+    # jobs must be module level functions taking raw bytes and returning plain data so
+    # they can be pickled into a process pool
+    def __init__(
+        self, mode: str = DEFAULT_PARSE_MODE, max_workers: Optional[int] = None
+    ):
+        if mode not in PARSE_MODES:
+            raise ValueError(f'unsupported parse mode: <{mode}>')
+        self.mode = mode
+        self._executor = self._create_executor(mode, max_workers)
+
+    async def run(self, job: Callable[..., T], *args) -> T:
+        if self._executor is None:
+            return job(*args)
+        loop = asyncio.get_running_loop()
+        if self.mode != PARSE_MODE_PROCESS:
+            return await loop.run_in_executor(self._executor, job, *args)
+
+        # metrics recorded in a worker process, eg. parse_time, come back with the result
+        result, drained = await loop.run_in_executor(
+            self._executor, _run_with_metrics, job, *args
+        )
+        metrics.merge(drained)
+        return result
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self) -> 'ParseStage':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _create_executor(
+        self, mode: str, max_workers: Optional[int]
+    ) -> Optional[Executor]:
+        if mode == PARSE_MODE_PROCESS:
+            try:
+                # forked workers start with a copy of whatever the parent had recorded
+                return ProcessPoolExecutor(
+                    max_workers=max_workers, initializer=metrics.drain
+                )
+            except (OSError, NotImplementedError) as e:
+                # lambda has no /dev/shm so multiprocessing primitives cannot be created
+                logger.warning(f'process pool unavailable, parsing in threads: {e}')
+                self.mode = PARSE_MODE_THREAD
+        if self.mode == PARSE_MODE_THREAD:
+            return ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix='parse'
+            )
+        return None
+
+
+def _run_with_metrics(job: Callable[..., T], *args) -> tuple[T, tuple]:
+    # a job that raises leaves its metrics in the worker to go back with the next one
+    result = job(*args)
+    return result, metrics.drain()
+
+
+def create_parse_stage_from_env() -> ParseStage:
+    mode = os.getenv('PARSE_WORKERS_MODE', DEFAULT_PARSE_MODE).lower()
+    max_workers = os.getenv('PARSE_WORKERS')
+    return ParseStage(mode, int(max_workers) if max_workers else None)
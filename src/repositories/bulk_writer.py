@@ -0,0 +1,140 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import random
+import time
+from typing import Callable, Iterable, NamedTuple, Optional
+
+from botocore.exceptions import BotoCoreError
+
+from metrics import UNIT_MILLISECONDS, metrics
+from repositories.query import record_consumed_capacity
+
+logger = logging.getLogger(__name__)
+
+# BatchWriteItem takes at most 25 requests
+BATCH_SIZE = 25
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_ATTEMPTS = 6
+BASE_DELAY = 0.05
+MAX_DELAY = 2.0
+
+
+class UnprocessedItemsError(BotoCoreError):
+    # a BotoCoreError so callers handle it like any other dynamodb failure
+    fmt = '{count} write requests to {table} were still unprocessed after {attempts} attempts'
+
+
+class BatchTiming(NamedTuple):
+    requests: int
+    attempts: int
+    seconds: float
+    capacity_units: float
+
+
+class BulkWriteResult(NamedTuple):
+    batches: list[BatchTiming]
+    seconds: float
+
+    @property
+    def requests(self) -> int:
+        return sum(batch.requests for batch in self.batches)
+
+    @property
+    def capacity_units(self) -> float:
+        return sum(batch.capacity_units for batch in self.batches)
+
+    @property
+    def attempts(self) -> int:
+        return sum(batch.attempts for batch in self.batches)
+
+
+def put_request(item: dict) -> dict:
+    return {'PutRequest': {'Item': item}}
+
+
+def delete_request(key: dict) -> dict:
+    return {'DeleteRequest': {'Key': key}}
+
+
+def bulk_write(
+    table,
+    requests: Iterable[dict],
+    key_fields: Optional[Iterable[str]] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    sleep: Callable[[float], None] = time.sleep,
+) -> BulkWriteResult:
+    # splits the requests into 25 item batches and sends them from a bounded thread
+    # pool, where batch_writer sends them one after another. each batch retries its
+    # UnprocessedItems with backoff, throttling errors are already retried by botocore
+    requests = list(requests)
+    if key_fields is not None:
+        requests = _dedupe(requests, tuple(key_fields))
+    batches = [
+        requests[start : start + BATCH_SIZE]
+        for start in range(0, len(requests), BATCH_SIZE)
+    ]
+
+    start = time.perf_counter()
+    # boto3 clients are thread safe, the table resource is not so only its client is
+    # shared with the workers
+    client = table.meta.client
+
+    def _write(batch: list[dict]) -> BatchTiming:
+        return _write_batch(client, table, batch, max_attempts, sleep)
+
+    if len(batches) <= 1 or max_workers <= 1:
+        timings = [_write(batch) for batch in batches]
+    else:
+        with ThreadPoolExecutor(
+            max_workers=min(max_workers, len(batches)),
+            thread_name_prefix='bulk-writer',
+        ) as executor:
+            timings = list(executor.map(_write, batches))
+
+    return BulkWriteResult(timings, time.perf_counter() - start)
+
+
+def _write_batch(
+    client, table, batch: list[dict], max_attempts: int, sleep: Callable
+) -> BatchTiming:
+    start = time.perf_counter()
+    capacity_units = 0.0
+    pending = batch
+    for attempt in range(1, max_attempts + 1):
+        response = client.batch_write_item(
+            RequestItems={table.name: pending}, ReturnConsumedCapacity='TOTAL'
+        )
+        capacity_units += record_consumed_capacity(table, response, 'batch_write_item')
+        pending = response.get('UnprocessedItems', {}).get(table.name, [])
+        if not pending:
+            seconds = time.perf_counter() - start
+            metrics.observe(
+                'dynamodb_batch_latency',
+                seconds * 1000,
+                UNIT_MILLISECONDS,
+                table=table.name,
+            )
+            return BatchTiming(len(batch), attempt, seconds, capacity_units)
+
+        if attempt < max_attempts:
+            metrics.increment('dynamodb_unprocessed_retries', table=table.name)
+            delay = min(MAX_DELAY, BASE_DELAY * 2 ** (attempt - 1))
+            sleep(random.uniform(delay / 2, delay))
+
+    logger.error(f'{len(pending)} write requests to {table.name} left unprocessed')
+    raise UnprocessedItemsError(
+        count=len(pending), table=table.name, attempts=max_attempts
+    )
+
+
+def _dedupe(requests: list[dict], key_fields: tuple[str, ...]) -> list[dict]:
+    # a batch may not touch the same key twice, the last request for a key wins
+    by_key = {}
+    for request in requests:
+        if 'PutRequest' in request:
+            item = request['PutRequest']['Item']
+        else:
+            item = request['DeleteRequest']['Key']
+        by_key[tuple(item[field] for field in key_fields)] = request
+    return list(by_key.values())
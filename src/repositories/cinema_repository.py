@@ -1,8 +1,12 @@
 import logging
+from typing import Iterable, Iterator, Optional
 from boto3.dynamodb.conditions import Key
 from botocore.exceptions import ClientError, BotoCoreError
 
 from models.cinema import Cinema
+from repositories.bulk_writer import bulk_write, delete_request, put_request
+from repositories.query import paginate_query, projection_kwargs
+from repositories.reconcile import KEY_FIELDS, reconcile_items
 
 logger = logging.getLogger(__name__)
 
@@ -13,43 +17,59 @@ def get_cinemas_by_region(table, region_code: str) -> list[Cinema]:
 
 
 def batch_insert_cinemas(table, cinemas: list[Cinema]) -> int:
-    insert_count = 0
     try:
-        with table.batch_writer() as batch:
-            for cinema in cinemas:
-                item = cinema.model_dump()
-                if item.get('homepage_url') is not None:
-                    item['homepage_url'] = str(item['homepage_url'])
-                batch.put_item(Item=item)
-                insert_count += 1
-        return insert_count
+        result = bulk_write(
+            table, (put_request(_to_item(cinema)) for cinema in cinemas)
+        )
+        return result.requests
     except (ClientError, BotoCoreError) as e:
         logger.error(f'dynamodb error encountered while inserting cinemas: {e}')
         raise
 
 
+def reconcile_cinemas(table, region_code: str, cinemas: list[Cinema]) -> dict[str, int]:
+    existing_items = _query_cinema_items_by_region(table, region_code)
+    try:
+        return reconcile_items(
+            table, existing_items, (_to_item(cinema) for cinema in cinemas)
+        )
+    except (ClientError, BotoCoreError) as e:
+        logger.error(f'dynamodb error encountered while reconciling cinemas: {e}')
+        raise
+
+
 def delete_cinemas_by_region(table, region_code: str) -> int:
-    items = _query_cinema_items_by_region(table, region_code)
-    delete_count = 0
+    items = _query_cinema_items_by_region(table, region_code, fields=KEY_FIELDS)
     try:
-        with table.batch_writer() as batch:
-            for item in items:
-                batch.delete_item(
-                    Key={'region_code': item['region_code'], 'id': item['id']}
-                )
-                delete_count += 1
-        return delete_count
+        result = bulk_write(
+            table,
+            (
+                delete_request({'region_code': item['region_code'], 'id': item['id']})
+                for item in items
+            ),
+        )
+        return result.requests
     except (ClientError, BotoCoreError) as e:
         logger.error(f'dynamodb error encountered while deleting cinemas: {e}')
         raise
 
 
-def _query_cinema_items_by_region(table, region_code: str) -> list[dict]:
+def _query_cinema_items_by_region(
+    table, region_code: str, fields: Optional[Iterable[str]] = None
+) -> Iterator[dict]:
     try:
-        response = table.query(
-            KeyConditionExpression=Key('region_code').eq(region_code)
+        yield from paginate_query(
+            table,
+            KeyConditionExpression=Key('region_code').eq(region_code),
+            **projection_kwargs(fields),
         )
-        return response.get('Items', [])
     except (ClientError, BotoCoreError) as e:
         logger.error(f'dynamodb error encountered while fetching cinemas: {e}')
         raise
+
+
+def _to_item(cinema: Cinema) -> dict:
+    item = cinema.model_dump()
+    if item.get('homepage_url') is not None:
+        item['homepage_url'] = str(item['homepage_url'])
+    return item
@@ -0,0 +1,27 @@
+import logging
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError, BotoCoreError
+
+from repositories.bulk_writer import bulk_write, put_request
+from repositories.query import paginate_query
+
+logger = logging.getLogger(__name__)
+
+
+def get_movie_details_by_host(table, host: str) -> list[dict]:
+    # expired items are returned too until dynamodb ttl gets around to deleting them,
+    # the details cache checks expires_at itself
+    try:
+        return list(paginate_query(table, KeyConditionExpression=Key('host').eq(host)))
+    except (ClientError, BotoCoreError) as e:
+        logger.error(f'dynamodb error encountered while fetching movie details: {e}')
+        raise
+
+
+def batch_put_movie_details(table, items: list[dict]) -> int:
+    try:
+        result = bulk_write(table, map(put_request, items), key_fields=('host', 'slug'))
+        return result.requests
+    except (ClientError, BotoCoreError) as e:
+        logger.error(f'dynamodb error encountered while writing movie details: {e}')
+        raise
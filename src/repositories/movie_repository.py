@@ -1,49 +1,187 @@
 from datetime import datetime
 import logging
-from typing import Optional
+import time
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional
 from zoneinfo import ZoneInfo
-from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.conditions import Attr, Key
 from botocore.exceptions import ClientError, BotoCoreError
 
-from models.movie import Movie
+from models.movie_view import FIELD_ATTRIBUTES, MovieView
+from repositories.bulk_writer import bulk_write, delete_request, put_request
+from repositories.query import paginate_query, projection_kwargs
+from repositories.reconcile import KEY_FIELDS
+from repositories.showtimes_codec import (
+    SHOWTIMES_FIELDS,
+    decode_showtimes,
+    encode_showtimes,
+    get_showtimes_encoding,
+)
+
+if TYPE_CHECKING:
+    # the read path decodes into MovieView and never needs pydantic
+    from models.movie import Movie
 
 logger = logging.getLogger(__name__)
 
+# every scrape writes the region as a new generation of items, the region pointer
+# decides which one readers see and superseded ones are left to expire
+GENERATION_INDEX = 'region_generation_by_last_showtime'
+# scrapes run weekly, long enough for the current generation to outlive a few missed
+# ones while replaced generations expire without ever being read or written again
+DEFAULT_GENERATION_TTL = 4 * 7 * 24 * 60 * 60
+
+
+def new_generation() -> int:
+    # milliseconds so a later scrape always gets a larger generation
+    return time.time_ns() // 1_000_000
 
-def get_movies_by_region(table, region_code: str, timezone: str) -> list[Movie]:
+
+def get_movies_by_region(
+    table, region_code: str, timezone: str, generation: Optional[int] = None
+) -> list['Movie']:
+    from models.movie import Movie
+
+    today = datetime.now(ZoneInfo(timezone)).date().isoformat()
+    items = _query_movie_items_by_region(
+        table, region_code, last_showtime_from=today, generation=generation
+    )
+    return [Movie(**_from_generation_item(decode_showtimes(item))) for item in items]
+
+
+def get_movie_views_by_region(
+    table,
+    region_code: str,
+    timezone: str,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    fields: Optional[Iterable[str]] = None,
+    generation: Optional[int] = None,
+) -> list[MovieView]:
+    # past showtimes are never returned so the range starts today at the earliest.
+    # the lower bound is pushed down to the last_showtime index, the upper bound can
+    # only be applied per item since a movie ending later may still show within it
+    today = datetime.now(ZoneInfo(timezone)).date().isoformat()
+    date_from = max(date_from or today, today)
+    # fields are response fields, showtimes are always read to apply the range
+    attributes = None
+    if fields is not None:
+        attributes = {
+            attribute for field in fields for attribute in FIELD_ATTRIBUTES[field]
+        }
+        attributes.update(SHOWTIMES_FIELDS)
     items = _query_movie_items_by_region(
-        table, region_code, apply_date_filter=True, timezone=timezone
+        table,
+        region_code,
+        last_showtime_from=date_from,
+        fields=attributes,
+        generation=generation,
     )
-    return [Movie(**item) for item in items]
+    views = (
+        MovieView.from_item(decode_showtimes(item, since=date_from, until=date_to))
+        for item in items
+    )
+    return [view for view in views if view.showtimes]
+
+
+def write_movie_generation(
+    table,
+    region_code: str,
+    movies: list['Movie'],
+    generation: int,
+    ttl: float = DEFAULT_GENERATION_TTL,
+    showtimes_encoding: Optional[str] = None,
+) -> int:
+    # only puts, nothing is read or deleted. the items stay invisible to readers until
+    # the region pointer is flipped to this generation
+    showtimes_encoding = showtimes_encoding or get_showtimes_encoding()
+    expires_at = int(time.time() + ttl)
+    try:
+        result = bulk_write(
+            table,
+            (
+                put_request(
+                    _to_generation_item(
+                        _to_item(movie, showtimes_encoding),
+                        region_code,
+                        generation,
+                        expires_at,
+                    )
+                )
+                for movie in movies
+            ),
+        )
+        return result.requests
+    except (ClientError, BotoCoreError) as e:
+        logger.error(f'dynamodb error encountered while writing movie generation: {e}')
+        raise
+
+
+def delete_legacy_movies(table, region_code: str) -> int:
+    # items written before generations have no ttl, they are deleted once when the
+    # region gets its first generation
+    try:
+        items = paginate_query(
+            table,
+            KeyConditionExpression=Key('region_code').eq(region_code),
+            FilterExpression=Attr('generation').not_exists(),
+            **projection_kwargs(KEY_FIELDS),
+        )
+        result = bulk_write(
+            table,
+            (
+                delete_request({'region_code': item['region_code'], 'id': item['id']})
+                for item in items
+            ),
+        )
+        return result.requests
+    except (ClientError, BotoCoreError) as e:
+        logger.error(f'dynamodb error encountered while deleting legacy movies: {e}')
+        raise
 
 
-def batch_insert_movies(table, movies: list[Movie]) -> None:
-    insert_count = 0
+def batch_insert_movies(
+    table, movies: list['Movie'], showtimes_encoding: Optional[str] = None
+) -> int:
+    showtimes_encoding = showtimes_encoding or get_showtimes_encoding()
     try:
-        with table.batch_writer() as batch:
-            for movie in movies:
-                item = movie.model_dump()
-                if item.get('image_url') is not None:
-                    item['image_url'] = str(item['image_url'])
-                batch.put_item(Item=item)
-                insert_count += 1
-        return insert_count
+        result = bulk_write(
+            table,
+            (put_request(_to_item(movie, showtimes_encoding)) for movie in movies),
+        )
+        return result.requests
     except (ClientError, BotoCoreError) as e:
         logger.error(f'dynamodb error encountered while inserting movies: {e}')
         raise
 
 
+def migrate_movie_showtimes(
+    table, region_code: str, showtimes_encoding: Optional[str] = None
+) -> int:
+    # rewrites stored items in place for regions that are not due a scrape
+    showtimes_encoding = showtimes_encoding or get_showtimes_encoding()
+    try:
+        requests = []
+        for item in _query_movie_items_by_region(table, region_code):
+            migrated_item = encode_showtimes(decode_showtimes(item), showtimes_encoding)
+            if migrated_item != item:
+                requests.append(put_request(migrated_item))
+        return bulk_write(table, requests).requests
+    except (ClientError, BotoCoreError) as e:
+        logger.error(f'dynamodb error encountered while migrating movies: {e}')
+        raise
+
+
 def delete_movies_by_region(table, region_code: str) -> int:
-    items = _query_movie_items_by_region(table, region_code)
-    delete_count = 0
+    items = _query_movie_items_by_region(table, region_code, fields=KEY_FIELDS)
     try:
-        with table.batch_writer() as batch:
-            for item in items:
-                batch.delete_item(
-                    Key={'region_code': item['region_code'], 'id': item['id']}
-                )
-                delete_count += 1
-        return delete_count
+        result = bulk_write(
+            table,
+            (
+                delete_request({'region_code': item['region_code'], 'id': item['id']})
+                for item in items
+            ),
+        )
+        return result.requests
     except (ClientError, BotoCoreError) as e:
         logger.error(f'dynamodb error encountered while deleting movies: {e}')
         raise
@@ -52,24 +190,79 @@ def delete_movies_by_region(table, region_code: str) -> int:
 def _query_movie_items_by_region(
     table,
     region_code: str,
-    apply_date_filter: bool = False,
-    timezone: Optional[str] = None,
-) -> list[dict]:
+    last_showtime_from: Optional[str] = None,
+    fields: Optional[Iterable[str]] = None,
+    generation: Optional[int] = None,
+) -> Iterator[dict]:
     try:
-        key_condition = Key('region_code').eq(region_code)
-        if apply_date_filter:
-            key_condition &= Key('last_showtime').gte(
-                datetime.now(ZoneInfo(timezone)).date().isoformat()
+        if generation is not None:
+            key_condition = Key('region_generation').eq(
+                region_generation_key(region_code, generation)
+            )
+            if last_showtime_from is not None:
+                key_condition &= Key('last_showtime').gte(last_showtime_from)
+            yield from paginate_query(
+                table,
+                IndexName=GENERATION_INDEX,
+                KeyConditionExpression=key_condition,
+                **projection_kwargs(fields),
             )
-            response = table.query(
+            return
+
+        key_condition = Key('region_code').eq(region_code)
+        if last_showtime_from is not None:
+            key_condition &= Key('last_showtime').gte(last_showtime_from)
+            # until the region has a current generation only items from before
+            # generations are read, one being written must not show up next to them
+            yield from paginate_query(
+                table,
                 IndexName='region_by_last_showtime',
                 KeyConditionExpression=key_condition,
+                FilterExpression=Attr('generation').not_exists(),
+                **projection_kwargs(fields),
             )
         else:
-            response = table.query(
+            yield from paginate_query(
+                table,
                 KeyConditionExpression=key_condition,
+                **projection_kwargs(fields),
             )
-        return response.get('Items', [])
     except (ClientError, BotoCoreError) as e:
         logger.error(f'dynamodb error encountered while fetching movies: {e}')
         raise
+
+
+def region_generation_key(region_code: str, generation: int) -> str:
+    return f'{region_code}#{generation}'
+
+
+def _to_generation_item(
+    item: dict, region_code: str, generation: int, expires_at: int
+) -> dict:
+    # the generation prefixes the sort key so generations of one movie never collide
+    return {
+        **item,
+        'id': f'{generation}#{item["id"]}',
+        'generation': generation,
+        'region_generation': region_generation_key(region_code, generation),
+        'expires_at': expires_at,
+    }
+
+
+def _from_generation_item(item: dict) -> dict:
+    if 'generation' not in item:
+        return item
+    item = {
+        key: value
+        for key, value in item.items()
+        if key not in ('generation', 'region_generation', 'expires_at')
+    }
+    item['id'] = item['id'].split('#', 1)[1]
+    return item
+
+
+def _to_item(movie: 'Movie', showtimes_encoding: str) -> dict:
+    item = movie.model_dump()
+    if item.get('image_url') is not None:
+        item['image_url'] = str(item['image_url'])
+    return encode_showtimes(item, showtimes_encoding)
@@ -0,0 +1,48 @@
+from typing import Iterable, Iterator, Optional
+
+from metrics import metrics
+
+
+def paginate_query(table, **query_kwargs) -> Iterator[dict]:
+    # a single query stops at 1 MB so keep following LastEvaluatedKey until it runs out
+    query_kwargs.setdefault('ReturnConsumedCapacity', 'TOTAL')
+    while True:
+        response = table.query(**query_kwargs)
+        record_consumed_capacity(table, response, 'query')
+        yield from response.get('Items', [])
+
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        if last_evaluated_key is None:
+            return
+        query_kwargs['ExclusiveStartKey'] = last_evaluated_key
+
+
+def projection_kwargs(fields: Optional[Iterable[str]]) -> dict:
+    # attribute names are always aliased since fields like name and region are reserved words
+    if not fields:
+        return {}
+
+    names = {f'#p{i}': field for i, field in enumerate(fields)}
+    return {
+        'ProjectionExpression': ', '.join(names),
+        'ExpressionAttributeNames': names,
+    }
+
+
+def record_consumed_capacity(table, response: dict, operation: str) -> float:
+    consumed_capacity = response.get('ConsumedCapacity')
+    if not consumed_capacity:
+        return 0.0
+    # batch operations report a list with one entry per table
+    if isinstance(consumed_capacity, dict):
+        consumed_capacity = [consumed_capacity]
+    capacity_units = sum(
+        float(capacity.get('CapacityUnits', 0)) for capacity in consumed_capacity
+    )
+    metrics.increment(
+        'dynamodb_capacity_units',
+        capacity_units,
+        table=table.name,
+        operation=operation,
+    )
+    return capacity_units
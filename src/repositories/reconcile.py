@@ -0,0 +1,52 @@
+import logging
+from typing import Iterable
+
+from metrics import metrics
+from repositories.bulk_writer import bulk_write, delete_request, put_request
+
+logger = logging.getLogger(__name__)
+
+KEY_FIELDS = ('region_code', 'id')
+
+
+def reconcile_items(
+    table,
+    existing_items: Iterable[dict],
+    new_items: Iterable[dict],
+    key_fields: tuple[str, ...] = KEY_FIELDS,
+) -> dict[str, int]:
+    # only writes the difference between what is stored and what was scraped so
+    # unchanged items cost nothing and the region is never empty mid-write
+    existing_by_key = {_key(item, key_fields): item for item in existing_items}
+    new_by_key = {_key(item, key_fields): item for item in new_items}
+    counts = {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+
+    requests = []
+    for key, item in new_by_key.items():
+        existing_item = existing_by_key.get(key)
+        if existing_item == item:
+            counts['unchanged'] += 1
+            continue
+        requests.append(put_request(item))
+        counts['inserted' if existing_item is None else 'updated'] += 1
+
+    for key in existing_by_key.keys() - new_by_key.keys():
+        requests.append(delete_request(dict(zip(key_fields, key))))
+        counts['deleted'] += 1
+
+    result = bulk_write(table, requests)
+    logger.debug(
+        f'wrote {result.requests} items to {table.name} in {len(result.batches)} '
+        f'batches, {result.seconds:.3f}s, {result.capacity_units} capacity units'
+    )
+    metrics.increment(
+        'dynamodb_items_written',
+        counts['inserted'] + counts['updated'] + counts['deleted'],
+        table=table.name,
+    )
+    metrics.increment('dynamodb_items_unchanged', counts['unchanged'], table=table.name)
+    return counts
+
+
+def _key(item: dict, key_fields: tuple[str, ...]) -> tuple:
+    return tuple(item[field] for field in key_fields)
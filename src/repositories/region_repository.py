@@ -0,0 +1,256 @@
+from collections import defaultdict
+import gzip
+import json
+import logging
+from typing import TYPE_CHECKING, NamedTuple, Optional
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError, BotoCoreError
+
+from models.ids import name_key
+from repositories.query import paginate_query, record_consumed_capacity
+from repositories.reconcile import reconcile_items
+
+if TYPE_CHECKING:
+    # get_sessions reads snapshots without ever loading pydantic
+    from models.movie import Movie
+
+logger = logging.getLogger(__name__)
+
+# per-region metadata items live in one table keyed by region_code and kind
+VERSION_KIND = 'version'
+SNAPSHOT_KIND = 'snapshot'
+# lookup indexes built at write time, one item per cinema and per showtime date
+# holding the sessions that match so a lookup reads only its result
+INDEX_KIND_PREFIX = 'index#'
+CINEMA_INDEX = 'cinema'
+DATE_INDEX = 'date'
+INDEX_KEY_FIELDS = ('region_code', 'kind')
+
+# dynamodb items are capped at 400 KB, leave room for the other attributes
+MAX_SNAPSHOT_BYTES = 350 * 1024
+
+
+class RegionPointer(NamedTuple):
+    version: Optional[str]
+    # generation of the movie items that are current, None before the first one
+    generation: Optional[int]
+
+
+def get_region_pointer(table, region_code: str) -> RegionPointer:
+    try:
+        response = table.get_item(
+            Key={'region_code': region_code, 'kind': VERSION_KIND},
+            ProjectionExpression='#version, #generation',
+            ExpressionAttributeNames={
+                '#version': 'version',
+                '#generation': 'generation',
+            },
+            ReturnConsumedCapacity='TOTAL',
+        )
+        record_consumed_capacity(table, response, 'get_item')
+    except (ClientError, BotoCoreError) as e:
+        logger.error(f'dynamodb error encountered while fetching region version: {e}')
+        raise
+
+    item = response.get('Item') or {}
+    generation = item.get('generation')
+    return RegionPointer(
+        item.get('version'), int(generation) if generation is not None else None
+    )
+
+
+def get_region_version(table, region_code: str) -> Optional[str]:
+    return get_region_pointer(table, region_code).version
+
+
+def flip_region_generation(
+    table, region_code: str, version: str, generation: int
+) -> tuple[bool, Optional[int]]:
+    # a single conditional put makes the new generation current for readers, the
+    # condition stops a slower scrape from flipping back to an older generation.
+    # returns whether it flipped and the generation it replaced
+    try:
+        response = table.put_item(
+            Item={
+                'region_code': region_code,
+                'kind': VERSION_KIND,
+                'version': version,
+                'generation': generation,
+            },
+            ConditionExpression=Attr('generation').not_exists()
+            | Attr('generation').lt(generation),
+            ReturnValues='ALL_OLD',
+            ReturnConsumedCapacity='TOTAL',
+        )
+        record_consumed_capacity(table, response, 'put_item')
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            logger.warning(
+                f'generation {generation} for <{region_code}> is already superseded'
+            )
+            return False, None
+        logger.error(
+            f'dynamodb error encountered while flipping region generation: {e}'
+        )
+        raise
+    except BotoCoreError as e:
+        logger.error(
+            f'dynamodb error encountered while flipping region generation: {e}'
+        )
+        raise
+
+    previous_generation = response.get('Attributes', {}).get('generation')
+    return True, int(previous_generation) if previous_generation is not None else None
+
+
+def put_region_snapshot(
+    table, region_code: str, movies: list['Movie'], version: str, generation: int
+) -> bool:
+    body = _compress({'sessions': _to_sessions(movies)})
+    # like the pointer flip, a slower scrape never replaces a newer snapshot
+    condition = Attr('generation').not_exists() | Attr('generation').lt(generation)
+    try:
+        if len(body) > MAX_SNAPSHOT_BYTES:
+            logger.warning(
+                f'skipping snapshot for <{region_code}>: {len(body)} bytes compressed'
+            )
+            # the previous snapshot is deleted rather than left to be read, readers
+            # query the movies until a snapshot fits again
+            response = table.delete_item(
+                Key={'region_code': region_code, 'kind': SNAPSHOT_KIND},
+                ConditionExpression=condition,
+                ReturnConsumedCapacity='TOTAL',
+            )
+            record_consumed_capacity(table, response, 'delete_item')
+            return False
+
+        response = table.put_item(
+            Item={
+                'region_code': region_code,
+                'kind': SNAPSHOT_KIND,
+                'version': version,
+                'generation': generation,
+                'body': body,
+            },
+            ConditionExpression=condition,
+            ReturnConsumedCapacity='TOTAL',
+        )
+        record_consumed_capacity(table, response, 'put_item')
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            logger.warning(
+                f'snapshot generation {generation} for <{region_code}> is already superseded'
+            )
+            return False
+        logger.error(f'dynamodb error encountered while writing region snapshot: {e}')
+        raise
+    except BotoCoreError as e:
+        logger.error(f'dynamodb error encountered while writing region snapshot: {e}')
+        raise
+
+
+def get_region_snapshot(table, region_code: str) -> Optional[dict]:
+    try:
+        response = table.get_item(
+            Key={'region_code': region_code, 'kind': SNAPSHOT_KIND},
+            ReturnConsumedCapacity='TOTAL',
+        )
+        record_consumed_capacity(table, response, 'get_item')
+    except (ClientError, BotoCoreError) as e:
+        logger.error(f'dynamodb error encountered while fetching region snapshot: {e}')
+        raise
+
+    item = response.get('Item')
+    if item is None:
+        return None
+
+    snapshot = _decompress(item['body'])
+    snapshot['version'] = item.get('version')
+    return snapshot
+
+
+def put_region_indexes(
+    table, region_code: str, movies: list['Movie'], version: str
+) -> dict[str, int]:
+    sessions_by_kind = defaultdict(list)
+    for session in _to_sessions(movies):
+        for cinema_key in {name_key(cinema['name']) for cinema in session['cinemas']}:
+            sessions_by_kind[index_kind(CINEMA_INDEX, cinema_key)].append(session)
+        for showtime in session['showtimes']:
+            sessions_by_kind[index_kind(DATE_INDEX, showtime)].append(
+                {**session, 'showtimes': [showtime]}
+            )
+
+    items = []
+    for kind, sessions in sessions_by_kind.items():
+        # readers only trust an index written for the version the pointer is on
+        item = {'region_code': region_code, 'kind': kind, 'version': version}
+        body = _compress({'sessions': sessions})
+        if len(body) > MAX_SNAPSHOT_BYTES:
+            logger.warning(
+                f'skipping index <{kind}> for <{region_code}>: {len(body)} bytes compressed'
+            )
+            # a marker without a body, so readers can tell an index that was too large
+            # from a cinema or date with no sessions
+            items.append({**item, 'skipped': True})
+            continue
+        items.append({**item, 'body': body})
+
+    try:
+        # unchanged indexes are skipped and those for cinemas or dates that are gone
+        # are deleted
+        existing_items = paginate_query(
+            table,
+            KeyConditionExpression=Key('region_code').eq(region_code)
+            & Key('kind').begins_with(INDEX_KIND_PREFIX),
+        )
+        return reconcile_items(table, existing_items, items, INDEX_KEY_FIELDS)
+    except (ClientError, BotoCoreError) as e:
+        logger.error(f'dynamodb error encountered while writing region indexes: {e}')
+        raise
+
+
+def get_region_index(table, region_code: str, index: str, key: str) -> Optional[dict]:
+    try:
+        response = table.get_item(
+            Key={'region_code': region_code, 'kind': index_kind(index, key)},
+            ReturnConsumedCapacity='TOTAL',
+        )
+        record_consumed_capacity(table, response, 'get_item')
+    except (ClientError, BotoCoreError) as e:
+        logger.error(f'dynamodb error encountered while fetching region index: {e}')
+        raise
+
+    item = response.get('Item')
+    if item is None:
+        return None
+
+    region_index = (
+        {'sessions': None} if item.get('skipped') else _decompress(item['body'])
+    )
+    region_index['version'] = item.get('version')
+    return region_index
+
+
+def index_kind(index: str, key: str) -> str:
+    return f'{INDEX_KIND_PREFIX}{index}#{key}'
+
+
+def _to_sessions(movies: list['Movie']) -> list[dict]:
+    # pre-rendered in the response shape so the read path only has to trim past dates
+    return [
+        movie.model_dump(mode='json', exclude={'id', 'region'}, by_alias=True)
+        for movie in sorted(movies, key=lambda movie: movie.last_showtime)
+    ]
+
+
+def _compress(body: dict) -> bytes:
+    # fixed mtime so an unchanged body compresses to the same bytes and reconcile
+    # can skip rewriting it
+    return gzip.compress(json.dumps(body).encode('utf-8'), mtime=0)
+
+
+def _decompress(body) -> dict:
+    # boto3 resources hand binary attributes back wrapped in Binary
+    return json.loads(gzip.decompress(getattr(body, 'value', body)))
@@ -0,0 +1,94 @@
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+import os
+from typing import Optional
+
+# showtimes are whole days within a few weeks of each other, so instead of a list of
+# iso strings the packed encoding stores the first day once plus a bitmap with bit n
+# set when there is a showtime n days after it. last_showtime is still written as a
+# string since the region_by_last_showtime index is keyed on it
+SHOWTIMES_LIST = 'list'
+SHOWTIMES_PACKED = 'packed'
+SHOWTIMES_ENCODINGS = (SHOWTIMES_LIST, SHOWTIMES_PACKED)
+
+BASE_FIELD = 'showtimes_base'
+BITMAP_FIELD = 'showtimes_bitmap'
+# attributes holding showtimes in either encoding
+SHOWTIMES_FIELDS = ('showtimes', BASE_FIELD, BITMAP_FIELD)
+
+
+def get_showtimes_encoding() -> str:
+    encoding = os.getenv('MOVIE_SHOWTIMES_ENCODING', SHOWTIMES_PACKED).lower()
+    if encoding not in SHOWTIMES_ENCODINGS:
+        raise ValueError(f'unsupported showtimes encoding: <{encoding}>')
+    return encoding
+
+
+def pack_showtimes(showtimes: list[str]) -> tuple[str, bytes]:
+    days = sorted({date.fromisoformat(showtime) for showtime in showtimes})
+    base = days[0]
+    offsets = [(day - base).days for day in days]
+    bitmap = bytearray(offsets[-1] // 8 + 1)
+    for offset in offsets:
+        bitmap[offset // 8] |= 1 << (offset % 8)
+    return base.isoformat(), bytes(bitmap)
+
+
+def unpack_showtimes(
+    base: str, bitmap: bytes, since: Optional[str] = None, until: Optional[str] = None
+) -> list[str]:
+    # days outside since and until are skipped without building their strings
+    base_day = date.fromisoformat(base)
+    first_offset = 0
+    if since is not None:
+        first_offset = max((date.fromisoformat(since) - base_day).days, 0)
+    last_offset = len(bitmap) * 8 - 1
+    if until is not None:
+        last_offset = min((date.fromisoformat(until) - base_day).days, last_offset)
+
+    showtimes = []
+    for byte_index in range(first_offset // 8, last_offset // 8 + 1):
+        byte = bitmap[byte_index]
+        while byte:
+            bit = byte & -byte
+            offset = byte_index * 8 + bit.bit_length() - 1
+            byte ^= bit
+            if first_offset <= offset <= last_offset:
+                showtimes.append((base_day + timedelta(days=offset)).isoformat())
+    return showtimes
+
+
+def trim_showtimes(
+    showtimes: list[str], since: Optional[str] = None, until: Optional[str] = None
+) -> list[str]:
+    # showtimes are sorted iso dates so a date range is a slice found by bisection
+    start = bisect_left(showtimes, since) if since is not None else 0
+    end = bisect_right(showtimes, until) if until is not None else len(showtimes)
+    return showtimes[start:end]
+
+
+def encode_showtimes(item: dict, encoding: str) -> dict:
+    # item has showtimes as a list, as dumped from the Movie model
+    if encoding == SHOWTIMES_LIST or not item['showtimes']:
+        return item
+    item = dict(item)
+    item[BASE_FIELD], item[BITMAP_FIELD] = pack_showtimes(item.pop('showtimes'))
+    return item
+
+
+def decode_showtimes(
+    item: dict, since: Optional[str] = None, until: Optional[str] = None
+) -> dict:
+    # reads either encoding so items written before packing keep working
+    if BITMAP_FIELD not in item:
+        showtimes = trim_showtimes(list(item.get('showtimes', [])), since, until)
+        return {**item, 'showtimes': showtimes}
+
+    item = dict(item)
+    bitmap = item.pop(BITMAP_FIELD)
+    # boto3 resources hand binary attributes back wrapped in Binary
+    bitmap = getattr(bitmap, 'value', bitmap)
+    item['showtimes'] = unpack_showtimes(
+        item.pop(BASE_FIELD), bytes(bitmap), since, until
+    )
+    return item
@@ -0,0 +1,179 @@
+from email.utils import parsedate_to_datetime
+import logging
+import os
+import random
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 8.0
+# a retry-after longer than this is not worth sleeping through in a lambda
+DEFAULT_MAX_RETRY_AFTER = 30.0
+DEFAULT_RETRY_BUDGET = 100
+DEFAULT_BREAKER_THRESHOLD = 5
+DEFAULT_BREAKER_COOLDOWN = 30.0
+
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    # opens after a run of consecutive failures so requests to a host that is down fail
+    # immediately, then lets a single probe through once the cooldown has passed
+    def __init__(
+        self,
+        threshold: int = DEFAULT_BREAKER_THRESHOLD,
+        cooldown: float = DEFAULT_BREAKER_COOLDOWN,
+    ):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if self._probing or time.monotonic() - self.opened_at < self.cooldown:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> bool:
+        # returns true when this failure opened the breaker
+        self.failures += 1
+        if self._probing or (
+            self.opened_at is None and self.failures >= self.threshold
+        ):
+            self.opened_at = time.monotonic()
+            self._probing = False
+            return True
+        return False
+
+
+class RetryPolicy:
+    # one policy is shared by every request in a run so the retry budget and the circuit
+    # breakers see all of them, not just the retries of a single url
+    def __init__(
+        self,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        base_delay: float = DEFAULT_BASE_DELAY,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        max_retry_after: float = DEFAULT_MAX_RETRY_AFTER,
+        retry_budget: int = DEFAULT_RETRY_BUDGET,
+        breaker_threshold: int = DEFAULT_BREAKER_THRESHOLD,
+        breaker_cooldown: float = DEFAULT_BREAKER_COOLDOWN,
+        jitter: bool = True,
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.retry_budget = retry_budget
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.jitter = jitter
+        self.retries = 0
+        self.short_circuits = 0
+        self.breaker_opens = 0
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def allow(self, url: str) -> bool:
+        if self._breaker(url).allow():
+            return True
+        self.short_circuits += 1
+        return False
+
+    def record_success(self, url: str):
+        self._breaker(url).record_success()
+
+    def record_failure(self, url: str):
+        if self._breaker(url).record_failure():
+            self.breaker_opens += 1
+            logger.warning(f'circuit opened for {_host(url)}')
+
+    def next_delay(
+        self, attempt: int, retry_after: Optional[float] = None
+    ) -> Optional[float]:
+        # returns how long to wait before the next attempt, or none to give up
+        if attempt >= self.max_retries:
+            return None
+        if self.retries >= self.retry_budget:
+            logger.warning('retry budget exhausted')
+            return None
+        if retry_after is not None and retry_after > self.max_retry_after:
+            return None
+
+        delay = min(self.max_delay, self.base_delay * 2**attempt)
+        if self.jitter:
+            delay = delay / 2 + random.uniform(0, delay / 2)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        self.retries += 1
+        return delay
+
+    def stats(self) -> dict:
+        return {
+            'retries': self.retries,
+            'retry_budget': self.retry_budget,
+            'short_circuits': self.short_circuits,
+            'breaker_opens': self.breaker_opens,
+            'open_hosts': [
+                host for host, breaker in self._breakers.items() if breaker.is_open
+            ],
+        }
+
+    def _breaker(self, url: str) -> CircuitBreaker:
+        host = _host(url)
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+            self._breakers[host] = breaker
+        return breaker
+
+
+def is_retryable_status(status: int) -> bool:
+    return status in RETRYABLE_STATUSES
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    # retry-after is either a number of seconds or an http date
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(retry_at.timestamp() - time.time(), 0.0)
+
+
+def create_retry_policy_from_env() -> RetryPolicy:
+    return RetryPolicy(
+        max_retries=int(os.getenv('RETRY_MAX_RETRIES', DEFAULT_MAX_RETRIES)),
+        retry_budget=int(os.getenv('RETRY_BUDGET', DEFAULT_RETRY_BUDGET)),
+        breaker_threshold=int(
+            os.getenv('RETRY_BREAKER_THRESHOLD', DEFAULT_BREAKER_THRESHOLD)
+        ),
+    )
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).netloc.lower()
@@ -1,28 +1,41 @@
-import asyncio
 import logging
 import os
 import boto3
 from botocore.exceptions import ClientError, BotoCoreError
-from repositories.cinema_repository import (
-    batch_insert_cinemas,
-    delete_cinemas_by_region,
-)
+from http_archive import archive_session_from_env
+from http_cache import create_http_cache_from_env
+from metrics import metrics
+from repositories.cinema_repository import reconcile_cinemas
 from scrape_cinemas.scraper import scrape_cinemas
 from models.region import Region
+from web_utils import WarmClient
 
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
 logging.getLogger().setLevel(LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
+# kept across warm invocations so the connection pool and dns cache survive
+warm_client = WarmClient()
+dynamodb = boto3.resource('dynamodb', region_name='ap-southeast-2')
+cinemas_table = dynamodb.Table('operation-kino_cinemas')
+
 
 def lambda_handler(event, context):
+    try:
+        with metrics.timer('handler_latency'):
+            return _scrape_cinemas(event)
+    finally:
+        metrics.flush(function='scrape_cinemas')
+
+
+def _scrape_cinemas(event: dict) -> dict:
     region_name = event.get('region_name')
     region_slug = event.get('region_slug')
     country_code = event.get('country_code')
     if not region_name or not region_slug or not country_code:
         return {'statusCode': 400, 'body': 'missing region info'}
 
-    host = os.getenv(f'SCRAPE_HOST_{country_code}').upper()
+    host = os.getenv(f'SCRAPE_HOST_{country_code.upper()}')
     if not host:
         return {
             'statusCode': 400,
@@ -34,11 +47,22 @@ def lambda_handler(event, context):
     )
 
     try:
-        dynamodb = boto3.resource('dynamodb', region_name='ap-southeast-2')
-        cinemas_table = dynamodb.Table('operation-kino_cinemas')
-
         region = Region(name=region_name, slug=region_slug)
-        cinemas = asyncio.run(scrape_cinemas(region, host))
+        http_cache = create_http_cache_from_env()
+
+        async def _scrape(http_session):
+            with archive_session_from_env(http_session) as http_session:
+                return await scrape_cinemas(
+                    region, host, cache=http_cache, http_session=http_session
+                )
+
+        cinemas = warm_client.run(_scrape)
+        client_stats = warm_client.stats.summary()
+        logger.info(f'http client stats: {client_stats}')
+        metrics.increment('connections_created', client_stats['connections_created'])
+        metrics.increment('connections_reused', client_stats['connections_reused'])
+        if http_cache is not None:
+            http_cache.save()
         if not cinemas:
             return {
                 'statusCode': 500,
@@ -46,10 +70,8 @@ def lambda_handler(event, context):
             }
 
         try:
-            delete_count = delete_cinemas_by_region(cinemas_table, region_slug)
-            logger.info(f'deleted {delete_count} cinemas <{region_slug}>')
-            insert_count = batch_insert_cinemas(cinemas_table, cinemas)
-            logger.info(f'inserted {insert_count} cinemas <{region_slug}>')
+            counts = reconcile_cinemas(cinemas_table, region_slug, cinemas)
+            logger.info(f'reconciled cinemas <{region_slug}>: {counts}')
         except (ClientError, BotoCoreError) as e:
             return {
                 'statusCode': 500,
@@ -1,15 +1,30 @@
 import asyncio
+from contextlib import nullcontext
 import logging
 from typing import Iterator, Optional
 
 import aiohttp
-from bs4 import BeautifulSoup
-from uuid import uuid4
 import validators
 
-from web_utils import fetch_html_section
+from web_utils import create_client_session, fetch_html_section
 from exceptions import ScrapingException
+from http_cache import HttpCache
+from metrics import metrics, timed
+from retry_policy import RetryPolicy, create_retry_policy_from_env
+from parse_engine import (
+    ENGINE_LXML,
+    ENGINE_SOUP,
+    class_xpath,
+    find_all,
+    find_first,
+    first_xpath,
+    get_parse_engine,
+    make_soup,
+    parse_html,
+    to_html,
+)
 from models.cinema import Cinema
+from models.ids import stable_id
 from models.region import Region
 
 
@@ -25,14 +40,36 @@ CINEMAS_END = 'mega-divider'
 CINEMA_DETAILS_START = '<div class="mega-divider"></div>'
 CINEMA_DETAILS_END = '<div class="cinemas-background-gray">'
 
+# precompiled selectors for the lxml parse engine
+_CINEMA_XPATH = class_xpath('a', CINEMA_CLASS_SELECTOR)
+_CINEMA_TITLE_XPATH = first_xpath('h2', CINEMA_TITLE_CLASS_SELECTOR)
+_CINEMA_DETAILS_XPATH = first_xpath('ul', CINEMA_DETAILS_CLASS_SELECTOR)
+_ANCHOR_XPATH = first_xpath('a')
+
 logger = logging.getLogger(__name__)
 
 
-async def scrape_cinemas(region: Region, host: str) -> list[Cinema]:
-    async with aiohttp.ClientSession() as session:
+async def scrape_cinemas(
+    region: Region,
+    host: str,
+    cache: Optional[HttpCache] = None,
+    parse_engine: Optional[str] = None,
+    http_session: Optional[aiohttp.ClientSession] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+) -> list[Cinema]:
+    parse_engine = parse_engine or get_parse_engine()
+    retry_policy = retry_policy or create_retry_policy_from_env()
+    async with (
+        nullcontext(http_session) if http_session else create_client_session()
+    ) as session:
         cinemas_url = CINEMAS_URL_TEMPLATE.format(host=host, region_slug=region.slug)
         cinemas_html = await fetch_html_section(
-            session, cinemas_url, CINEMAS_START, CINEMAS_END
+            session,
+            cinemas_url,
+            CINEMAS_START,
+            CINEMAS_END,
+            cache=cache,
+            retry_policy=retry_policy,
         )
         if cinemas_html is None:
             logger.error(f'{cinemas_url} did not return anything')
@@ -43,7 +80,12 @@ async def scrape_cinemas(region: Region, host: str) -> list[Cinema]:
                 host=host, cinema_slug=cinema['slug']
             )
             cinema_details_html = await fetch_html_section(
-                session, cinema_details_url, CINEMA_DETAILS_START, CINEMA_DETAILS_END
+                session,
+                cinema_details_url,
+                CINEMA_DETAILS_START,
+                CINEMA_DETAILS_END,
+                cache=cache,
+                retry_policy=retry_policy,
             )
             try:
                 if cinema_details_html is None:
@@ -52,7 +94,12 @@ async def scrape_cinemas(region: Region, host: str) -> list[Cinema]:
                     )
                     raise ScrapingException('cinema detail scraping failed')
                 return _enrich_cinema_with_url(
-                    cinema['name'], region.name, region.slug, cinema_details_html
+                    cinema['name'],
+                    cinema['slug'],
+                    region.name,
+                    region.slug,
+                    cinema_details_html,
+                    parse_engine,
                 )
             except ScrapingException:
                 logger.warning(
@@ -60,9 +107,11 @@ async def scrape_cinemas(region: Region, host: str) -> list[Cinema]:
                 )
                 return None
 
-        parsed_cinemas = _parse_cinema_listings(cinemas_html)
         try:
-            tasks = [_fetch_and_enrich_cinema(cinema) for cinema in parsed_cinemas]
+            with metrics.timer('parse_time', page='cinemas'):
+                parsed_cinemas = list(
+                    _parse_cinema_listings(cinemas_html, parse_engine)
+                )
         except ScrapingException:
             logger.error(
                 f'could not find any cinemas in cinema listing page at: {cinemas_url}'
@@ -70,7 +119,11 @@ async def scrape_cinemas(region: Region, host: str) -> list[Cinema]:
             logger.debug(f'cinema listing page: {cinemas_html}')
             return []
 
+        tasks = [_fetch_and_enrich_cinema(cinema) for cinema in parsed_cinemas]
         enriched_cinemas = await asyncio.gather(*tasks)
+        if cache is not None:
+            logger.info(f'http cache stats <{region.slug}>: {cache.stats()}')
+        logger.info(f'retry policy stats <{region.slug}>: {retry_policy.stats()}')
 
         return [
             enriched_cinema
@@ -79,8 +132,14 @@ async def scrape_cinemas(region: Region, host: str) -> list[Cinema]:
         ]
 
 
-def _parse_cinema_listings(html: str) -> Iterator[dict]:
-    cinemas_soup = BeautifulSoup(html, 'lxml')
+def _parse_cinema_listings(html: str, engine: str = ENGINE_SOUP) -> Iterator[dict]:
+    if engine == ENGINE_LXML:
+        return _parse_cinema_listings_lxml(html)
+    return _parse_cinema_listings_soup(html)
+
+
+def _parse_cinema_listings_soup(html: str) -> Iterator[dict]:
+    cinemas_soup = make_soup(html)
     cinema_elements = cinemas_soup.find_all('a', class_=CINEMA_CLASS_SELECTOR)
     if not cinema_elements:
         raise ScrapingException('cinema listing scraping failed')
@@ -113,10 +172,73 @@ def _parse_cinema_listings(html: str) -> Iterator[dict]:
         yield {'name': cinema_name_element.text, 'slug': cinema_slug_parts[1]}
 
 
+def _parse_cinema_listings_lxml(html: str) -> Iterator[dict]:
+    cinema_elements = find_all(_CINEMA_XPATH, parse_html(html))
+    if not cinema_elements:
+        raise ScrapingException('cinema listing scraping failed')
+
+    for cinema_element in cinema_elements:
+        # scrape cinema name
+        cinema_name_element = find_first(_CINEMA_TITLE_XPATH, cinema_element)
+        if cinema_name_element is None:
+            logger.error(
+                f'could not find <h2.{CINEMA_TITLE_CLASS_SELECTOR}> element for cinema name in: {to_html(cinema_element)}'
+            )
+            continue
+
+        # scrape cinema url slug
+        cinema_slug_href = cinema_element.get('href')
+        if cinema_slug_href is None:
+            logger.error(
+                f'could not find <a.{CINEMA_CLASS_SELECTOR}[href]> for cinema slug in: {to_html(cinema_element)}'
+            )
+            continue
+        cinema_slug_parts = cinema_slug_href.strip('/').split('/')
+        if len(cinema_slug_parts) != 2:
+            logger.error(
+                f'unexpected format for cinema slug. expected: </cinema/cinema-name> actual: <{cinema_slug_href}>'
+            )
+            continue
+
+        yield {
+            'name': cinema_name_element.text_content(),
+            'slug': cinema_slug_parts[1],
+        }
+
+
+@timed('parse_time', page='cinema_details')
 def _enrich_cinema_with_url(
-    cinema_name: str, region_name: str, region_slug: str, html: str
+    cinema_name: str,
+    cinema_slug: str,
+    region_name: str,
+    region_slug: str,
+    html: str,
+    engine: str = ENGINE_SOUP,
 ) -> Cinema:
-    cinema_details_soup = BeautifulSoup(html, 'lxml')
+    if engine == ENGINE_LXML:
+        cinema_url = _parse_cinema_url_lxml(cinema_name, html)
+    else:
+        cinema_url = _parse_cinema_url_soup(cinema_name, html)
+
+    if not validators.url(
+        cinema_url
+    ):  # sometimes the url is a phone number wtf brisbane??
+        logger.warning(
+            f'found homepage url element for {cinema_name} but does not contain a valid url: {cinema_url}'
+        )
+        cinema_url = None
+
+    return Cinema(
+        id=stable_id(region_slug, cinema_slug),
+        name=cinema_name,
+        homepage_url=cinema_url,
+        region=region_name,
+        region_code=region_slug,
+    )
+
+
+def _parse_cinema_url_soup(cinema_name: str, html: str) -> str:
+    cinema_details_soup = make_soup(html)
     cinema_details_element = cinema_details_soup.find(
         'ul', class_=CINEMA_DETAILS_CLASS_SELECTOR
     )
@@ -134,19 +256,23 @@ def _enrich_cinema_with_url(
         )
         raise ScrapingException('cinema detail scraping failed')
 
-    cinema_url = cinema_url_element.text
-    if not validators.url(
-        cinema_url
-    ):  # sometimes the url is a phone number wtf brisbane??
-        logger.warning(
-            f'found homepage url element for {cinema_name} but does not contain a valid url: {cinema_url}'
+    return cinema_url_element.text
+
+
+def _parse_cinema_url_lxml(cinema_name: str, html: str) -> str:
+    cinema_details_element = find_first(_CINEMA_DETAILS_XPATH, parse_html(html))
+    if cinema_details_element is None:
+        logger.error(
+            f'could not find <ul.{CINEMA_DETAILS_CLASS_SELECTOR}> for {cinema_name} cinema details in cinema details page:'
         )
-        cinema_url = None
+        logger.debug(f'cinema details page: {html}')
+        raise ScrapingException('cinema detail scraping failed')
 
-    return Cinema(
-        id=str(uuid4()),
-        name=cinema_name,
-        homepage_url=cinema_url,
-        region=region_name,
-        region_code=region_slug,
-    )
+    cinema_url_element = find_first(_ANCHOR_XPATH, cinema_details_element)
+    if cinema_url_element is None:
+        logger.error(
+            f'could not find <a> for {cinema_name} cinema details in: {to_html(cinema_details_element)}'
+        )
+        raise ScrapingException('cinema detail scraping failed')
+
+    return cinema_url_element.text_content()
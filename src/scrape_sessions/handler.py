@@ -1,26 +1,182 @@
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
 import logging
 import os
+from typing import Optional
+from uuid import uuid4
+import aiohttp
 import boto3
 from botocore.exceptions import ClientError, BotoCoreError
+from crawl_scheduler import CrawlScheduler
+from details_cache import MovieDetailsCache
+from http_archive import archive_session_from_env
+from http_cache import HttpCache, create_http_cache_from_env
+from metrics import metrics
+from models.movie import Movie
 from models.region import Region
+from parse_stage import ParseStage, create_parse_stage_from_env
+from retry_policy import RetryPolicy, create_retry_policy_from_env
 from repositories.cinema_repository import get_cinemas_by_region
-from repositories.movie_repository import batch_insert_movies, delete_movies_by_region
+from repositories.movie_details_repository import (
+    batch_put_movie_details,
+    get_movie_details_by_host,
+)
+from repositories.movie_repository import (
+    delete_legacy_movies,
+    migrate_movie_showtimes,
+    new_generation,
+    write_movie_generation,
+)
+from repositories.region_repository import (
+    flip_region_generation,
+    put_region_indexes,
+    put_region_snapshot,
+)
 from scrape_sessions.scraper import scrape_sessions
+from web_utils import WarmClient, prewarm_connections
 
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
 logging.getLogger().setLevel(LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
+# kept across warm invocations so the connection pool and dns cache survive
+warm_client = WarmClient()
+dynamodb = boto3.resource('dynamodb', region_name='ap-southeast-2')
+tables = {
+    'movies': dynamodb.Table('operation-kino_movies'),
+    'cinemas': dynamodb.Table('operation-kino_cinemas'),
+    'regions': dynamodb.Table('operation-kino_regions'),
+    'movie_details': dynamodb.Table('operation-kino_movie_details'),
+}
+
 
 def lambda_handler(event, context):
+    try:
+        with metrics.timer('handler_latency'):
+            if 'migrate_showtimes' in event:
+                return _migrate_showtimes(event['migrate_showtimes'])
+            return _scrape_sessions(event)
+    finally:
+        metrics.flush(function='scrape_sessions')
+
+
+def _migrate_showtimes(region_slugs: list[str]) -> dict:
+    # {'migrate_showtimes': ['auckland', ...]} rewrites the stored movies of regions
+    # into the current showtimes encoding without scraping them
+    migrated = {}
+    try:
+        for region_slug in region_slugs:
+            migrated[region_slug] = migrate_movie_showtimes(
+                tables['movies'], region_slug
+            )
+    except (ClientError, BotoCoreError) as e:
+        return {
+            'statusCode': 500,
+            'body': f'showtimes migration encountered dynamodb error: {e}',
+        }
+
+    logger.info(f'migrated movie showtimes: {migrated}')
+    return {'statusCode': 200, 'body': json.dumps(migrated)}
+
+
+def _scrape_sessions(event: dict) -> dict:
+    # accepts either a single region or {'regions': [...]} to scrape several regions in
+    # one run that share a connection pool and movie details downloads
+    region_events = event.get('regions') or [event]
+    try:
+        results = warm_client.run(
+            lambda http_session: _scrape_regions(region_events, http_session)
+        )
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'body': f'scrape sessions lambda encountered unexpected error: {e}',
+        }
+
+    if 'regions' not in event:
+        return results[0]
+
+    failed = [result for result in results if result['statusCode'] != 200]
+    return {
+        'statusCode': 500 if failed else 200,
+        'body': json.dumps(results),
+    }
+
+
+async def _scrape_regions(
+    region_events: list[dict], http_session: aiohttp.ClientSession
+) -> list[dict]:
+    http_cache = create_http_cache_from_env()
+    scheduler = CrawlScheduler()
+    details_memo = {}
+    # one policy for the whole run so every region draws on the same retry budget
+    retry_policy = create_retry_policy_from_env()
+
+    # boto3 resources are not thread safe so all dynamodb work goes through one thread
+    with (
+        ThreadPoolExecutor(max_workers=1, thread_name_prefix='dynamodb') as db_executor,
+        create_parse_stage_from_env() as parse_stage,
+        archive_session_from_env(http_session) as http_session,
+    ):
+        loop = asyncio.get_running_loop()
+        prewarm_task = asyncio.ensure_future(
+            prewarm_connections(http_session, _get_hosts(region_events))
+        )
+        details_cache = await loop.run_in_executor(
+            db_executor, _load_details_cache, tables, region_events
+        )
+        await prewarm_task
+
+        async def _scrape_region(region_event: dict) -> dict:
+            result = await _scrape_and_commit_region(
+                region_event,
+                tables,
+                db_executor,
+                http_session=http_session,
+                scheduler=scheduler,
+                cache=http_cache,
+                parse_stage=parse_stage,
+                details_memo=details_memo,
+                details_cache=details_cache,
+                retry_policy=retry_policy,
+            )
+            return {'region_slug': region_event.get('region_slug'), **result}
+
+        results = await asyncio.gather(
+            *(_scrape_region(region_event) for region_event in region_events)
+        )
+        logger.info(f'http client stats: {warm_client.stats.summary()}')
+        _record_run_metrics(details_cache)
+
+        await loop.run_in_executor(
+            db_executor, _save_details_cache, tables, details_cache
+        )
+
+    if http_cache is not None:
+        http_cache.save()
+    return results
+
+
+async def _scrape_and_commit_region(
+    event: dict,
+    tables: dict,
+    db_executor: ThreadPoolExecutor,
+    http_session: aiohttp.ClientSession,
+    scheduler: CrawlScheduler,
+    cache: Optional[HttpCache],
+    parse_stage: ParseStage,
+    details_memo: dict,
+    details_cache: MovieDetailsCache,
+    retry_policy: RetryPolicy,
+) -> dict:
     region_name = event.get('region_name')
     region_slug = event.get('region_slug')
     country_code = event.get('country_code')
     if not region_name or not region_slug or not country_code:
         return {'statusCode': 400, 'body': 'missing region info'}
 
-    host = os.getenv(f'SCRAPE_HOST_{country_code}').upper()
+    host = os.getenv(f'SCRAPE_HOST_{country_code.upper()}')
     if not host:
         return {
             'statusCode': 400,
@@ -29,12 +185,11 @@ def lambda_handler(event, context):
 
     logger.info(f'operation kino phase 2: scrape sessions begin <{region_slug}>')
 
+    loop = asyncio.get_running_loop()
     try:
-        dynamodb = boto3.resource('dynamodb', region_name='ap-southeast-2')
-
-        movies_table = dynamodb.Table('operation-kino_movies')
-        cinemas_table = dynamodb.Table('operation-kino_cinemas')
-        cinemas = get_cinemas_by_region(cinemas_table, region_slug)
+        cinemas = await loop.run_in_executor(
+            db_executor, get_cinemas_by_region, tables['cinemas'], region_slug
+        )
         if not cinemas:
             return {
                 'statusCode': 500,
@@ -42,17 +197,29 @@ def lambda_handler(event, context):
             }
 
         region = Region(name=region_name, slug=region_slug)
-        movies = asyncio.run(scrape_sessions(region, host, cinemas))
+        movies = await scrape_sessions(
+            region,
+            host,
+            cinemas,
+            scheduler=scheduler,
+            cache=cache,
+            parse_stage=parse_stage,
+            http_session=http_session,
+            details_memo=details_memo,
+            details_cache=details_cache,
+            retry_policy=retry_policy,
+        )
         if not movies:
             return {
                 'statusCode': 500,
                 'body': 'failed to scrape sessions',
             }
 
-        delete_count = delete_movies_by_region(movies_table, region_slug)
-        logger.info(f'deleted {delete_count} movies <{region_slug}>')
-        insert_count = batch_insert_movies(movies_table, movies)
-        logger.info(f'inserted {insert_count} movies <{region_slug}>')
+        # each region commits as soon as it is scraped so one failure does not hold
+        # back or roll back the others
+        await loop.run_in_executor(
+            db_executor, _commit_region, tables, region_slug, movies
+        )
 
         logger.info(f'operation kino phase 2: scrape sessions complete <{region_slug}>')
         return {'statusCode': 200}
@@ -66,3 +233,69 @@ def lambda_handler(event, context):
             'statusCode': 500,
             'body': f'scrape sessions lambda encountered unexpected error: {e}',
         }
+
+
+def _commit_region(tables: dict, region_slug: str, movies: list[Movie]) -> None:
+    # the movies are written as a new generation that readers cannot see yet, so a
+    # half written region is never served and the previous one needs no deletes
+    generation = new_generation()
+    written = write_movie_generation(tables['movies'], region_slug, movies, generation)
+    logger.info(f'wrote {written} movies <{region_slug}> generation {generation}')
+
+    # the version invalidates responses cached by warm get sessions containers
+    version = uuid4().hex
+    flipped, previous_generation = flip_region_generation(
+        tables['regions'], region_slug, version, generation
+    )
+    if not flipped:
+        # a newer scrape already flipped the region and writes its own snapshot
+        return
+    if previous_generation is None:
+        deleted = delete_legacy_movies(tables['movies'], region_slug)
+        logger.info(f'deleted {deleted} pre-generation movies <{region_slug}>')
+
+    # the snapshot and indexes follow the flip so a scrape that lost it never writes
+    # them. until they land readers see a version mismatch and query the movies
+    put_region_snapshot(tables['regions'], region_slug, movies, version, generation)
+    index_counts = put_region_indexes(tables['regions'], region_slug, movies, version)
+    logger.info(f'reconciled region indexes <{region_slug}>: {index_counts}')
+
+
+def _get_hosts(region_events: list[dict]) -> set[str]:
+    hosts = {
+        os.getenv(f'SCRAPE_HOST_{region_event["country_code"].upper()}')
+        for region_event in region_events
+        if region_event.get('country_code')
+    }
+    return {host for host in hosts if host}
+
+
+def _load_details_cache(tables: dict, region_events: list[dict]) -> MovieDetailsCache:
+    items = []
+    for host in _get_hosts(region_events):
+        try:
+            items.extend(get_movie_details_by_host(tables['movie_details'], host))
+        except (ClientError, BotoCoreError):
+            # the cache is only an optimisation, scrape everything if it is unavailable
+            logger.warning(f'movie details cache unavailable for {host}')
+    return MovieDetailsCache(items)
+
+
+def _save_details_cache(tables: dict, details_cache: MovieDetailsCache) -> None:
+    try:
+        put_count = batch_put_movie_details(
+            tables['movie_details'], details_cache.pending()
+        )
+        details_cache.clear_pending()
+        logger.info(f'saved {put_count} movie details cache entries')
+    except (ClientError, BotoCoreError):
+        logger.warning('failed to save movie details cache entries')
+
+
+def _record_run_metrics(details_cache: MovieDetailsCache) -> None:
+    client_stats = warm_client.stats.summary()
+    metrics.increment('connections_created', client_stats['connections_created'])
+    metrics.increment('connections_reused', client_stats['connections_reused'])
+    metrics.increment('details_cache_hits', details_cache.hits)
+    metrics.increment('details_cache_negative_hits', details_cache.negative_hits)
+    metrics.increment('details_cache_misses', details_cache.misses)
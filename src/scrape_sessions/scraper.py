@@ -1,16 +1,45 @@
 import asyncio
+from contextlib import nullcontext
 from datetime import date, datetime
 import logging
 import re
 from typing import Iterator, Optional
-from uuid import uuid4
 from zoneinfo import ZoneInfo
 import aiohttp
-from bs4 import BeautifulSoup
-from pydantic import HttpUrl
+from cinema_index import CinemaIndex
+from crawl_scheduler import (
+    PRIORITY_DETAILS,
+    PRIORITY_NOW_SHOWING,
+    PRIORITY_SHOWTIMES,
+    PRIORITY_VENUES,
+    CrawlScheduler,
+)
+from details_cache import MovieDetailsCache, to_details
 from exceptions import ScrapingException
+from http_cache import HttpCache
+from metrics import metrics, timed
+from parse_engine import (
+    ENGINE_LXML,
+    ENGINE_SOUP,
+    class_xpath,
+    find_all,
+    find_first,
+    first_xpath,
+    get_parse_engine,
+    make_soup,
+    parse_html,
+    to_html,
+)
 from models.cinema import Cinema, CinemaSummary
-from web_utils import fetch_html, fetch_html_section
+from models.ids import stable_id
+from parse_stage import ParseStage, create_parse_stage_from_env
+from retry_policy import RetryPolicy, create_retry_policy_from_env
+from web_utils import (
+    create_client_session,
+    decode_html,
+    fetch_bytes,
+    fetch_html_section_bytes,
+)
 from models.region import Region
 from models.movie import Movie
 
@@ -42,120 +71,294 @@ MOVIES_END = (
 MOVIE_DETAILS_START = '<main>'
 MOVIE_DETAILS_END = '</main>'
 
+# precompiled selectors for the lxml parse engine
+_MOVIE_XPATH = class_xpath('h3', MOVIE_CLASS_SELECTOR)
+_RELEASE_YEAR_XPATH = first_xpath('div', MOVIE_RELEASE_YEAR_SELECTOR)
+_IMAGE_URL_XPATH = first_xpath('div', MOVIE_IMAGE_URL_SELECTOR)
+_SHOWTIMES_XPATH = class_xpath('span', MOVIE_SHOWTIMES_SELECTOR)
+_SHOWTIME_DAY_XPATH = first_xpath('span', MOVIE_SHOWTIME_DAY_SELECTOR)
+_SHOWTIME_MONTH_XPATH = first_xpath('span', MOVIE_SHOWTIME_MONTH_SELECTOR)
+_VENUES_XPATH = class_xpath('div', MOVIE_VENUES_SELECTOR)
+_ANCHOR_XPATH = first_xpath('a')
+_IMG_XPATH = first_xpath('img')
+_H4_XPATH = first_xpath('h4')
+
 logger = logging.getLogger(__name__)
 
 
 async def scrape_sessions(
-    region: Region, host: str, cinemas: list[Cinema]
+    region: Region,
+    host: str,
+    cinemas: list[Cinema],
+    scheduler: Optional[CrawlScheduler] = None,
+    cache: Optional[HttpCache] = None,
+    parse_engine: Optional[str] = None,
+    parse_stage: Optional[ParseStage] = None,
+    http_session: Optional[aiohttp.ClientSession] = None,
+    details_memo: Optional[dict[tuple[str, str], asyncio.Future]] = None,
+    details_cache: Optional[MovieDetailsCache] = None,
+    retry_policy: Optional[RetryPolicy] = None,
 ) -> list[Movie] | None:
-    async with aiohttp.ClientSession() as http_session:
-        now_showing_url = MOVIES_URL_TEMPLATE.format(host=host, region_slug=region.slug)
-        now_showing_html = await fetch_html_section(
-            http_session, now_showing_url, MOVIES_START, MOVIES_END
+    # scrapes of several regions in one run pass in a shared http session, parse stage
+    # and details memo, a standalone call owns and closes its own
+    owns_parse_stage = parse_stage is None
+    parse_stage = parse_stage or create_parse_stage_from_env()
+    try:
+        async with (
+            nullcontext(http_session) if http_session else create_client_session()
+        ) as http_session:
+            return await _scrape_sessions(
+                region,
+                host,
+                cinemas,
+                scheduler=scheduler or CrawlScheduler(),
+                cache=cache,
+                parse_engine=parse_engine or get_parse_engine(),
+                parse_stage=parse_stage,
+                http_session=http_session,
+                details_memo=details_memo if details_memo is not None else {},
+                details_cache=details_cache,
+                retry_policy=retry_policy or create_retry_policy_from_env(),
+            )
+    finally:
+        if owns_parse_stage:
+            parse_stage.close()
+
+
+async def _scrape_sessions(
+    region: Region,
+    host: str,
+    cinemas: list[Cinema],
+    scheduler: CrawlScheduler,
+    cache: Optional[HttpCache],
+    parse_engine: str,
+    parse_stage: ParseStage,
+    http_session: aiohttp.ClientSession,
+    details_memo: dict[tuple[str, str], asyncio.Future],
+    details_cache: Optional[MovieDetailsCache] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+) -> list[Movie] | None:
+    # venue names are resolved on the event loop rather than in the parse jobs so one
+    # index and its memo serve every movie of the scrape
+    cinema_index = CinemaIndex({cinema.name: cinema.homepage_url for cinema in cinemas})
+
+    now_showing_url = MOVIES_URL_TEMPLATE.format(host=host, region_slug=region.slug)
+    async with scheduler.slot(now_showing_url, PRIORITY_NOW_SHOWING):
+        now_showing_html = await fetch_html_section_bytes(
+            http_session,
+            now_showing_url,
+            MOVIES_START,
+            MOVIES_END,
+            cache=cache,
+            retry_policy=retry_policy,
         )
-        if now_showing_html is None:
-            logger.error(
-                f'fetching now showing movies html returned null: {now_showing_html}'
+    if now_showing_html is None:
+        logger.error(
+            f'fetching now showing movies html returned null: {now_showing_html}'
+        )
+        return None
+
+    async def _fetch_movie_details(movie_slug: str) -> dict:
+        # the persistent cache is checked first so only new titles cost a request
+        if details_cache is not None:
+            cached = details_cache.get(host, movie_slug)
+            if cached is not None:
+                if cached.get('failed'):
+                    raise ScrapingException(
+                        f'movie details page failed to parse recently: {movie_slug}'
+                    )
+                return to_details(cached)
+
+        # details pages are not region specific so regions sharing a host share the
+        # download, including one that is still in flight
+        memo_key = (host, movie_slug)
+        details = details_memo.get(memo_key)
+        if details is None:
+            details = asyncio.ensure_future(_download_movie_details(movie_slug))
+            details_memo[memo_key] = details
+        try:
+            return await asyncio.shield(details)
+        except Exception:
+            # only the regions already waiting share a failure, a later region fetches
+            # the page again
+            if details_memo.get(memo_key) is details:
+                del details_memo[memo_key]
+            raise
+
+    async def _download_movie_details(movie_slug: str) -> dict:
+        movie_details_url = MOVIE_DETAILS_URL_TEMPLATE.format(
+            host=host, movie_slug=movie_slug
+        )
+        async with scheduler.slot(movie_details_url, PRIORITY_DETAILS):
+            movie_details_html = await fetch_html_section_bytes(
+                http_session,
+                movie_details_url,
+                MOVIE_DETAILS_START,
+                MOVIE_DETAILS_END,
+                cache=cache,
+                retry_policy=retry_policy,
             )
-            return None
-
-        async def _fetch_movie_details(movie_slug: str) -> dict:
-            movie_details_url = MOVIE_DETAILS_URL_TEMPLATE.format(
-                host=host, movie_slug=movie_slug
+        if movie_details_html is None:
+            # network errors and an open circuit say nothing about the page, so unlike a
+            # page that fails to parse they are not negative cached
+            raise ScrapingException(
+                f'fetching movie details html returned null: {movie_details_url}'
             )
-            movie_details_html = await fetch_html_section(
-                http_session, movie_details_url, MOVIE_DETAILS_START, MOVIE_DETAILS_END
+
+        try:
+            details = await parse_stage.run(
+                _parse_movie_details_job, movie_details_html, parse_engine
             )
-            return _parse_movie_details(movie_details_html)
+        except ScrapingException:
+            if details_cache is not None:
+                details_cache.put_failure(host, movie_slug)
+            raise
+
+        if details_cache is not None:
+            details_cache.put(host, movie_slug, details)
+        return details
 
-        async def _fetch_movie_showtimes(movie_slug: str) -> list[str]:
-            movie_showtimes_url = MOVIE_SHOWTIMES_URL_TEMPLATE.format(
-                host=host, movie_slug=movie_slug, region_slug=region.slug
+    async def _fetch_movie_showtimes(movie_slug: str) -> list[str]:
+        movie_showtimes_url = MOVIE_SHOWTIMES_URL_TEMPLATE.format(
+            host=host, movie_slug=movie_slug, region_slug=region.slug
+        )
+        async with scheduler.slot(movie_showtimes_url, PRIORITY_SHOWTIMES):
+            movie_showtimes_html = await fetch_bytes(
+                session=http_session,
+                url=movie_showtimes_url,
+                cache=cache,
+                retry_policy=retry_policy,
             )
-            movie_showtimes_html = await fetch_html(
-                session=http_session, url=movie_showtimes_url
+        if movie_showtimes_html is None:
+            raise ScrapingException(
+                f'fetching movie showtimes html returned null: {movie_showtimes_html}'
             )
-            if movie_showtimes_html is None:
-                raise ScrapingException(
-                    f'fetching movie showtimes html returned null: {movie_showtimes_html}'
-                )
 
-            return _parse_movie_showtimes(movie_showtimes_html)
+        return await parse_stage.run(
+            _parse_movie_showtimes_job, movie_showtimes_html, parse_engine
+        )
 
-        async def _fetch_movie_venues(movie_slug: str, showtime: str) -> list[str]:
-            movie_venues_url = MOVIE_VENUES_URL_TEMPLATE.format(
-                host=host, movie_slug=movie_slug, showtime=showtime
+    async def _fetch_movie_venues(
+        movie_slug: str, showtime: str
+    ) -> list[CinemaSummary]:
+        movie_venues_url = MOVIE_VENUES_URL_TEMPLATE.format(
+            host=host, movie_slug=movie_slug, showtime=showtime
+        )
+        async with scheduler.slot(movie_venues_url, PRIORITY_VENUES):
+            movie_venues_html = await fetch_bytes(
+                session=http_session,
+                url=movie_venues_url,
+                cache=cache,
+                retry_policy=retry_policy,
             )
-            movie_venues_html = await fetch_html(
-                session=http_session, url=movie_venues_url
+        if movie_venues_html is None:
+            raise ScrapingException(
+                f'fetching movie venues html returned null: {movie_venues_url}'
             )
-            if movie_venues_html is None:
-                raise ScrapingException(
-                    f'fetching movie venues html returned null: {movie_venues_url}'
-                )
-
-            cinemas_map = {cinema.name: cinema.homepage_url for cinema in cinemas}
-            return _parse_movie_venues(movie_venues_html, cinemas_map)
-
-        async def _fetch_and_enrich_movie(movie: dict) -> Optional[Movie]:
-            try:
-                fetch_details_task = _fetch_movie_details(movie['slug'])
-                fetch_showtimes_task = _fetch_movie_showtimes(movie['slug'])
-                details, showtimes = await asyncio.gather(
-                    fetch_details_task, fetch_showtimes_task
-                )
-                if not showtimes:
-                    logger.error(
-                        f'failed to scrape showtimes for movie {movie["title"]}'
-                    )
-                    raise ScrapingException('movie showtime scraping failed')
-
-                earliest_showtime = showtimes[0]
-                venues = await _fetch_movie_venues(movie['slug'], earliest_showtime)
-                if not venues:
-                    logger.error(f'failed to scrape venues for movie {movie["title"]}')
-                    raise ScrapingException('movie venue scraping failed')
-
-                return Movie(
-                    id=str(uuid4()),
-                    title=movie['title'],
-                    release_year=details['release_year'],
-                    image_url=details['image_url'],
-                    region=region.name,
-                    region_code=region.slug,
-                    cinemas=venues,
-                    showtimes=showtimes,
-                    last_showtime=showtimes[-1],
-                )
-            except ScrapingException:
-                logger.warning(
-                    f'skipping movie due to scraping failure: {movie["title"]}'
-                )
-                return None
-
-        parsed_movies = _parse_now_showing_movies(now_showing_html)
+
+        venue_names = await parse_stage.run(
+            _parse_movie_venue_names_job, movie_venues_html, parse_engine
+        )
+        return _resolve_venues(venue_names, cinema_index)
+
+    async def _fetch_and_enrich_movie(movie: dict) -> Optional[Movie]:
         try:
-            tasks = [
-                _fetch_and_enrich_movie(parsed_movie) for parsed_movie in parsed_movies
-            ]
-        except ScrapingException:
-            logger.error(
-                f'could not find any movies in now showing page at: {now_showing_url}'
+            fetch_details_task = _fetch_movie_details(movie['slug'])
+            fetch_showtimes_task = _fetch_movie_showtimes(movie['slug'])
+            details, showtimes = await asyncio.gather(
+                fetch_details_task, fetch_showtimes_task
             )
-            logger.debug(f'now showing page: {now_showing_html}')
-            return []
+            if not showtimes:
+                logger.error(f'failed to scrape showtimes for movie {movie["title"]}')
+                raise ScrapingException('movie showtime scraping failed')
+
+            # kept sorted and unique so readers can range filter by bisection
+            showtimes = sorted(set(showtimes))
+            earliest_showtime = showtimes[0]
+            venues = await _fetch_movie_venues(movie['slug'], earliest_showtime)
+            if not venues:
+                logger.error(f'failed to scrape venues for movie {movie["title"]}')
+                raise ScrapingException('movie venue scraping failed')
+
+            return Movie(
+                id=stable_id(region.slug, movie['slug']),
+                title=movie['title'],
+                release_year=details['release_year'],
+                image_url=details['image_url'],
+                region=region.name,
+                region_code=region.slug,
+                cinemas=venues,
+                showtimes=showtimes,
+                last_showtime=showtimes[-1],
+            )
+        except ScrapingException:
+            logger.warning(f'skipping movie due to scraping failure: {movie["title"]}')
+            return None
+
+    try:
+        parsed_movies = await parse_stage.run(
+            _parse_now_showing_movies_job, now_showing_html, parse_engine
+        )
+    except ScrapingException:
+        logger.error(
+            f'could not find any movies in now showing page at: {now_showing_url}'
+        )
+        logger.debug(f'now showing page: {decode_html(now_showing_html)}')
+        return []
+
+    tasks = [_fetch_and_enrich_movie(parsed_movie) for parsed_movie in parsed_movies]
+    enriched_movies = await asyncio.gather(*tasks)
+    logger.info(f'crawl scheduler stats <{region.slug}>: {scheduler.stats.summary()}')
+    if cache is not None:
+        logger.info(f'http cache stats <{region.slug}>: {cache.stats()}')
+    if retry_policy is not None:
+        logger.info(f'retry policy stats <{region.slug}>: {retry_policy.stats()}')
+    if details_cache is not None:
+        logger.info(
+            f'movie details cache stats <{region.slug}>: {details_cache.stats()}'
+        )
+    logger.info(f'cinema index stats <{region.slug}>: {cinema_index.stats()}')
+    metrics.increment('cinema_fuzzy_matches', cinema_index.fuzzy_hits)
+    metrics.increment('cinema_venues_dropped', cinema_index.misses)
+    return [
+        enriched_movie
+        for enriched_movie in enriched_movies
+        if enriched_movie is not None
+    ]
+
 
-        enriched_movies = await asyncio.gather(*tasks)
-        return [
-            enriched_movie
-            for enriched_movie in enriched_movies
-            if enriched_movie is not None
-        ]
+# parse jobs run in the parse stage workers: raw bytes in, plain data out
 
 
-def _parse_now_showing_movies(html: str) -> Iterator[dict]:
+@timed('parse_time', page='now_showing')
+def _parse_now_showing_movies_job(body: bytes, engine: str) -> list[dict]:
+    return list(_parse_now_showing_movies(decode_html(body), engine))
+
+
+@timed('parse_time', page='details')
+def _parse_movie_details_job(body: bytes, engine: str) -> dict:
+    return _parse_movie_details(decode_html(body), engine)
+
+
+@timed('parse_time', page='showtimes')
+def _parse_movie_showtimes_job(body: bytes, engine: str) -> list[str]:
+    return _parse_movie_showtimes(decode_html(body), engine)
+
+
+@timed('parse_time', page='venues')
+def _parse_movie_venue_names_job(body: bytes, engine: str) -> list[str]:
+    return _parse_movie_venue_names(decode_html(body), engine)
+
+
+def _parse_now_showing_movies(html: str, engine: str = ENGINE_SOUP) -> Iterator[dict]:
+    if engine == ENGINE_LXML:
+        return _parse_now_showing_movies_lxml(html)
+    return _parse_now_showing_movies_soup(html)
+
+
+def _parse_now_showing_movies_soup(html: str) -> Iterator[dict]:
     seen_titles = set()
-    now_showing_soup = BeautifulSoup(html, 'lxml')
+    now_showing_soup = make_soup(html)
     movie_elements = now_showing_soup.find_all('h3', class_=MOVIE_CLASS_SELECTOR)
     if not movie_elements:
         raise ScrapingException('now playing movies scraping failed')
@@ -189,8 +392,51 @@ def _parse_now_showing_movies(html: str) -> Iterator[dict]:
         yield {'title': movie_title, 'slug': movie_slug_parts[1]}
 
 
-def _parse_movie_details(html: str) -> dict:
-    movie_details_soup = BeautifulSoup(html, 'lxml')
+def _parse_now_showing_movies_lxml(html: str) -> Iterator[dict]:
+    seen_titles = set()
+    movie_elements = find_all(_MOVIE_XPATH, parse_html(html))
+    if not movie_elements:
+        raise ScrapingException('now playing movies scraping failed')
+
+    for movie_element in movie_elements:
+        movie_anchor = find_first(_ANCHOR_XPATH, movie_element)
+
+        # scrape movie title
+        if movie_anchor is None:
+            logger.error(
+                f'could not find <a> element for movie title in: {to_html(movie_element)}'
+            )
+            continue
+        movie_title = _clean_movie_title(movie_anchor.text_content())
+        if movie_title in seen_titles:
+            continue
+        seen_titles.add(movie_title)
+
+        # scrape movie slug
+        movie_slug_href = movie_anchor.get('href')
+        if movie_slug_href is None:
+            logger.error(
+                f'could not find <a[href]> for movie slug in {to_html(movie_anchor)}'
+            )
+            continue
+        movie_slug_parts = movie_slug_href.strip('/').split('/')
+        if len(movie_slug_parts) != 2:
+            logger.error(
+                f'unexpected format for movie slug. expected: </movie/movie-title> actual: <{movie_slug_href}>'
+            )
+            continue
+
+        yield {'title': movie_title, 'slug': movie_slug_parts[1]}
+
+
+def _parse_movie_details(html: str, engine: str = ENGINE_SOUP) -> dict:
+    if engine == ENGINE_LXML:
+        return _parse_movie_details_lxml(html)
+    return _parse_movie_details_soup(html)
+
+
+def _parse_movie_details_soup(html: str) -> dict:
+    movie_details_soup = make_soup(html)
 
     # scrape movie release year
     movie_release_year_element = movie_details_soup.find(
@@ -224,8 +470,47 @@ def _parse_movie_details(html: str) -> dict:
     }
 
 
-def _parse_movie_showtimes(html: str) -> list[str]:
-    movie_showtimes_soup = BeautifulSoup(html, 'lxml')
+def _parse_movie_details_lxml(html: str) -> dict:
+    movie_details_root = parse_html(html)
+
+    # scrape movie release year
+    movie_release_year_element = find_first(_RELEASE_YEAR_XPATH, movie_details_root)
+    if movie_release_year_element is None:
+        logger.error(
+            f'could not find <div.{MOVIE_RELEASE_YEAR_SELECTOR}> for movie release year in movie details page'
+        )
+        logger.debug(f'movie details page: {html}')
+        raise ScrapingException('movie detail (release year) scraping failed')
+
+    # scrape movie image url
+    movie_image_url_div = find_first(_IMAGE_URL_XPATH, movie_details_root)
+    if movie_image_url_div is None:
+        logger.error(
+            f'could not find <div.{MOVIE_IMAGE_URL_SELECTOR}> for movie image url in movie details page'
+        )
+        logger.debug(f'movie details page: {html}')
+        raise ScrapingException('movie detail (image url) scraping failed')
+    movie_image_url_img = find_first(_IMG_XPATH, movie_image_url_div)
+    if movie_image_url_img is None:
+        logger.error(
+            f'could not find <img> for movie image url in: {to_html(movie_image_url_div)}'
+        )
+        raise ScrapingException('movie detail (image url) scraping failed')
+
+    return {
+        'release_year': int(movie_release_year_element.text_content()),
+        'image_url': movie_image_url_img.attrib['src'],
+    }
+
+
+def _parse_movie_showtimes(html: str, engine: str = ENGINE_SOUP) -> list[str]:
+    if engine == ENGINE_LXML:
+        return _parse_movie_showtimes_lxml(html)
+    return _parse_movie_showtimes_soup(html)
+
+
+def _parse_movie_showtimes_soup(html: str) -> list[str]:
+    movie_showtimes_soup = make_soup(html)
     showtimes_elements = movie_showtimes_soup.find_all('span', MOVIE_SHOWTIMES_SELECTOR)
     showtimes = []
     for showtime_element in showtimes_elements:
@@ -258,12 +543,71 @@ def _parse_movie_showtimes(html: str) -> list[str]:
     return showtimes
 
 
+def _parse_movie_showtimes_lxml(html: str) -> list[str]:
+    showtimes_elements = find_all(_SHOWTIMES_XPATH, parse_html(html))
+    showtimes = []
+    for showtime_element in showtimes_elements:
+        # scrape showtime day
+        showtime_day_span = find_first(_SHOWTIME_DAY_XPATH, showtime_element)
+        if showtime_day_span is None:
+            logger.error(
+                f'could not find <span.{MOVIE_SHOWTIME_DAY_SELECTOR}> for showtime day in: {to_html(showtime_element)}'
+            )
+            continue
+
+        # scrape showtime month
+        showtime_month_span = find_first(_SHOWTIME_MONTH_XPATH, showtime_element)
+        if showtime_month_span is None:
+            logger.error(
+                f'could not find <span.{MOVIE_SHOWTIME_MONTH_SELECTOR}> for showtime month in: {to_html(showtime_element)}'
+            )
+            continue
+
+        showtimes.append(
+            _parse_date(
+                showtime_day_span.text_content(),
+                showtime_month_span.text_content(),
+                datetime.now(ZoneInfo('Pacific/Auckland')).date(),
+            )
+        )
+
+    return showtimes
+
+
 def _parse_movie_venues(
-    html: str, cinemas: dict[str, Optional[HttpUrl]]
+    html: str, cinema_index: CinemaIndex, engine: str = ENGINE_SOUP
 ) -> list[CinemaSummary]:
-    movie_venues_soup = BeautifulSoup(html, 'lxml')
+    return _resolve_venues(_parse_movie_venue_names(html, engine), cinema_index)
+
+
+def _parse_movie_venue_names(html: str, engine: str = ENGINE_SOUP) -> list[str]:
+    if engine == ENGINE_LXML:
+        return _parse_movie_venue_names_lxml(html)
+    return _parse_movie_venue_names_soup(html)
+
+
+def _resolve_venues(
+    venue_names: list[str], cinema_index: CinemaIndex
+) -> list[CinemaSummary]:
+    # several spellings of a venue can resolve to the same cinema, it is listed once
+    venues = {}
+    for venue_name in venue_names:
+        match = cinema_index.resolve(venue_name)
+        if match is None:
+            logger.warning(f'venue not found in cinema table: {venue_name}')
+            continue
+        if match.name not in venues:
+            venues[match.name] = CinemaSummary(
+                name=match.name, homepage_url=match.homepage_url
+            )
+
+    return list(venues.values())
+
+
+def _parse_movie_venue_names_soup(html: str) -> list[str]:
+    movie_venues_soup = make_soup(html)
     venues_elements = movie_venues_soup.find_all('div', MOVIE_VENUES_SELECTOR)
-    venues = []
+    venue_names = []
     for venue_element in venues_elements:
         venue_name_h4 = venue_element.find('h4')
         if venue_name_h4 is None:
@@ -271,28 +615,23 @@ def _parse_movie_venues(
                 f'could not find <h4> for movie venue name in: {venue_element}'
             )
             continue
+        venue_names.append(venue_name_h4.text)
+
+    return venue_names
+
 
-        venue_name = venue_name_h4.text
-        if venue_name not in cinemas:
-            unparsed_venue_name = venue_name
-            venue_name = _clean_cinema_name(venue_name)
-            if venue_name not in cinemas:
-                logger.warning(
-                    f'venue not found in cinema table: {unparsed_venue_name}'
-                )
-                continue
-        venue_homepage_url = cinemas.get(venue_name)
-
-        venues.append(
-            CinemaSummary(
-                name=venue_name,
-                homepage_url=str(venue_homepage_url)
-                if venue_homepage_url is not None
-                else None,
+def _parse_movie_venue_names_lxml(html: str) -> list[str]:
+    venue_names = []
+    for venue_element in find_all(_VENUES_XPATH, parse_html(html)):
+        venue_name_h4 = find_first(_H4_XPATH, venue_element)
+        if venue_name_h4 is None:
+            logger.error(
+                f'could not find <h4> for movie venue name in: {to_html(venue_element)}'
             )
-        )
+            continue
+        venue_names.append(venue_name_h4.text_content())
 
-    return venues
+    return venue_names
 
 
 def _clean_movie_title(title: str) -> str:
@@ -300,11 +639,6 @@ def _clean_movie_title(title: str) -> str:
     return re.sub(r'\s*\((\d{4}(?:-\d{2,4})?)\)$', '', title)
 
 
-def _clean_cinema_name(name: str) -> str:
-    # removes trailing paren from cinema name
-    return re.sub(r'\s*\(.*\)$', '', name)
-
-
 def _parse_date(day: str, month: str, now: date) -> str:
     month_num = datetime.strptime(month, '%b').month
     year = now.year
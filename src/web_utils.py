@@ -1,32 +1,200 @@
 import asyncio
+import importlib.util
 import logging
-from typing import Awaitable, Callable, Optional
+from typing import Awaitable, Callable, Iterable, Optional, TypeVar
+from urllib.parse import urlsplit
 import aiohttp
 
+from http_cache import HttpCache
+from metrics import UNIT_BYTES, metrics
+from retry_policy import RetryPolicy, is_retryable_status, parse_retry_after
 
-RETRY_COUNT = 2
-DELAY_DURATION = 0.5
+
+DEFAULT_CHUNK_SIZE = 8192
+
+# connector tuning, the crawl scheduler is what actually limits concurrency per host
+CONNECTION_LIMIT = 32
+CONNECTION_LIMIT_PER_HOST = 8
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 30
+PREWARM_TIMEOUT = 5
+
+# aiohttp only decodes brotli when a brotli package is installed
+BROTLI_AVAILABLE = any(
+    importlib.util.find_spec(name) is not None for name in ('brotli', 'brotlicffi')
+)
+ACCEPT_ENCODING = 'gzip, deflate, br' if BROTLI_AVAILABLE else 'gzip, deflate'
+
+T = TypeVar('T')
 
 logger = logging.getLogger(__name__)
 
 
-async def fetch_html(
-    session: aiohttp.ClientSession, url: str, headers: dict = None, timeout=10
-) -> Optional[str]:
-    for attempt in range(RETRY_COUNT + 1):
+class ClientStats:
+    # fed by aiohttp trace hooks so the handler can tell whether keep-alive and the dns
+    # cache are doing anything
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.dns_cache_hits = 0
+        self.dns_cache_misses = 0
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(self._on_connection_create)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reuse)
+        trace_config.on_dns_cache_hit.append(self._on_dns_cache_hit)
+        trace_config.on_dns_cache_miss.append(self._on_dns_cache_miss)
+        return trace_config
+
+    def summary(self) -> dict:
+        requests = self.connections_created + self.connections_reused
+        return {
+            'connections_created': self.connections_created,
+            'connections_reused': self.connections_reused,
+            'reuse_ratio': round(self.connections_reused / requests, 2)
+            if requests
+            else 0.0,
+            'dns_cache_hits': self.dns_cache_hits,
+            'dns_cache_misses': self.dns_cache_misses,
+        }
+
+    async def _on_connection_create(self, session, context, params):
+        self.connections_created += 1
+
+    async def _on_connection_reuse(self, session, context, params):
+        self.connections_reused += 1
+
+    async def _on_dns_cache_hit(self, session, context, params):
+        self.dns_cache_hits += 1
+
+    async def _on_dns_cache_miss(self, session, context, params):
+        self.dns_cache_misses += 1
+
+
+def create_client_session(stats: Optional[ClientStats] = None) -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=CONNECTION_LIMIT,
+        limit_per_host=CONNECTION_LIMIT_PER_HOST,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        use_dns_cache=True,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers={'Accept-Encoding': ACCEPT_ENCODING},
+        trace_configs=[stats.trace_config()] if stats is not None else None,
+    )
+
+
+async def prewarm_connections(
+    session: aiohttp.ClientSession, urls: Iterable[str], timeout=PREWARM_TIMEOUT
+) -> int:
+    # resolves dns and completes the tls handshake for each host while the first pages
+    # are still being scheduled, the connections then sit in the keep-alive pool
+    origins = {
+        f'{parts.scheme}://{parts.netloc}'
+        for parts in (urlsplit(url) for url in urls)
+        if parts.scheme and parts.netloc
+    }
+
+    async def _prewarm(origin: str) -> bool:
         try:
-            async with session.get(
-                url, headers=headers or {}, timeout=aiohttp.ClientTimeout(total=timeout)
-            ) as response:
-                response.raise_for_status()
-                return await response.text()
+            async with session.head(
+                origin,
+                allow_redirects=False,
+                timeout=aiohttp.ClientTimeout(total=timeout),
+            ):
+                return True
         except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-            if attempt < RETRY_COUNT:
-                logger.warning(f'[attempt {attempt}] failed to fetch at {url}: {e}')
-                await asyncio.sleep(DELAY_DURATION)
-            else:
-                logger.error(f'all attempts failed at {url}: {e}')
-                return None
+            logger.warning(f'failed to prewarm connection to {origin}: {e}')
+            return False
+
+    results = await asyncio.gather(*(_prewarm(origin) for origin in origins))
+    return sum(results)
+
+
+class WarmClient:
+    # lambda runs one invocation at a time per container, so an event loop and client
+    # session kept at module level can be reused by the next warm invocation instead of
+    # paying for dns and tls again. the session is bound to the loop, so both live here
+    def __init__(self):
+        self.stats = ClientStats()
+        self.invocations = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def run(self, job: Callable[[aiohttp.ClientSession], Awaitable[T]]) -> T:
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+        self.invocations += 1
+        self.stats.reset()
+        return self._loop.run_until_complete(self._run(job))
+
+    def close(self):
+        if self._loop is None or self._loop.is_closed():
+            return
+        if self._session is not None and not self._session.closed:
+            self._loop.run_until_complete(self._session.close())
+        self._session = None
+        self._loop.close()
+        self._loop = None
+
+    async def _run(self, job: Callable[[aiohttp.ClientSession], Awaitable[T]]) -> T:
+        if self._session is None or self._session.closed:
+            self._session = create_client_session(self.stats)
+        else:
+            logger.info(f'reusing warm http client, invocation {self.invocations}')
+        return await job(self._session)
+
+
+async def fetch_html(
+    session: aiohttp.ClientSession,
+    url: str,
+    headers: dict = None,
+    timeout=10,
+    cache: Optional[HttpCache] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+) -> Optional[str]:
+    body = await fetch_bytes(session, url, headers, timeout, cache, retry_policy)
+    return decode_html(body) if body is not None else None
+
+
+async def fetch_bytes(
+    session: aiohttp.ClientSession,
+    url: str,
+    headers: dict = None,
+    timeout=10,
+    cache: Optional[HttpCache] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+) -> Optional[bytes]:
+    if cache is not None:
+        cached_body = cache.fresh_body(url)
+        if cached_body is not None:
+            metrics.increment('http_cache_hits', kind='fresh')
+            return cached_body
+        headers = {**(headers or {}), **cache.request_headers(url)}
+
+    async def _fetch() -> Optional[bytes]:
+        async with session.get(
+            url, headers=headers or {}, timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as response:
+            response.raise_for_status()
+            if cache is not None and response.status == 304:
+                metrics.increment('http_cache_hits', kind='revalidated')
+                return cache.not_modified(url, response.headers)
+
+            body = await response.read()
+            metrics.increment('http_bytes_read', len(body), UNIT_BYTES)
+            if cache is not None:
+                cache.store(url, body, response.headers)
+            return body
+
+    return await _with_retries(url, _fetch, None, retry_policy)
 
 
 async def stream_html(
@@ -35,26 +203,75 @@ async def stream_html(
     process_chunk: Callable[[bytes], Awaitable[bool]],
     headers: dict = None,
     timeout: int = 10,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_response: Optional[Callable[[aiohttp.ClientResponse], bool]] = None,
+    retry_policy: Optional[RetryPolicy] = None,
 ) -> bool:
-    for attempt in range(RETRY_COUNT + 1):
-        try:
-            async with session.get(
-                url,
-                headers=headers or {},
-                timeout=aiohttp.ClientTimeout(total=timeout),
-            ) as response:
-                response.raise_for_status()
-                async for chunk in response.content.iter_chunked(2048):
-                    if await process_chunk(chunk):
-                        break
+    async def _stream() -> bool:
+        async with session.get(
+            url,
+            headers=headers or {},
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as response:
+            response.raise_for_status()
+            # lets the caller skip the body eg. when the server answers 304
+            if on_response is not None and not on_response(response):
                 return True
+            async for chunk in response.content.iter_chunked(chunk_size):
+                if await process_chunk(chunk):
+                    # drop the connection rather than reading the rest of the page
+                    response.close()
+                    break
+            return True
+
+    return await _with_retries(url, _stream, False, retry_policy)
+
+
+async def _with_retries(
+    url: str,
+    request: Callable[[], Awaitable[T]],
+    failed: T,
+    retry_policy: Optional[RetryPolicy],
+) -> T:
+    # without a shared policy each request only gets its own retries, no budget or breaker
+    retry_policy = retry_policy or RetryPolicy()
+    attempt = 0
+    while True:
+        if not retry_policy.allow(url):
+            logger.warning(f'circuit open, not fetching {url}')
+            metrics.increment('http_short_circuits')
+            return failed
+
+        try:
+            with metrics.timer('http_request_latency'):
+                result = await request()
+            retry_policy.record_success(url)
+            return result
         except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-            if attempt < RETRY_COUNT:
-                logger.warning(f'[attempt {attempt}] failed to fetch at {url}: {e}')
-                await asyncio.sleep(DELAY_DURATION)
-            else:
+            retry_after = None
+            if isinstance(e, aiohttp.ClientResponseError):
+                if not is_retryable_status(e.status):
+                    # the host answered, the page is just not there
+                    retry_policy.record_success(url)
+                    logger.error(f'non retryable response at {url}: {e}')
+                    metrics.increment('http_failures')
+                    return failed
+                if e.headers is not None:
+                    retry_after = parse_retry_after(e.headers.get('Retry-After'))
+
+            retry_policy.record_failure(url)
+            delay = retry_policy.next_delay(attempt, retry_after)
+            if delay is None:
                 logger.error(f'all attempts failed at {url}: {e}')
-                return False
+                metrics.increment('http_failures')
+                return failed
+
+            logger.warning(
+                f'[attempt {attempt}] failed to fetch at {url}, retrying in {delay:.2f}s: {e}'
+            )
+            metrics.increment('http_retries')
+            await asyncio.sleep(delay)
+            attempt += 1
 
 
 async def fetch_html_section(
@@ -62,39 +279,146 @@ async def fetch_html_section(
     url: str,
     html_section_start: str,
     html_section_end: str,
-):
-    html_buffer = []
-    html_extractor = _build_html_section_extractor(
-        html_section_start, html_section_end, html_buffer
+    cache: Optional[HttpCache] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    retry_policy: Optional[RetryPolicy] = None,
+) -> Optional[str]:
+    section = await fetch_html_section_bytes(
+        session,
+        url,
+        html_section_start,
+        html_section_end,
+        cache,
+        chunk_size,
+        retry_policy,
+    )
+    return decode_html(section) if section is not None else None
+
+
+async def fetch_html_section_bytes(
+    session: aiohttp.ClientSession,
+    url: str,
+    html_section_start: str,
+    html_section_end: str,
+    cache: Optional[HttpCache] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    retry_policy: Optional[RetryPolicy] = None,
+) -> Optional[bytes]:
+    # none when the page could not be fetched, as opposed to a fetched page without the
+    # section. the extracted section is cached rather than the page so a 304 skips
+    # extraction too
+    cache_key = f'{url}#{html_section_start}'
+    if cache is not None:
+        cached_section = cache.fresh_body(cache_key)
+        if cached_section is not None:
+            metrics.increment('http_cache_hits', kind='fresh')
+            return cached_section
+
+    html_extractor = HtmlSectionExtractor(
+        html_section_start.encode(), html_section_end.encode()
     )
-    await stream_html(session, url, process_chunk=html_extractor)
+    response_headers = {}
+    not_modified = False
 
-    return b''.join(html_buffer).decode('utf-8', errors='ignore')
+    def _on_response(response: aiohttp.ClientResponse) -> bool:
+        nonlocal response_headers, not_modified
+        # a retry must not append to whatever a failed attempt left behind
+        html_extractor.reset()
+        response_headers = response.headers
+        not_modified = response.status == 304
+        return not not_modified
 
+    fetched = await stream_html(
+        session,
+        url,
+        process_chunk=html_extractor,
+        headers=cache.request_headers(cache_key) if cache is not None else None,
+        chunk_size=chunk_size,
+        on_response=_on_response,
+        retry_policy=retry_policy,
+    )
+    if not fetched:
+        return None
 
-def _build_html_section_extractor(
-    start_marker: str, end_marker: str, buffer: list[bytes]
-) -> Callable[[bytes], bool]:
-    inside_target = False
+    if not not_modified:
+        # how much of each page the extractor had to stream to find its section
+        metrics.increment('section_bytes_read', html_extractor.bytes_read, UNIT_BYTES)
+        metrics.increment('section_bytes_kept', len(html_extractor.section), UNIT_BYTES)
 
-    async def _extract_html_section(chunk: bytes) -> bool:
-        nonlocal inside_target
+    if cache is not None:
+        if not_modified:
+            metrics.increment('http_cache_hits', kind='revalidated')
+            return cache.not_modified(cache_key, response_headers)
+        if html_extractor.section:
+            cache.store(cache_key, bytes(html_extractor.section), response_headers)
 
-        text = chunk.decode('utf-8', errors='ignore')
+    return bytes(html_extractor.section)
 
-        if not inside_target:
-            start_idx = text.find(start_marker)
-            if start_idx != -1:
-                inside_target = True
-                buffer.append(text[start_idx:].encode())
+
+def decode_html(body: bytes) -> str:
+    return body.decode('utf-8', errors='ignore')
+
+
+class HtmlSectionExtractor:
+    # works on raw bytes so markers are never split by a decode, and keeps the last
+    # len(marker) - 1 bytes of each chunk so a marker straddling two chunks is still found
+    def __init__(self, start_marker: bytes, end_marker: bytes):
+        if not start_marker or not end_marker:
+            raise ValueError('section markers must not be empty')
+        self.start_marker = start_marker
+        self.end_marker = end_marker
+        self.section = bytearray()
+        self.reset()
+
+    def reset(self):
+        self.section.clear()
+        self.bytes_read = 0
+        self._inside_section = False
+        self._carry = b''
+
+    async def __call__(self, chunk: bytes) -> bool:
+        return self.feed(chunk)
+
+    def feed(self, chunk: bytes) -> bool:
+        self.bytes_read += len(chunk)
+        if self._inside_section:
+            # only the tail of the previous data can hold the start of a split end marker,
+            # but never the start marker itself in case the two markers overlap
+            scan_from = max(
+                len(self.section) - len(self.end_marker) + 1, len(self.start_marker)
+            )
+            self.section += chunk
+        elif self._seek_start(chunk):
+            scan_from = len(self.start_marker)
+        else:
+            return False
+
+        end_idx = self.section.find(self.end_marker, scan_from)
+        if end_idx == -1:
             return False
 
-        end_idx = text.find(end_marker)
-        if end_idx != -1:
-            buffer.append(text[:end_idx].encode())
+        del self.section[end_idx:]
+        return True
+
+    def _seek_start(self, chunk: bytes) -> bool:
+        overlap = len(self.start_marker) - 1
+        if self._carry:
+            # a match here must begin inside the carry since the chunk slice is too short
+            boundary = self._carry + chunk[:overlap]
+            start_idx = boundary.find(self.start_marker)
+            if start_idx != -1:
+                self.section += memoryview(self._carry)[start_idx:]
+                self.section += chunk
+                self._inside_section = True
+                return True
+
+        start_idx = chunk.find(self.start_marker)
+        if start_idx != -1:
+            self.section += memoryview(chunk)[start_idx:]
+            self._inside_section = True
             return True
 
-        buffer.append(chunk)
+        if overlap:
+            tail = self._carry + chunk if len(chunk) < overlap else chunk
+            self._carry = bytes(tail[-overlap:])
         return False
-
-    return _extract_html_section
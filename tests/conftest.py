@@ -0,0 +1,187 @@
+import operator
+import threading
+from types import SimpleNamespace
+from typing import Iterable, Optional
+
+from boto3.dynamodb.types import Binary
+from botocore.exceptions import ClientError
+import pytest
+
+# comparisons the repositories use in key conditions, filters and put conditions
+COMPARISONS = {
+    '=': operator.eq,
+    '<>': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'BETWEEN': lambda value, low, high: low <= value <= high,
+    'begins_with': lambda value, prefix: value.startswith(prefix),
+    'IN': lambda value, options: value in options,
+}
+
+
+class FakeClient:
+    # the part of the dynamodb client bulk_write uses, requests are applied to the table
+    def __init__(self, table: 'FakeTable', unprocessed_rounds: int = 0):
+        self.table = table
+        self.unprocessed_rounds = unprocessed_rounds
+        self.calls = []
+        self.threads = set()
+        self._lock = threading.Lock()
+
+    def batch_write_item(self, RequestItems, **kwargs):
+        requests = RequestItems[self.table.name]
+        with self._lock:
+            self.calls.append(len(requests))
+            self.threads.add(threading.get_ident())
+            # every round leaves the last request of each batch unprocessed
+            unprocessed = []
+            if self.unprocessed_rounds:
+                self.unprocessed_rounds -= 1
+                requests, unprocessed = requests[:-1], requests[-1:]
+            for request in requests:
+                self.table.apply(request)
+
+        response = {
+            'ConsumedCapacity': [
+                {'TableName': self.table.name, 'CapacityUnits': float(len(requests))}
+            ]
+        }
+        if unprocessed:
+            response['UnprocessedItems'] = {self.table.name: unprocessed}
+        return response
+
+
+class FakeTable:
+    # in memory stand in for a boto3 table resource. key conditions, filters and put
+    # conditions are evaluated against every item, index queries included
+    def __init__(
+        self,
+        name: str = 'movies',
+        key_fields: tuple[str, ...] = ('region_code', 'id'),
+        items: Iterable[dict] = (),
+        unprocessed_rounds: int = 0,
+    ):
+        self.name = name
+        self.key_fields = key_fields
+        self.items: dict[tuple, dict] = {}
+        # batch requests in the order they were applied, and their puts and deletes
+        self.requests = []
+        self.puts = []
+        self.deletes = []
+        self.queries = []
+        self.meta = SimpleNamespace(client=FakeClient(self, unprocessed_rounds))
+        for item in items:
+            self.items[self._key(item)] = item
+
+    def apply(self, request: dict):
+        self.requests.append(request)
+        if 'PutRequest' in request:
+            item = request['PutRequest']['Item']
+            self.puts.append(item)
+            self.items[self._key(item)] = item
+        else:
+            key = request['DeleteRequest']['Key']
+            self.deletes.append(key)
+            self.items.pop(self._key(key), None)
+
+    def put_item(self, Item, ConditionExpression=None, ReturnValues=None, **kwargs):
+        key = self._key(Item)
+        previous = self.items.get(key)
+        if ConditionExpression is not None and not matches(
+            ConditionExpression, previous or {}
+        ):
+            raise ClientError(
+                {'Error': {'Code': 'ConditionalCheckFailedException'}}, 'PutItem'
+            )
+
+        self.items[key] = Item
+        if ReturnValues == 'ALL_OLD' and previous is not None:
+            return {'Attributes': _as_read(previous)}
+        return {}
+
+    def delete_item(self, Key, ConditionExpression=None, **kwargs):
+        key = self._key(Key)
+        if ConditionExpression is not None and not matches(
+            ConditionExpression, self.items.get(key, {})
+        ):
+            raise ClientError(
+                {'Error': {'Code': 'ConditionalCheckFailedException'}}, 'DeleteItem'
+            )
+
+        self.items.pop(key, None)
+        return {}
+
+    def get_item(self, Key, **kwargs):
+        item = self.items.get(self._key(Key))
+        return {'Item': _as_read(item)} if item is not None else {}
+
+    def query(self, KeyConditionExpression, FilterExpression=None, **kwargs):
+        self.queries.append(
+            {'KeyConditionExpression': KeyConditionExpression, **kwargs}
+        )
+        items = [
+            item
+            for item in self.items.values()
+            if matches(KeyConditionExpression, item)
+            and (FilterExpression is None or matches(FilterExpression, item))
+        ]
+        sort_field = _sort_field(KeyConditionExpression)
+        if sort_field is not None:
+            items.sort(key=lambda item: item[sort_field])
+        if kwargs.get('ScanIndexForward') is False:
+            items.reverse()
+        projection = _projection(kwargs)
+        return {'Items': [_as_read(item, projection) for item in items]}
+
+    def _key(self, item: dict) -> tuple:
+        return tuple(item[field] for field in self.key_fields)
+
+
+def matches(condition, item: dict) -> bool:
+    expression = condition.get_expression()
+    operator_name, values = expression['operator'], expression['values']
+    if operator_name == 'AND':
+        return all(matches(value, item) for value in values)
+    if operator_name == 'OR':
+        return any(matches(value, item) for value in values)
+    if operator_name == 'NOT':
+        return not matches(values[0], item)
+
+    name = values[0].name
+    if operator_name == 'attribute_not_exists':
+        return name not in item
+    if operator_name == 'attribute_exists':
+        return name in item
+    return name in item and COMPARISONS[operator_name](item[name], *values[1:])
+
+
+def _sort_field(key_condition) -> Optional[str]:
+    # a key condition on the sort key is the second half of an AND
+    expression = key_condition.get_expression()
+    if expression['operator'] != 'AND':
+        return None
+    return expression['values'][1].get_expression()['values'][0].name
+
+
+def _projection(query_kwargs: dict) -> Optional[set[str]]:
+    projection = query_kwargs.get('ProjectionExpression')
+    if projection is None:
+        return None
+    names = query_kwargs.get('ExpressionAttributeNames', {})
+    return {names.get(name.strip(), name.strip()) for name in projection.split(',')}
+
+
+def _as_read(item: dict, projection: Optional[set[str]] = None) -> dict:
+    # boto3 resources hand binary attributes back wrapped in Binary
+    return {
+        name: Binary(value) if isinstance(value, (bytes, bytearray)) else value
+        for name, value in item.items()
+        if projection is None or name in projection
+    }
+
+
+@pytest.fixture
+def fake_table():
+    return FakeTable
@@ -0,0 +1,80 @@
+import pytest
+from repositories.bulk_writer import (
+    UnprocessedItemsError,
+    bulk_write,
+    delete_request,
+    put_request,
+)
+
+
+def _items(count: int) -> list[dict]:
+    return [{'region_code': 'auckland', 'id': str(i)} for i in range(count)]
+
+
+def test_bulk_write_shards_into_batches_of_25(fake_table):
+    table = fake_table()
+
+    result = bulk_write(table, map(put_request, _items(60)), max_workers=3)
+
+    assert sorted(table.meta.client.calls) == [10, 25, 25]
+    assert result.requests == 60
+    assert [batch.requests for batch in result.batches] == [25, 25, 10]
+    assert result.capacity_units == 60
+    assert result.attempts == 3
+    assert len(table.requests) == 60
+
+
+def test_bulk_write_retries_unprocessed_items(fake_table):
+    table = fake_table(unprocessed_rounds=2)
+    delays = []
+
+    result = bulk_write(
+        table, map(delete_request, _items(10)), max_workers=1, sleep=delays.append
+    )
+
+    assert table.meta.client.calls == [10, 1, 1]
+    assert result.batches[0].attempts == 3
+    # jittered exponential backoff, 25-50ms then 50-100ms
+    assert 0.025 <= delays[0] <= 0.05 and 0.05 <= delays[1] <= 0.1
+    assert sorted(
+        request['DeleteRequest']['Key']['id'] for request in table.requests
+    ) == sorted(str(i) for i in range(10))
+
+
+def test_bulk_write_gives_up_after_max_attempts(fake_table):
+    table = fake_table(unprocessed_rounds=10)
+
+    with pytest.raises(UnprocessedItemsError):
+        bulk_write(
+            table,
+            map(put_request, _items(5)),
+            max_attempts=3,
+            sleep=lambda delay: None,
+        )
+    assert table.meta.client.calls == [5, 1, 1]
+
+
+def test_bulk_write_dedupes_keys(fake_table):
+    table = fake_table(key_fields=('host', 'slug'))
+    items = [
+        {'host': 'a', 'slug': 'x', 'value': 1},
+        {'host': 'a', 'slug': 'x', 'value': 2},
+        {'host': 'a', 'slug': 'y', 'value': 3},
+    ]
+
+    result = bulk_write(table, map(put_request, items), key_fields=('host', 'slug'))
+
+    assert result.requests == 2
+    assert [request['PutRequest']['Item']['value'] for request in table.requests] == [
+        2,
+        3,
+    ]
+
+
+def test_bulk_write_nothing_to_write(fake_table):
+    table = fake_table()
+
+    result = bulk_write(table, [])
+
+    assert result.requests == 0
+    assert table.meta.client.calls == []
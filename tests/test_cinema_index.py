@@ -0,0 +1,70 @@
+from cinema_index import CinemaIndex, CinemaMatch, normalise_cinema_name
+
+CINEMAS = {
+    'Rialto Cinemas': 'https://www.rialto.co.nz',
+    'Hoyts (Sylvia Park)': None,
+    'Hoyts (Botany)': None,
+    'Event Cinemas Albany': None,
+    'The Vic': 'https://www.thevic.co.nz',
+}
+
+
+def test_normalise_cinema_name():
+    assert normalise_cinema_name(' Rialto  CINEMAS ') == 'rialtocinemas'
+    assert normalise_cinema_name('Hoyts (Sylvia Park)') == 'hoyts'
+    assert normalise_cinema_name('Event Cinemas - Albany') == 'eventcinemasalbany'
+
+
+def test_resolve_normalised_names():
+    index = CinemaIndex(CINEMAS)
+
+    assert index.resolve('RIALTO cinemas') == CinemaMatch(
+        'Rialto Cinemas', 'https://www.rialto.co.nz'
+    )
+    assert index.resolve('Event Cinemas - Albany').name == 'Event Cinemas Albany'
+    assert index.resolve('hoyts sylvia park').name == 'Hoyts (Sylvia Park)'
+
+
+def test_resolve_aliases():
+    index = CinemaIndex(CINEMAS, aliases={'Devonport Vic': 'The Vic'})
+
+    assert index.resolve('Rialto').name == 'Rialto Cinemas'
+    assert index.resolve('Rialto Cinemas (Newmarket)').name == 'Rialto Cinemas'
+    assert index.resolve('Vic Cinema').name == 'The Vic'
+    assert index.resolve('Devonport Vic').name == 'The Vic'
+    # both hoyts reduce to the same name so it is not an alias of either
+    assert index.resolve('Hoyts') is None
+    assert index.alias_hits == 4
+
+
+def test_resolve_keeps_venue_branches_apart():
+    index = CinemaIndex({'Hoyts (Sylvia Park)': None, 'Rialto Cinemas': None})
+
+    assert index.resolve('Hoyts (Botany)') is None
+    assert index.resolve('Hoyts (Sylvia Park)').name == 'Hoyts (Sylvia Park)'
+    assert index.resolve('Hoyts').name == 'Hoyts (Sylvia Park)'
+    assert index.resolve('Rialto Cinemas (Newmarket)').name == 'Rialto Cinemas'
+
+
+def test_resolve_fuzzy():
+    index = CinemaIndex(CINEMAS)
+
+    assert index.resolve('Evnet Cinemas Albany').name == 'Event Cinemas Albany'
+    assert index.resolve('Rialto Cinemas Newmarket') is None
+    assert index.fuzzy_hits == 1
+
+
+def test_resolve_is_memoised():
+    index = CinemaIndex(CINEMAS)
+
+    for _ in range(3):
+        assert index.resolve('Evnet Cinemas Albany').name == 'Event Cinemas Albany'
+        assert index.resolve('Lido') is None
+
+    assert index.stats() == {
+        'hits': 2,
+        'alias_hits': 0,
+        'fuzzy_hits': 1,
+        'misses': 3,
+        'names': 2,
+    }
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+from crawl_scheduler import CrawlScheduler
+
+
+def test_slot_respects_global_limit():
+    scheduler = CrawlScheduler(max_concurrency=2, max_per_host=2)
+    active = 0
+    peak = 0
+
+    async def _request(i: int):
+        nonlocal active, peak
+        async with scheduler.slot(f'https://host-{i}.com/page', priority=0):
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    async def _run():
+        await asyncio.gather(*(_request(i) for i in range(6)))
+
+    asyncio.run(_run())
+
+    assert peak == 2
+    assert scheduler.stats.request_count == 6
+
+
+def test_slot_respects_per_host_limit():
+    scheduler = CrawlScheduler(max_concurrency=4, max_per_host=1)
+    active_by_host = {}
+    peak_by_host = {}
+
+    async def _request(host: str):
+        async with scheduler.slot(f'https://{host}/page', priority=0):
+            active_by_host[host] = active_by_host.get(host, 0) + 1
+            peak_by_host[host] = max(peak_by_host.get(host, 0), active_by_host[host])
+            await asyncio.sleep(0.01)
+            active_by_host[host] -= 1
+
+    async def _run():
+        await asyncio.gather(*(_request(host) for host in ['a.com', 'b.com'] * 3))
+
+    asyncio.run(_run())
+
+    assert peak_by_host == {'a.com': 1, 'b.com': 1}
+
+
+def test_slot_serves_lower_priority_value_first():
+    scheduler = CrawlScheduler(max_concurrency=1, max_per_host=1)
+    order = []
+
+    async def _request(name: str, priority: int):
+        async with scheduler.slot('https://host.com/page', priority):
+            order.append(name)
+
+    async def _run():
+        async with scheduler.slot('https://host.com/page', priority=0):
+            tasks = [
+                asyncio.create_task(_request('details', 2)),
+                asyncio.create_task(_request('venues', 1)),
+                asyncio.create_task(_request('now-showing', 0)),
+            ]
+            await asyncio.sleep(0)
+            assert scheduler.queue_depth == 3
+        await asyncio.gather(*tasks)
+
+    asyncio.run(_run())
+
+    assert order == ['now-showing', 'venues', 'details']
+
+
+def test_slot_released_when_waiter_cancelled():
+    scheduler = CrawlScheduler(max_concurrency=1, max_per_host=1)
+
+    async def _run():
+        async with scheduler.slot('https://host.com/page', priority=0):
+            waiter = asyncio.create_task(_hold(scheduler))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+
+        async with scheduler.slot('https://host.com/page', priority=0):
+            pass
+
+    asyncio.run(asyncio.wait_for(_run(), timeout=1))
+
+
+async def _hold(scheduler: CrawlScheduler):
+    async with scheduler.slot('https://host.com/page', priority=0):
+        pass
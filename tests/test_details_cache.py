@@ -0,0 +1,66 @@
+from decimal import Decimal
+import time
+
+from details_cache import MovieDetailsCache, to_details
+
+HOST = 'https://example.com'
+
+
+def test_get_returns_loaded_item():
+    item = {
+        'host': HOST,
+        'slug': 'the-matrix',
+        'release_year': Decimal('1999'),
+        'image_url': 'https://example.com/matrix.jpg',
+        'expires_at': Decimal(int(time.time()) + 60),
+    }
+    cache = MovieDetailsCache([item])
+
+    cached = cache.get(HOST, 'the-matrix')
+
+    assert to_details(cached) == {
+        'release_year': 1999,
+        'image_url': 'https://example.com/matrix.jpg',
+    }
+    assert cache.stats()['hits'] == 1
+    assert cache.pending() == []
+
+
+def test_get_misses_expired_item():
+    item = {
+        'host': HOST,
+        'slug': 'the-matrix',
+        'release_year': 1999,
+        'image_url': 'https://example.com/matrix.jpg',
+        'expires_at': int(time.time()) - 1,
+    }
+    cache = MovieDetailsCache([item])
+
+    assert cache.get(HOST, 'the-matrix') is None
+    assert cache.get('https://other.com', 'the-matrix') is None
+    assert cache.stats()['misses'] == 2
+
+
+def test_put_failure_is_negative_entry():
+    cache = MovieDetailsCache(negative_ttl=60)
+    cache.put_failure(HOST, 'broken-page')
+
+    cached = cache.get(HOST, 'broken-page')
+
+    assert cached['failed'] is True
+    assert cache.stats()['negative_hits'] == 1
+
+
+def test_put_tracks_pending_items():
+    cache = MovieDetailsCache(ttl=60)
+    cache.put(HOST, 'the-matrix', {'release_year': 1999, 'image_url': 'a'})
+    cache.put(HOST, 'the-matrix', {'release_year': 1999, 'image_url': 'b'})
+
+    pending = cache.pending()
+    assert len(pending) == 1
+    assert pending[0]['image_url'] == 'b'
+    assert pending[0]['expires_at'] > time.time()
+
+    cache.clear_pending()
+    assert cache.pending() == []
+    assert cache.get(HOST, 'the-matrix')['image_url'] == 'b'
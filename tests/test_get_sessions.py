@@ -0,0 +1,407 @@
+import base64
+from decimal import Decimal
+import gzip
+import json
+
+import pytest
+from get_sessions import handler
+from get_sessions.handler import (
+    SessionsQuery,
+    _get_sessions,
+    _parse_date_range,
+    _parse_lookup,
+    _parse_query,
+    _shape_response,
+    _trim_snapshot,
+)
+from get_sessions.response_cache import ResponseCache
+from models.cinema import CinemaSummary
+from models.movie import Movie
+from models.movie_view import MovieView
+from repositories.movie_repository import _to_item, write_movie_generation
+from repositories import region_repository
+from repositories.region_repository import (
+    CINEMA_INDEX,
+    DATE_INDEX,
+    flip_region_generation,
+    get_region_index,
+    get_region_snapshot,
+    put_region_indexes,
+    put_region_snapshot,
+)
+from repositories.showtimes_codec import SHOWTIMES_LIST
+
+
+@pytest.fixture
+def regions_table(fake_table):
+    return fake_table('regions', ('region_code', 'kind'))
+
+
+def _movie(
+    title: str, showtimes: list[str], cinemas: tuple[str, ...] = ('Rialto',)
+) -> Movie:
+    return Movie(
+        id=title,
+        title=title,
+        release_year=1982,
+        image_url='https://img-store.com/cannery-row.jpg',
+        region='Auckland',
+        region_code='auckland',
+        cinemas=[CinemaSummary(name=name, homepage_url=None) for name in cinemas],
+        showtimes=showtimes,
+        last_showtime=showtimes[-1],
+    )
+
+
+def test_region_snapshot_round_trip(regions_table):
+    table = regions_table
+    movies = [
+        _movie('Mr. Baseball', ['2025-06-01', '2025-06-08']),
+        _movie('Cannery Row', ['2025-05-30', '2025-06-02']),
+    ]
+
+    put_region_snapshot(table, 'auckland', movies, 'v1', 1)
+    snapshot = get_region_snapshot(table, 'auckland')
+
+    assert snapshot['version'] == 'v1'
+    assert [session['title'] for session in snapshot['sessions']] == [
+        'Cannery Row',
+        'Mr. Baseball',
+    ]
+    assert snapshot['sessions'][0] == {
+        'title': 'Cannery Row',
+        'releaseYear': 1982,
+        'imageUrl': 'https://img-store.com/cannery-row.jpg',
+        'regionCode': 'auckland',
+        'cinemas': [{'name': 'Rialto', 'homepageUrl': None}],
+        'showtimes': ['2025-05-30', '2025-06-02'],
+        'lastShowtime': '2025-06-02',
+    }
+
+
+def test_region_snapshot_missing(regions_table):
+    assert get_region_snapshot(regions_table, 'auckland') is None
+
+
+def test_trim_snapshot_drops_past_showtimes():
+    sessions = [
+        {
+            'title': 'a',
+            'showtimes': ['2025-05-30', '2025-05-31'],
+            'lastShowtime': '2025-05-31',
+        },
+        {
+            'title': 'b',
+            'showtimes': ['2025-05-31', '2025-06-01', '2025-06-03'],
+            'lastShowtime': '2025-06-03',
+        },
+        {'title': 'c', 'showtimes': ['2025-06-02'], 'lastShowtime': '2025-06-02'},
+    ]
+
+    trimmed = _trim_snapshot(sessions, '2025-06-01')
+
+    assert trimmed == [
+        {
+            'title': 'b',
+            'showtimes': ['2025-06-01', '2025-06-03'],
+            'lastShowtime': '2025-06-03',
+        },
+        {'title': 'c', 'showtimes': ['2025-06-02'], 'lastShowtime': '2025-06-02'},
+    ]
+    assert sessions[1]['showtimes'] == ['2025-05-31', '2025-06-01', '2025-06-03']
+
+
+def test_movie_view_matches_pydantic_encoding():
+    movie = _movie('Cannery Row', ['2025-05-30', '2025-06-02'])
+    # items come back from dynamodb with Decimal numbers
+    item = {**_to_item(movie, SHOWTIMES_LIST), 'release_year': Decimal(1982)}
+
+    view = MovieView.from_item(item)
+
+    assert view.to_json() == movie.model_dump(
+        mode='json', exclude={'id', 'region'}, by_alias=True
+    )
+
+
+def test_trim_snapshot_to_date_range():
+    sessions = [
+        {'title': 'a', 'showtimes': ['2025-05-30'], 'lastShowtime': '2025-05-30'},
+        {
+            'title': 'b',
+            'showtimes': ['2025-06-01', '2025-06-06', '2025-06-09'],
+            'lastShowtime': '2025-06-09',
+        },
+        {'title': 'c', 'showtimes': ['2025-06-10'], 'lastShowtime': '2025-06-10'},
+    ]
+
+    trimmed = _trim_snapshot(sessions, '2025-06-06', '2025-06-08')
+
+    assert trimmed == [
+        {'title': 'b', 'showtimes': ['2025-06-06'], 'lastShowtime': '2025-06-09'}
+    ]
+
+
+def test_parse_date_range():
+    assert _parse_date_range(None) == (None, None)
+    assert _parse_date_range({'from': '2025-06-06', 'to': '2025-06-08'}) == (
+        '2025-06-06',
+        '2025-06-08',
+    )
+    assert _parse_date_range({'to': '2025-06-08'}) == (None, '2025-06-08')
+
+    with pytest.raises(ValueError):
+        _parse_date_range({'from': 'saturday'})
+    with pytest.raises(ValueError):
+        _parse_date_range({'from': '2025-06-08', 'to': '2025-06-06'})
+
+
+def test_get_sessions_rejects_invalid_date_range():
+    response = _get_sessions(
+        {
+            'pathParameters': {'region_code': 'auckland'},
+            'queryStringParameters': {'from': 'next week'},
+        }
+    )
+
+    assert response['statusCode'] == 400
+
+
+def test_region_indexes_by_cinema_and_date(regions_table):
+    table = regions_table
+    movies = [
+        _movie('Mr. Baseball', ['2025-06-01', '2025-06-08'], ('Rialto', 'Academy')),
+        _movie('Cannery Row', ['2025-06-01', '2025-06-02'], ('Academy Cinemas',)),
+    ]
+
+    counts = put_region_indexes(table, 'auckland', movies, 'v1')
+
+    assert counts['inserted'] == 6
+    academy = get_region_index(table, 'auckland', CINEMA_INDEX, 'academy')
+    assert academy['version'] == 'v1'
+    assert [session['title'] for session in academy['sessions']] == ['Mr. Baseball']
+    assert [
+        session['title']
+        for session in get_region_index(
+            table, 'auckland', CINEMA_INDEX, 'academy-cinemas'
+        )['sessions']
+    ] == ['Cannery Row']
+    on_date = get_region_index(table, 'auckland', DATE_INDEX, '2025-06-01')
+    assert [
+        (session['title'], session['showtimes']) for session in on_date['sessions']
+    ] == [
+        ('Cannery Row', ['2025-06-01']),
+        ('Mr. Baseball', ['2025-06-01']),
+    ]
+    assert get_region_index(table, 'auckland', DATE_INDEX, '2025-06-03') is None
+
+
+def test_region_indexes_skip_unchanged_and_delete_stale(regions_table):
+    table = regions_table
+    movie = _movie('Mr. Baseball', ['2025-06-01', '2025-06-08'])
+    put_region_indexes(table, 'auckland', [movie], 'v1')
+
+    counts = put_region_indexes(
+        table, 'auckland', [_movie('Mr. Baseball', ['2025-06-08'])], 'v1'
+    )
+
+    # the cinema index changed, the 2025-06-08 index did not and 2025-06-01 is gone
+    assert counts == {'inserted': 0, 'updated': 1, 'deleted': 1, 'unchanged': 1}
+    assert get_region_index(table, 'auckland', DATE_INDEX, '2025-06-01') is None
+
+
+def test_parse_lookup():
+    assert _parse_lookup({'region_code': 'auckland'}) is None
+    assert _parse_lookup({'region_code': 'auckland', 'cinema': 'Academy Cinemas'}) == (
+        CINEMA_INDEX,
+        'academy-cinemas',
+    )
+    assert _parse_lookup({'region_code': 'auckland', 'date': '2025-06-01'}) == (
+        DATE_INDEX,
+        '2025-06-01',
+    )
+
+    with pytest.raises(ValueError):
+        _parse_lookup({'region_code': 'auckland', 'date': 'saturday'})
+    with pytest.raises(ValueError):
+        _parse_lookup({'region_code': 'auckland', 'cinema': '!!'})
+
+
+def test_shape_response_pages_and_projects():
+    sessions = [
+        {'title': title, 'showtimes': ['2025-06-01'], 'cinemas': []}
+        for title in ('a', 'b', 'c')
+    ]
+
+    first = _shape_response(sessions, SessionsQuery(fields=('title',), limit=2))
+    assert first['sessions'] == [{'title': 'a'}, {'title': 'b'}]
+
+    query = _parse_query(
+        {'region_code': 'auckland'},
+        {'fields': 'title', 'limit': '2', 'cursor': first['nextCursor']},
+    )
+    second = _shape_response(sessions, query)
+    assert second == {'sessions': [{'title': 'c'}]}
+
+
+def test_parse_query_rejects_invalid_parameters():
+    for query_parameters in (
+        {'fields': 'title,budget'},
+        {'fields': ','},
+        {'limit': '0'},
+        {'limit': 'ten'},
+        {'cursor': 'abc'},
+        {'limit': '10', 'cursor': 'not a cursor'},
+    ):
+        with pytest.raises(ValueError):
+            _parse_query({'region_code': 'auckland'}, query_parameters)
+
+    assert _parse_query(
+        {'region_code': 'auckland'}, {'fields': 'showtimes, title'}
+    ).fields == ('title', 'showtimes')
+
+
+def test_get_sessions_gzips_when_accepted(monkeypatch, regions_table):
+    table = regions_table
+    movies = [
+        _movie(f'Movie {i}', ['2999-06-01', '2999-06-08'], ('Rialto', 'Academy'))
+        for i in range(20)
+    ]
+    put_region_snapshot(table, 'auckland', movies, 'v1', 1)
+    flip_region_generation(table, 'auckland', 'v1', 1)
+    monkeypatch.setattr(handler, 'regions_table', table)
+    monkeypatch.setattr(handler, 'response_cache', ResponseCache())
+
+    response = _get_sessions(
+        {
+            'pathParameters': {'region_code': 'auckland'},
+            'queryStringParameters': {'fields': 'title,showtimes', 'limit': '15'},
+            'headers': {'accept-encoding': 'gzip'},
+        }
+    )
+
+    assert response['statusCode'] == 200
+    assert response['isBase64Encoded']
+    assert response['headers']['Content-Encoding'] == 'gzip'
+    assert response['headers']['ETag'].endswith('-gzip"')
+    body = json.loads(gzip.decompress(base64.b64decode(response['body'])))
+    assert len(body['sessions']) == 15
+    assert body['sessions'][0] == {
+        'title': 'Movie 0',
+        'showtimes': ['2999-06-01', '2999-06-08'],
+    }
+    assert 'nextCursor' in body
+
+    # a fresh container that only ever answers the conditional request never compresses
+    monkeypatch.setattr(handler, 'response_cache', ResponseCache())
+    monkeypatch.setattr(
+        handler, 'encode_body', lambda body, encoding: pytest.fail('compressed')
+    )
+    not_modified = _get_sessions(
+        {
+            'pathParameters': {'region_code': 'auckland'},
+            'queryStringParameters': {'fields': 'title,showtimes', 'limit': '15'},
+            'headers': {
+                'accept-encoding': 'gzip',
+                'if-none-match': response['headers']['ETag'],
+            },
+        }
+    )
+    assert not_modified['statusCode'] == 304
+    assert not_modified['headers'] == {
+        'ETag': response['headers']['ETag'],
+        'Vary': 'Accept-Encoding',
+    }
+    assert 'body' not in not_modified
+
+
+def test_oversized_region_snapshot_deletes_the_previous_one(monkeypatch, regions_table):
+    movies = [_movie('Cannery Row', ['2025-06-01'])]
+    put_region_snapshot(regions_table, 'auckland', movies, 'v1', 1)
+    monkeypatch.setattr(region_repository, 'MAX_SNAPSHOT_BYTES', 10)
+
+    written = put_region_snapshot(regions_table, 'auckland', movies, 'v2', 2)
+
+    assert not written
+    assert get_region_snapshot(regions_table, 'auckland') is None
+
+
+def test_region_snapshot_never_goes_back_a_generation(regions_table):
+    put_region_snapshot(
+        regions_table, 'auckland', [_movie('Current', ['2025-06-01'])], 'v2', 20
+    )
+
+    written = put_region_snapshot(
+        regions_table, 'auckland', [_movie('Late', ['2025-06-01'])], 'v1', 10
+    )
+
+    assert not written
+    assert get_region_snapshot(regions_table, 'auckland')['version'] == 'v2'
+
+
+def _serve(monkeypatch, regions_table, movies_table, path_parameters):
+    monkeypatch.setattr(handler, 'regions_table', regions_table)
+    monkeypatch.setattr(handler, 'movies_table', movies_table)
+    monkeypatch.setattr(handler, 'response_cache', ResponseCache())
+    response = _get_sessions({'pathParameters': path_parameters})
+    assert response['statusCode'] == 200
+    return json.loads(response['body'])['sessions']
+
+
+def test_get_sessions_ignores_snapshot_and_indexes_of_another_version(
+    monkeypatch, regions_table, fake_table
+):
+    movies_table = fake_table()
+    stale = [_movie('Stale', ['2999-06-01'], ('Rialto',))]
+    current = [
+        _movie('Current', ['2999-06-01', '2999-06-02'], ('Rialto', 'Academy')),
+        _movie('Elsewhere', ['2999-06-02'], ('Academy',)),
+    ]
+    put_region_snapshot(regions_table, 'auckland', stale, 'v1', 1)
+    put_region_indexes(regions_table, 'auckland', stale, 'v1')
+    # the pointer has moved on but the new snapshot and indexes are not written yet
+    write_movie_generation(movies_table, 'auckland', current, 2)
+    flip_region_generation(regions_table, 'auckland', 'v2', 2)
+
+    everything = _serve(
+        monkeypatch, regions_table, movies_table, {'region_code': 'auckland'}
+    )
+    at_rialto = _serve(
+        monkeypatch,
+        regions_table,
+        movies_table,
+        {'region_code': 'auckland', 'cinema': 'Rialto'},
+    )
+    on_date = _serve(
+        monkeypatch,
+        regions_table,
+        movies_table,
+        {'region_code': 'auckland', 'date': '2999-06-01'},
+    )
+
+    assert [session['title'] for session in everything] == ['Current', 'Elsewhere']
+    assert [session['title'] for session in at_rialto] == ['Current']
+    assert [(session['title'], session['showtimes']) for session in on_date] == [
+        ('Current', ['2999-06-01'])
+    ]
+
+
+def test_get_sessions_falls_back_for_oversized_indexes(
+    monkeypatch, regions_table, fake_table
+):
+    movies_table = fake_table()
+    movies = [_movie('Cannery Row', ['2999-06-01'], ('Rialto',))]
+    write_movie_generation(movies_table, 'auckland', movies, 1)
+    flip_region_generation(regions_table, 'auckland', 'v1', 1)
+    monkeypatch.setattr(region_repository, 'MAX_SNAPSHOT_BYTES', 10)
+    put_region_indexes(regions_table, 'auckland', movies, 'v1')
+
+    marker = get_region_index(regions_table, 'auckland', CINEMA_INDEX, 'rialto')
+    at_rialto = _serve(
+        monkeypatch,
+        regions_table,
+        movies_table,
+        {'region_code': 'auckland', 'cinema': 'Rialto'},
+    )
+
+    assert marker == {'sessions': None, 'version': 'v1'}
+    assert [session['title'] for session in at_rialto] == ['Cannery Row']
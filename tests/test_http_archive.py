@@ -0,0 +1,121 @@
+import asyncio
+
+import aiohttp
+from aiohttp import web
+import pytest
+from http_archive import (
+    HttpArchiveReader,
+    HttpArchiveWriter,
+    RecordingSession,
+    ReplaySession,
+    archive_session_from_env,
+)
+from web_utils import fetch_bytes, fetch_html_section
+
+
+def test_archive_round_trip(tmp_path):
+    path = tmp_path / 'capture.okha'
+    with HttpArchiveWriter(path) as writer:
+        writer.add('https://example.com/a', 200, [('ETag', '"v1"')], b'first')
+        writer.add('https://example.com/b', 503, [], b'')
+        writer.add('https://example.com/a', 200, [('ETag', '"v2"')], b'second')
+
+    with HttpArchiveReader(path) as reader:
+        assert len(reader) == 2
+        assert reader.get('https://example.com/a').body == b'second'
+        assert reader.get('https://example.com/a').headers == [('ETag', '"v2"')]
+        assert reader.get('https://example.com/b').status == 503
+        assert reader.get('https://example.com/c') is None
+
+
+def test_reader_rejects_other_files(tmp_path):
+    path = tmp_path / 'not-an-archive'
+    path.write_bytes(b'<html></html>')
+
+    with pytest.raises(ValueError):
+        HttpArchiveReader(path)
+
+
+def test_record_then_replay_without_network(tmp_path):
+    # long enough after the section that the scraper stops reading before the end
+    page = '<html>' + 'x' * 2000 + '<main>movie</main>' + 'y' * 200_000 + '</html>'
+
+    async def _page(request: web.Request) -> web.Response:
+        return web.Response(text=page, content_type='text/html')
+
+    async def _record() -> tuple[str, bytes, str]:
+        app = web.Application()
+        app.router.add_get('/page', _page)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        host = f'http://127.0.0.1:{runner.addresses[0][1]}'
+        try:
+            with HttpArchiveWriter(tmp_path / 'capture.okha') as writer:
+                async with aiohttp.ClientSession() as session:
+                    recording = RecordingSession(session, writer)
+                    body = await fetch_bytes(recording, f'{host}/page')
+                    section = await fetch_html_section(
+                        recording, f'{host}/page?section', '<main>', '</main>'
+                    )
+        finally:
+            await runner.cleanup()
+        return host, body, section
+
+    async def _replay(host: str) -> tuple:
+        with HttpArchiveReader(tmp_path / 'capture.okha') as reader:
+            replay = ReplaySession(reader)
+            body = await fetch_bytes(replay, f'{host}/page')
+            section = await fetch_html_section(
+                replay, f'{host}/page?section', '<main>', '</main>', chunk_size=64
+            )
+            # the section fetch was recorded in full, so other markers replay too
+            tail = await fetch_html_section(
+                replay, f'{host}/page?section', '</main>', '</html>'
+            )
+            missing = await fetch_bytes(replay, f'{host}/other')
+        return body, section, tail, missing, replay.misses
+
+    host, recorded_body, recorded_section = asyncio.run(_record())
+    body, section, tail, missing, misses = asyncio.run(_replay(host))
+
+    assert recorded_body == body == page.encode()
+    assert recorded_section == section == '<main>movie'
+    assert tail == '</main>' + 'y' * 200_000
+    assert missing is None
+    assert misses == [f'{host}/other']
+
+
+def test_archive_without_index_is_scanned(tmp_path):
+    path = tmp_path / 'capture.okha'
+    writer = HttpArchiveWriter(path)
+    writer.add('https://example.com/a', 200, [], b'first')
+    writer.add('https://example.com/b', 200, [], b'second')
+    # a crash before close leaves no index, here also a half written last entry
+    crashed = tmp_path / 'crashed.okha'
+    crashed.write_bytes(path.read_bytes() + b'\x00\x00\x00\x10')
+    writer.close()
+
+    with HttpArchiveReader(crashed) as reader:
+        assert reader.urls() == ['https://example.com/a', 'https://example.com/b']
+        assert reader.get('https://example.com/b').body == b'second'
+
+
+def test_archive_session_from_env(tmp_path, monkeypatch):
+    session = object()
+    path = tmp_path / 'capture.okha'
+    monkeypatch.delenv('HTTP_ARCHIVE_REPLAY', raising=False)
+    monkeypatch.delenv('HTTP_ARCHIVE_RECORD', raising=False)
+    with archive_session_from_env(session) as http_session:
+        assert http_session is session
+
+    monkeypatch.setenv('HTTP_ARCHIVE_RECORD', str(path))
+    with archive_session_from_env(session) as http_session:
+        assert isinstance(http_session, RecordingSession)
+        http_session.writer.add('https://example.com/a', 200, [], b'first')
+
+    monkeypatch.setenv('HTTP_ARCHIVE_REPLAY', str(path))
+    with archive_session_from_env(session) as http_session:
+        assert isinstance(http_session, ReplaySession)
+        assert http_session.reader.urls() == ['https://example.com/a']
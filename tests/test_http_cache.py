@@ -0,0 +1,126 @@
+import asyncio
+
+import aiohttp
+from aiohttp import web
+from http_cache import HttpCache
+from web_utils import fetch_html, fetch_html_section
+
+
+def test_store_and_revalidate(tmp_path):
+    cache = HttpCache(tmp_path)
+    cache.store('https://host.com/a', b'<main>a</main>', {'ETag': '"v1"'})
+
+    headers = cache.request_headers('https://host.com/a')
+    body = cache.not_modified('https://host.com/a', {})
+
+    assert headers == {'If-None-Match': '"v1"'}
+    assert body == b'<main>a</main>'
+    assert cache.stats()['misses'] == 1
+    assert cache.stats()['revalidations'] == 1
+
+
+def test_store_without_validators_is_skipped(tmp_path):
+    cache = HttpCache(tmp_path)
+    cache.store('https://host.com/a', b'<main>a</main>', {})
+
+    assert cache.request_headers('https://host.com/a') == {}
+    assert cache.stats()['entries'] == 0
+
+
+def test_identical_bodies_share_blob(tmp_path):
+    cache = HttpCache(tmp_path)
+    cache.store('https://host.com/a', b'same', {'ETag': '"a"'})
+    cache.store('https://host.com/b', b'same', {'ETag': '"b"'})
+
+    assert len(list((tmp_path / 'blobs').iterdir())) == 1
+    assert cache.stats()['bytes'] == 4
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = HttpCache(tmp_path, max_bytes=10)
+    cache.store('https://host.com/a', b'aaaaa', {'ETag': '"a"'})
+    cache.store('https://host.com/b', b'bbbbb', {'ETag': '"b"'})
+    cache.not_modified('https://host.com/a', {})
+    cache.store('https://host.com/c', b'ccccc', {'ETag': '"c"'})
+
+    assert cache.request_headers('https://host.com/a') != {}
+    assert cache.request_headers('https://host.com/b') == {}
+    assert cache.request_headers('https://host.com/c') != {}
+
+
+def test_fresh_entry_served_without_request(tmp_path):
+    cache = HttpCache(tmp_path, max_age=60)
+    cache.store('https://host.com/a', b'a', {})
+
+    assert cache.fresh_body('https://host.com/a') == b'a'
+    assert cache.stats()['hits'] == 1
+
+
+def test_index_survives_reload(tmp_path):
+    cache = HttpCache(tmp_path)
+    cache.store('https://host.com/a', b'a', {'Last-Modified': 'yesterday'})
+    cache.save()
+
+    reloaded = HttpCache(tmp_path)
+
+    assert reloaded.request_headers('https://host.com/a') == {
+        'If-Modified-Since': 'yesterday'
+    }
+
+
+def test_fetch_with_cache_sends_conditional_requests(tmp_path):
+    requests = []
+
+    async def _page(request: web.Request) -> web.Response:
+        requests.append(request.headers.get('If-None-Match'))
+        if request.headers.get('If-None-Match') == '"v1"':
+            return web.Response(status=304)
+        return web.Response(
+            text='<html><main>movie</main><footer/></html>',
+            content_type='text/html',
+            headers={'ETag': '"v1"'},
+        )
+
+    async def _run():
+        app = web.Application()
+        app.router.add_get('/page', _page)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        url = f'http://127.0.0.1:{port}/page'
+        cache = HttpCache(tmp_path)
+        try:
+            async with aiohttp.ClientSession() as session:
+                sections = [
+                    await fetch_html_section(session, url, '<main>', '</main>', cache)
+                    for _ in range(2)
+                ]
+                pages = [await fetch_html(session, url, cache=cache) for _ in range(2)]
+        finally:
+            await runner.cleanup()
+        return sections, pages, cache
+
+    sections, pages, cache = asyncio.run(_run())
+
+    assert sections == ['<main>movie', '<main>movie']
+    assert pages[0] == pages[1] == '<html><main>movie</main><footer/></html>'
+    assert requests == [None, '"v1"', None, '"v1"']
+    assert cache.stats()['revalidations'] == 2
+
+
+def test_storing_a_key_again_removes_its_previous_blob(tmp_path):
+    cache = HttpCache(tmp_path, max_bytes=100)
+    cache.store('https://host.com/shared', b'shared', {'ETag': '"s"'})
+    for version in range(50):
+        body = f'{version:040d}'.encode()
+        cache.store('https://host.com/a', body, {'ETag': f'"{version}"'})
+    cache.store('https://host.com/b', b'shared', {'ETag': '"b"'})
+    cache.store('https://host.com/b', b'changed', {'ETag': '"c"'})
+
+    blobs = list((tmp_path / 'blobs').iterdir())
+    on_disk = sum(blob.stat().st_size for blob in blobs)
+    assert len(blobs) == 3
+    assert on_disk == cache.stats()['bytes'] == 53
+    assert cache.not_modified('https://host.com/shared', {}) == b'shared'
@@ -0,0 +1,95 @@
+import asyncio
+
+import aiohttp
+from aiohttp import web
+from metrics import (
+    MAX_VALUES_PER_RECORD,
+    UNIT_BYTES,
+    UNIT_MILLISECONDS,
+    MemorySink,
+    Metrics,
+    metrics,
+)
+from web_utils import fetch_html_section
+
+
+def test_flush_aggregates_per_dimension_set():
+    sink = MemorySink()
+    recorder = Metrics(sink=sink)
+    recorder.increment('http_cache_hits', kind='fresh')
+    recorder.increment('http_cache_hits', kind='fresh')
+    recorder.increment('http_cache_hits', kind='revalidated')
+    recorder.increment('http_bytes_read', 512, UNIT_BYTES)
+    recorder.observe('parse_time', 1.5, UNIT_MILLISECONDS, page='details')
+    recorder.observe('parse_time', 2.5, UNIT_MILLISECONDS, page='details')
+
+    records = recorder.flush(function='scrape_sessions')
+
+    assert len(records) == 4
+    assert sink.values('http_cache_hits', kind='fresh') == [2]
+    assert sink.values('http_cache_hits', kind='revalidated') == [1]
+    assert sink.values('parse_time', page='details') == [1.5, 2.5]
+    bytes_record = next(record for record in records if 'http_bytes_read' in record)
+    assert bytes_record['function'] == 'scrape_sessions'
+    assert bytes_record['_aws']['CloudWatchMetrics'][0] == {
+        'Namespace': 'OperationKino',
+        'Dimensions': [['function']],
+        'Metrics': [{'Name': 'http_bytes_read', 'Unit': 'Bytes'}],
+    }
+
+    assert recorder.flush() == []
+
+
+def test_flush_splits_observations_over_record_limit():
+    sink = MemorySink()
+    recorder = Metrics(sink=sink)
+    for i in range(MAX_VALUES_PER_RECORD + 1):
+        recorder.observe('http_request_latency', i, UNIT_MILLISECONDS)
+
+    records = recorder.flush()
+
+    assert [len(record['http_request_latency']) for record in records] == [
+        MAX_VALUES_PER_RECORD,
+        1,
+    ]
+    assert len(sink.values('http_request_latency')) == MAX_VALUES_PER_RECORD + 1
+
+
+def test_fetch_html_section_records_bytes_and_latency():
+    page = '<html>' + 'x' * 1000 + '<main>movie</main>' + 'y' * 1000 + '</html>'
+
+    async def _page(request: web.Request) -> web.Response:
+        return web.Response(text=page, content_type='text/html')
+
+    async def _run():
+        app = web.Application()
+        app.router.add_get('/page', _page)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        url = f'http://127.0.0.1:{runner.addresses[0][1]}/page'
+        try:
+            async with aiohttp.ClientSession() as session:
+                return await fetch_html_section(
+                    session, url, '<main>', '</main>', chunk_size=256
+                )
+        finally:
+            await runner.cleanup()
+
+    sink = MemorySink()
+    original_sink, metrics.sink = metrics.sink, MemorySink()
+    try:
+        # drop whatever earlier tests recorded
+        metrics.flush()
+        metrics.sink = sink
+        section = asyncio.run(_run())
+        metrics.flush()
+    finally:
+        metrics.sink = original_sink
+
+    assert section == '<main>movie'
+    assert sink.values('section_bytes_kept') == [len('<main>movie')]
+    # the stream stops once the end marker is found
+    assert len(section) < sink.values('section_bytes_read')[0] < len(page)
+    assert len(sink.values('http_request_latency')) == 1
@@ -0,0 +1,76 @@
+import time
+
+from models.cinema import CinemaSummary
+from models.movie import Movie
+from repositories.movie_repository import (
+    DEFAULT_GENERATION_TTL,
+    GENERATION_INDEX,
+    get_movie_views_by_region,
+    get_movies_by_region,
+    write_movie_generation,
+)
+from repositories.region_repository import flip_region_generation, get_region_pointer
+from repositories.showtimes_codec import SHOWTIMES_PACKED
+
+
+def _movie(title: str, showtimes: list[str]) -> Movie:
+    return Movie(
+        id=title.lower(),
+        title=title,
+        release_year=1982,
+        image_url='https://img-store.com/cannery-row.jpg',
+        region='Auckland',
+        region_code='auckland',
+        cinemas=[CinemaSummary(name='Rialto', homepage_url=None)],
+        showtimes=showtimes,
+        last_showtime=showtimes[-1],
+    )
+
+
+def test_generations_are_read_separately(fake_table):
+    table = fake_table()
+    write_movie_generation(
+        table,
+        'auckland',
+        [_movie('Cannery Row', ['2999-06-01'])],
+        1,
+        showtimes_encoding=SHOWTIMES_PACKED,
+    )
+    write_movie_generation(
+        table,
+        'auckland',
+        [_movie('Cannery Row', ['2999-06-02']), _movie('Mr. Baseball', ['2999-06-03'])],
+        2,
+        showtimes_encoding=SHOWTIMES_PACKED,
+    )
+
+    views = get_movie_views_by_region(
+        table, 'auckland', 'Pacific/Auckland', generation=2
+    )
+    movies = get_movies_by_region(table, 'auckland', 'Pacific/Auckland', generation=1)
+
+    assert [(view.title, view.showtimes) for view in views] == [
+        ('Cannery Row', ['2999-06-02']),
+        ('Mr. Baseball', ['2999-06-03']),
+    ]
+    assert [(movie.id, movie.showtimes) for movie in movies] == [
+        ('cannery row', ['2999-06-01'])
+    ]
+    assert {query['IndexName'] for query in table.queries} == {GENERATION_INDEX}
+    # generations of the same movie do not overwrite each other and expire on their
+    # own, the ttl is set when they are written so nothing rewrites them later
+    assert len(table.items) == 3
+    assert len(table.requests) == 3
+    assert all(
+        item['expires_at'] >= time.time() + DEFAULT_GENERATION_TTL - 60
+        for item in table.items.values()
+    )
+
+
+def test_flip_region_generation_only_moves_forward(fake_table):
+    table = fake_table('regions', ('region_code', 'kind'))
+
+    assert flip_region_generation(table, 'auckland', 'v1', 10) == (True, None)
+    assert flip_region_generation(table, 'auckland', 'v2', 20) == (True, 10)
+    assert flip_region_generation(table, 'auckland', 'v3', 15) == (False, None)
+    assert get_region_pointer(table, 'auckland') == ('v2', 20)
@@ -0,0 +1,20 @@
+from lxml import html as lxml_html
+import pytest
+from parse_engine import parse_html
+
+PAGE = '<?xml version="1.0" encoding="utf-8"?><html><body><h1>Cannery Row</h1></body></html>'
+
+
+@pytest.mark.parametrize('page', [PAGE, PAGE.encode()])
+def test_parse_html_with_encoding_declaration(page):
+    assert parse_html(page).findtext('.//h1') == 'Cannery Row'
+
+
+def test_parse_html_does_not_encode_bytes(monkeypatch):
+    def _document_fromstring(html):
+        raise ValueError('unparseable')
+
+    monkeypatch.setattr(lxml_html, 'document_fromstring', _document_fromstring)
+
+    with pytest.raises(ValueError, match='unparseable'):
+        parse_html(b'<html></html>')
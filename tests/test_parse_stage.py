@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+from exceptions import ScrapingException
+from metrics import MemorySink, metrics
+from parse_engine import ENGINE_LXML
+from parse_stage import PARSE_MODES, ParseStage
+from scrape_sessions.scraper import (
+    _parse_movie_details_job,
+    _parse_movie_venue_names_job,
+)
+from test_utils import load_html_fixture
+
+
+@pytest.mark.parametrize('mode', PARSE_MODES)
+def test_run_returns_plain_data(mode):
+    details_html = load_html_fixture('movie_details.html').encode()
+    venues_html = load_html_fixture('movie_venues.html').encode()
+
+    async def _run():
+        with ParseStage(mode, max_workers=2) as parse_stage:
+            return await asyncio.gather(
+                parse_stage.run(_parse_movie_details_job, details_html, ENGINE_LXML),
+                parse_stage.run(_parse_movie_venue_names_job, venues_html, ENGINE_LXML),
+            )
+
+    details, venues = asyncio.run(_run())
+
+    assert details == {
+        'release_year': 1982,
+        'image_url': 'img-store.com/cannery-row.jpg',
+    }
+    assert venues == ['Maya Cinemas', 'Lighthouse Cinemas']
+
+
+@pytest.mark.parametrize('mode', PARSE_MODES)
+def test_run_propagates_scraping_exception(mode):
+    async def _run():
+        with ParseStage(mode, max_workers=1) as parse_stage:
+            await parse_stage.run(
+                _parse_movie_details_job, b'<main></main>', ENGINE_LXML
+            )
+
+    with pytest.raises(ScrapingException):
+        asyncio.run(_run())
+
+
+@pytest.mark.parametrize('mode', PARSE_MODES)
+def test_run_reports_parse_time(mode, monkeypatch):
+    details_html = load_html_fixture('movie_details.html').encode()
+    sink = MemorySink()
+    monkeypatch.setattr(metrics, 'sink', sink)
+    metrics.drain()
+
+    async def _run():
+        with ParseStage(mode, max_workers=1) as parse_stage:
+            for _ in range(2):
+                await parse_stage.run(
+                    _parse_movie_details_job, details_html, ENGINE_LXML
+                )
+
+    asyncio.run(_run())
+    metrics.flush()
+
+    assert len(sink.values('parse_time', page='details')) == 2
+
+
+def test_unsupported_mode():
+    with pytest.raises(ValueError):
+        ParseStage('gpu')
@@ -0,0 +1,41 @@
+from repositories.query import paginate_query, projection_kwargs
+
+
+class FakePagedTable:
+    name = 'movies'
+
+    def __init__(self, pages: list[list[dict]]):
+        self.pages = pages
+        self.calls = []
+
+    def query(self, **kwargs):
+        self.calls.append(dict(kwargs))
+        page_idx = kwargs.get('ExclusiveStartKey', {}).get('page', 0)
+        response = {'Items': self.pages[page_idx]}
+        if page_idx + 1 < len(self.pages):
+            response['LastEvaluatedKey'] = {'page': page_idx + 1}
+        return response
+
+
+def test_paginate_query_follows_last_evaluated_key():
+    table = FakePagedTable([[{'id': 'a'}, {'id': 'b'}], [{'id': 'c'}], []])
+
+    items = paginate_query(table, KeyConditionExpression='region')
+
+    assert table.calls == []
+    assert [item['id'] for item in items] == ['a', 'b', 'c']
+    assert len(table.calls) == 3
+    assert table.calls[1]['ExclusiveStartKey'] == {'page': 1}
+
+
+def test_projection_kwargs_aliases_reserved_words():
+    kwargs = projection_kwargs(['region_code', 'name'])
+
+    assert kwargs == {
+        'ProjectionExpression': '#p0, #p1',
+        'ExpressionAttributeNames': {'#p0': 'region_code', '#p1': 'name'},
+    }
+
+
+def test_projection_kwargs_without_fields():
+    assert projection_kwargs(None) == {}
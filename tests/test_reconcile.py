@@ -0,0 +1,33 @@
+from decimal import Decimal
+
+from repositories.reconcile import reconcile_items
+
+
+def test_reconcile_items_writes_only_changes(fake_table):
+    table = fake_table()
+    existing_items = [
+        {'region_code': 'auckland', 'id': 'a', 'release_year': Decimal(1982)},
+        {'region_code': 'auckland', 'id': 'b', 'release_year': Decimal(1992)},
+        {'region_code': 'auckland', 'id': 'c', 'release_year': Decimal(2001)},
+    ]
+    new_items = [
+        {'region_code': 'auckland', 'id': 'a', 'release_year': 1982},
+        {'region_code': 'auckland', 'id': 'b', 'release_year': 1993},
+        {'region_code': 'auckland', 'id': 'd', 'release_year': 2024},
+    ]
+
+    counts = reconcile_items(table, existing_items, new_items)
+
+    assert counts == {'inserted': 1, 'updated': 1, 'deleted': 1, 'unchanged': 1}
+    assert [item['id'] for item in table.puts] == ['b', 'd']
+    assert table.deletes == [{'region_code': 'auckland', 'id': 'c'}]
+
+
+def test_reconcile_items_no_changes(fake_table):
+    table = fake_table()
+    items = [{'region_code': 'auckland', 'id': 'a', 'cinemas': [{'name': 'Rialto'}]}]
+
+    counts = reconcile_items(table, items, [dict(item) for item in items])
+
+    assert counts == {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 1}
+    assert table.puts == [] and table.deletes == []
@@ -0,0 +1,48 @@
+from get_sessions.response_cache import ResponseCache, etag_matches
+
+
+def test_get_returns_entry_for_same_version():
+    cache = ResponseCache()
+    stored = cache.put(('auckland', '2025-06-01'), 'v1', '{"sessions": []}')
+
+    cached = cache.get(('auckland', '2025-06-01'), 'v1')
+
+    assert cached == stored
+    assert cached.etag.startswith('"') and cached.etag.endswith('"')
+
+
+def test_get_misses_after_version_change():
+    cache = ResponseCache()
+    cache.put(('auckland', '2025-06-01'), 'v1', '{"sessions": []}')
+
+    assert cache.get(('auckland', '2025-06-01'), 'v2') is None
+    assert cache.get(('auckland', '2025-06-01'), 'v1') is None
+
+
+def test_get_misses_after_ttl():
+    cache = ResponseCache(ttl=0)
+    cache.put(('auckland', '2025-06-01'), 'v1', '{"sessions": []}')
+
+    assert cache.get(('auckland', '2025-06-01'), 'v1') is None
+
+
+def test_put_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.put('auckland', 'v1', 'a')
+    cache.put('canterbury', 'v1', 'c')
+    cache.get('auckland', 'v1')
+    cache.put('brisbane-central', 'v1', 'b')
+
+    assert cache.get('auckland', 'v1') is not None
+    assert cache.get('canterbury', 'v1') is None
+
+
+def test_etag_matches():
+    etag = '"abc"'
+
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('W/"abc"', etag)
+    assert etag_matches('"xyz", "abc"', etag)
+    assert etag_matches('*', etag)
+    assert not etag_matches('"xyz"', etag)
+    assert not etag_matches(None, etag)
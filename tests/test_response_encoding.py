@@ -0,0 +1,50 @@
+import base64
+import gzip
+
+from get_sessions import response_encoding
+from get_sessions.response_encoding import (
+    GZIP,
+    IDENTITY,
+    applied_encoding,
+    encode_body,
+    encoded_etag,
+    negotiate_encoding,
+)
+
+
+def test_negotiate_encoding(monkeypatch):
+    monkeypatch.setattr(response_encoding, 'brotli', None)
+
+    assert negotiate_encoding(None) == IDENTITY
+    assert negotiate_encoding('gzip, deflate, br') == GZIP
+    assert negotiate_encoding('deflate') == IDENTITY
+    assert negotiate_encoding('gzip;q=0') == IDENTITY
+    assert negotiate_encoding('*') == GZIP
+
+
+def test_negotiate_prefers_brotli_when_available(monkeypatch):
+    monkeypatch.setattr(response_encoding, 'brotli', object())
+
+    assert negotiate_encoding('gzip, deflate, br') == 'br'
+    assert negotiate_encoding('gzip;q=1.0, br;q=0.5') == GZIP
+
+
+def test_encode_body_round_trip():
+    body = '{"sessions": [' + ', '.join(['{"title": "Cannery Row"}'] * 100) + ']}'
+
+    encoded, encoding = encode_body(body, GZIP)
+
+    assert encoding == GZIP
+    assert gzip.decompress(base64.b64decode(encoded)).decode('utf-8') == body
+    assert len(encoded) < len(body)
+
+
+def test_encode_body_skips_small_bodies():
+    assert encode_body('{"sessions": []}', GZIP) == ('{"sessions": []}', IDENTITY)
+    assert applied_encoding('{"sessions": []}', GZIP) == IDENTITY
+    assert applied_encoding('x' * 2048, GZIP) == GZIP
+
+
+def test_encoded_etag():
+    assert encoded_etag('"abc"', IDENTITY) == '"abc"'
+    assert encoded_etag('"abc"', GZIP) == '"abc-gzip"'
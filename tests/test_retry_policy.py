@@ -0,0 +1,109 @@
+import asyncio
+from email.utils import formatdate
+import time
+
+import aiohttp
+from aiohttp import web
+from retry_policy import CircuitBreaker, RetryPolicy, parse_retry_after
+from web_utils import fetch_bytes
+
+
+def test_next_delay_backs_off_exponentially():
+    policy = RetryPolicy(max_retries=3, base_delay=0.5, max_delay=1.5, jitter=False)
+
+    delays = [policy.next_delay(attempt) for attempt in range(4)]
+
+    assert delays == [0.5, 1.0, 1.5, None]
+
+
+def test_next_delay_jitter_stays_within_bounds():
+    policy = RetryPolicy(max_retries=1, base_delay=1.0, retry_budget=1000)
+
+    delays = [policy.next_delay(0) for _ in range(100)]
+
+    assert all(0.5 <= delay <= 1.0 for delay in delays)
+
+
+def test_next_delay_honours_retry_after():
+    policy = RetryPolicy(base_delay=0.5, max_retry_after=10, jitter=False)
+
+    assert policy.next_delay(0, retry_after=3) == 3
+    assert policy.next_delay(0, retry_after=60) is None
+
+
+def test_next_delay_stops_when_budget_is_spent():
+    policy = RetryPolicy(max_retries=5, retry_budget=2, jitter=False)
+
+    assert policy.next_delay(0) is not None
+    assert policy.next_delay(1) is not None
+    assert policy.next_delay(0) is None
+    assert policy.stats()['retries'] == 2
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('5') == 5.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+    assert 0 < parse_retry_after(formatdate(time.time() + 30, usegmt=True)) <= 30
+
+
+def test_circuit_breaker_opens_and_probes_after_cooldown():
+    breaker = CircuitBreaker(threshold=2, cooldown=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert breaker.record_failure()
+    assert breaker.is_open
+
+    # cooldown has passed so exactly one probe is let through
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert not breaker.is_open
+    assert breaker.allow()
+
+
+def test_fetch_retries_retryable_status_and_short_circuits_down_host():
+    statuses = {'flaky': [503, 200], 'down': [503] * 10, 'missing': [404]}
+    requests = {name: 0 for name in statuses}
+
+    async def _page(request: web.Request) -> web.Response:
+        name = request.match_info['name']
+        status = statuses[name][requests[name]]
+        requests[name] += 1
+        return web.Response(status=status, text=name, headers={'Retry-After': '0'})
+
+    async def _run():
+        app = web.Application()
+        app.router.add_get('/{name}', _page)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        host = f'http://127.0.0.1:{runner.addresses[0][1]}'
+        policy = RetryPolicy(base_delay=0, breaker_threshold=3, breaker_cooldown=60)
+        try:
+            async with aiohttp.ClientSession() as session:
+                flaky = await fetch_bytes(session, f'{host}/flaky', retry_policy=policy)
+                missing = await fetch_bytes(
+                    session, f'{host}/missing', retry_policy=policy
+                )
+                down = [
+                    await fetch_bytes(session, f'{host}/down', retry_policy=policy)
+                    for _ in range(3)
+                ]
+        finally:
+            await runner.cleanup()
+        return flaky, missing, down, policy
+
+    flaky, missing, down, policy = asyncio.run(_run())
+
+    assert flaky == b'flaky'
+    assert requests['flaky'] == 2
+    assert missing is None
+    assert requests['missing'] == 1
+    assert down == [None, None, None]
+    # the breaker opened on the third consecutive failure, later fetches never left
+    assert requests['down'] == 3
+    assert policy.stats()['breaker_opens'] == 1
+    assert policy.stats()['short_circuits'] == 2
@@ -1,9 +1,16 @@
+import asyncio
 from datetime import date
 
 from pydantic import HttpUrl
 import pytest
+from cinema_index import CinemaIndex
+from details_cache import MovieDetailsCache
 from exceptions import ScrapingException
-from models.cinema import CinemaSummary
+from models.cinema import Cinema, CinemaSummary
+from models.region import Region
+from parse_engine import ENGINE_LXML, PARSE_ENGINES
+from parse_stage import PARSE_MODE_INLINE, ParseStage
+from retry_policy import RetryPolicy
 from scrape_sessions.scraper import (
     _clean_movie_title,
     _parse_date,
@@ -11,43 +18,47 @@ from scrape_sessions.scraper import (
     _parse_movie_showtimes,
     _parse_movie_venues,
     _parse_now_showing_movies,
+    scrape_sessions,
 )
-from test_utils import load_html_fixture
+from test_utils import FixtureSite, load_html_fixture
 
 
 # _parse_now_showing_movies
 
 
-def test_parse_now_showing_movies():
+@pytest.mark.parametrize('engine', PARSE_ENGINES)
+def test_parse_now_showing_movies(engine):
     expected_movies = [
         {'title': 'Mr. Baseball', 'slug': 'mr-baseball'},
         {'title': 'Cannery Row', 'slug': 'cannery-row'},
     ]
     html = load_html_fixture('now_showing.html')
 
-    actual_movies = list(_parse_now_showing_movies(html))
+    actual_movies = list(_parse_now_showing_movies(html, engine))
 
     assert actual_movies == expected_movies
 
 
-def test_parse_now_showing_no_movies():
+@pytest.mark.parametrize('engine', PARSE_ENGINES)
+def test_parse_now_showing_no_movies(engine):
     html = load_html_fixture('now_showing_no_movies.html')
 
     with pytest.raises(ScrapingException):
-        list(_parse_now_showing_movies(html))
+        list(_parse_now_showing_movies(html, engine))
 
 
 # _parse_movie_details
 
 
-def test_parse_movie_details():
+@pytest.mark.parametrize('engine', PARSE_ENGINES)
+def test_parse_movie_details(engine):
     expected_details = {
         'release_year': 1982,
         'image_url': 'img-store.com/cannery-row.jpg',
     }
     html = load_html_fixture('movie_details.html')
 
-    actual_details = _parse_movie_details(html)
+    actual_details = _parse_movie_details(html, engine)
 
     assert actual_details == expected_details
 
@@ -55,13 +66,14 @@ def test_parse_movie_details():
 # _parse_movie_showtimes
 
 
-def test_parse_movie_showtimes():
+@pytest.mark.parametrize('engine', PARSE_ENGINES)
+def test_parse_movie_showtimes(engine):
     expected_showtimes = [{'day': '31', 'month': '05'}, {'day': '01', 'month': '06'}]
     html = load_html_fixture('movie_showtimes.html')
 
     actual_showtimes = [
         {'day': d.split('-')[2], 'month': d.split('-')[1]}
-        for d in _parse_movie_showtimes(html)
+        for d in _parse_movie_showtimes(html, engine)
     ]
 
     assert actual_showtimes == expected_showtimes
@@ -70,7 +82,8 @@ def test_parse_movie_showtimes():
 # _parse_movie_venues
 
 
-def test_parse_movie_venues():
+@pytest.mark.parametrize('engine', PARSE_ENGINES)
+def test_parse_movie_venues(engine):
     expected_venues = [
         CinemaSummary(
             name='Maya Cinemas',
@@ -83,7 +96,7 @@ def test_parse_movie_venues():
     existing_cinemas['Lighthouse Cinemas'] = None
     html = load_html_fixture('movie_venues.html')
 
-    actual_venues = _parse_movie_venues(html, existing_cinemas)
+    actual_venues = _parse_movie_venues(html, CinemaIndex(existing_cinemas), engine)
 
     assert actual_venues == expected_venues
 
@@ -137,3 +150,62 @@ def test_parse_date_rollover():
     actual_date = _parse_date('1', 'Jan', now)
 
     assert actual_date == expected_date
+
+
+# scrape_sessions
+
+
+CINEMAS = [
+    Cinema(
+        id='maya',
+        name='Maya Cinemas',
+        homepage_url='https://www.mayacinemas.com/salinas',
+        region='Auckland',
+        region_code='auckland',
+    )
+]
+
+
+def _scrape(site: FixtureSite, details_cache: MovieDetailsCache) -> tuple[str, list]:
+    async def _run():
+        host = await site.start()
+        try:
+            movies = await scrape_sessions(
+                Region(name='Auckland', slug='auckland'),
+                host,
+                CINEMAS,
+                parse_engine=ENGINE_LXML,
+                parse_stage=ParseStage(PARSE_MODE_INLINE),
+                details_cache=details_cache,
+                retry_policy=RetryPolicy(base_delay=0),
+            )
+        finally:
+            await site.stop()
+        return host, movies
+
+    return asyncio.run(_run())
+
+
+def test_scrape_sessions_caches_fetched_details():
+    site = FixtureSite()
+    details_cache = MovieDetailsCache()
+
+    host, movies = _scrape(site, details_cache)
+
+    assert sorted(movie.title for movie in movies) == ['Cannery Row', 'Mr. Baseball']
+    assert details_cache.get(host, 'cannery-row')['release_year'] == 1982
+
+
+@pytest.mark.parametrize('status', [404, 503])
+def test_scrape_sessions_does_not_negative_cache_fetch_failures(status):
+    site = FixtureSite()
+    site.details_status = status
+    details_cache = MovieDetailsCache()
+
+    host, movies = _scrape(site, details_cache)
+
+    # the pages were never read so the next run has to try them again
+    assert movies == []
+    assert site.requests['details'] >= 2
+    assert details_cache.pending() == []
+    assert details_cache.get(host, 'cannery-row') is None
@@ -0,0 +1,198 @@
+import asyncio
+import json
+
+import pytest
+from details_cache import MovieDetailsCache
+from models.cinema import Cinema, CinemaSummary
+from models.movie import Movie
+from repositories.movie_repository import _to_item, get_movies_by_region
+from repositories.region_repository import (
+    DATE_INDEX,
+    get_region_index,
+    get_region_pointer,
+    get_region_snapshot,
+)
+from repositories.showtimes_codec import BITMAP_FIELD, SHOWTIMES_LIST
+from scrape_sessions import handler
+from scrape_sessions.scraper import scrape_sessions
+from test_utils import FixtureSite
+from web_utils import WarmClient
+
+AUCKLAND = {'region_name': 'Auckland', 'region_slug': 'auckland', 'country_code': 'nz'}
+CANTERBURY = {
+    'region_name': 'Canterbury',
+    'region_slug': 'canterbury',
+    'country_code': 'nz',
+}
+
+CINEMAS = [
+    Cinema(
+        id='maya',
+        name='Maya Cinemas',
+        homepage_url='https://www.mayacinemas.com/salinas',
+        region='Auckland',
+        region_code='auckland',
+    )
+]
+
+
+def _movie(region_slug: str) -> Movie:
+    return Movie(
+        id='cannery-row',
+        title='Cannery Row',
+        release_year=1982,
+        image_url='https://img-store.com/cannery-row.jpg',
+        region=region_slug.title(),
+        region_code=region_slug,
+        cinemas=[CinemaSummary(name='Maya Cinemas', homepage_url=None)],
+        showtimes=['2999-06-01'],
+        last_showtime='2999-06-01',
+    )
+
+
+@pytest.fixture
+def committed(monkeypatch):
+    # stands in for dynamodb and the pre warm so only the scrape itself runs
+    committed = {}
+
+    async def _prewarm_connections(session, hosts):
+        return 0
+
+    def _commit_region(tables, region_slug, movies):
+        committed[region_slug] = movies
+
+    client = WarmClient()
+    monkeypatch.setenv('SCRAPE_HOST_NZ', 'http://127.0.0.1:1')
+    monkeypatch.delenv('SCRAPE_HOST_AU', raising=False)
+    monkeypatch.setattr(handler, 'warm_client', client)
+    monkeypatch.setattr(handler, 'prewarm_connections', _prewarm_connections)
+    monkeypatch.setattr(handler, 'get_cinemas_by_region', lambda table, slug: CINEMAS)
+    monkeypatch.setattr(handler, '_commit_region', _commit_region)
+    monkeypatch.setattr(
+        handler, '_load_details_cache', lambda tables, events: MovieDetailsCache()
+    )
+    monkeypatch.setattr(handler, '_save_details_cache', lambda tables, cache: None)
+    yield committed
+    client.close()
+
+
+def test_single_region_returns_its_own_result(committed, monkeypatch):
+    async def _scrape_sessions(region, host, cinemas, **kwargs):
+        return [_movie(region.slug)]
+
+    monkeypatch.setattr(handler, 'scrape_sessions', _scrape_sessions)
+
+    result = handler.lambda_handler(AUCKLAND, None)
+
+    assert result == {'region_slug': 'auckland', 'statusCode': 200}
+    assert list(committed) == ['auckland']
+
+
+def test_all_regions_returns_every_result(committed, monkeypatch):
+    async def _scrape_sessions(region, host, cinemas, **kwargs):
+        return [_movie(region.slug)]
+
+    monkeypatch.setattr(handler, 'scrape_sessions', _scrape_sessions)
+
+    result = handler.lambda_handler({'regions': [AUCKLAND, CANTERBURY]}, None)
+
+    assert result['statusCode'] == 200
+    assert json.loads(result['body']) == [
+        {'region_slug': 'auckland', 'statusCode': 200},
+        {'region_slug': 'canterbury', 'statusCode': 200},
+    ]
+    assert sorted(committed) == ['auckland', 'canterbury']
+
+
+def test_failing_region_does_not_abort_the_others(committed, monkeypatch):
+    async def _scrape_sessions(region, host, cinemas, **kwargs):
+        if region.slug == 'auckland':
+            raise RuntimeError('connection reset')
+        return [_movie(region.slug)]
+
+    monkeypatch.setattr(handler, 'scrape_sessions', _scrape_sessions)
+    missing_host = {**CANTERBURY, 'region_slug': 'otago', 'country_code': 'au'}
+
+    result = handler.lambda_handler(
+        {'regions': [AUCKLAND, CANTERBURY, missing_host]}, None
+    )
+
+    results = json.loads(result['body'])
+    assert result['statusCode'] == 500
+    assert [(r['region_slug'], r['statusCode']) for r in results] == [
+        ('auckland', 500),
+        ('canterbury', 200),
+        ('otago', 400),
+    ]
+    assert 'connection reset' in results[0]['body']
+    assert list(committed) == ['canterbury']
+
+
+def test_failed_details_are_fetched_again_by_later_regions(committed, monkeypatch):
+    site = FixtureSite()
+    site.details_status = 404
+    auckland_done = asyncio.Event()
+
+    async def _scrape_in_order(region, host, cinemas, **kwargs):
+        # canterbury only starts once every auckland details download has failed
+        if region.slug == 'canterbury':
+            await auckland_done.wait()
+        try:
+            return await scrape_sessions(region, host, cinemas, **kwargs)
+        finally:
+            if region.slug == 'auckland':
+                site.details_status = 200
+                auckland_done.set()
+
+    monkeypatch.setattr(handler, 'scrape_sessions', _scrape_in_order)
+    host = handler.warm_client.run(lambda session: site.start())
+    monkeypatch.setenv('SCRAPE_HOST_NZ', host)
+    try:
+        result = handler.lambda_handler({'regions': [AUCKLAND, CANTERBURY]}, None)
+    finally:
+        handler.warm_client.run(lambda session: site.stop())
+
+    assert [
+        (r['region_slug'], r['statusCode']) for r in json.loads(result['body'])
+    ] == [('auckland', 500), ('canterbury', 200)]
+    assert site.requests['details'] == 4
+    assert sorted(movie.title for movie in committed['canterbury']) == [
+        'Cannery Row',
+        'Mr. Baseball',
+    ]
+
+
+def test_late_commit_does_not_replace_the_current_snapshot(fake_table, monkeypatch):
+    tables = {
+        'movies': fake_table(),
+        'regions': fake_table('regions', ('region_code', 'kind')),
+    }
+    generations = iter((10, 20, 15))
+    monkeypatch.setattr(handler, 'new_generation', lambda: next(generations))
+
+    for title in ('first', 'current', 'late-stale'):
+        movie = _movie('auckland').model_copy(update={'title': title})
+        handler._commit_region(tables, 'auckland', [movie])
+
+    pointer = get_region_pointer(tables['regions'], 'auckland')
+    snapshot = get_region_snapshot(tables['regions'], 'auckland')
+    assert pointer.generation == 20
+    assert snapshot['version'] == pointer.version
+    assert [session['title'] for session in snapshot['sessions']] == ['current']
+    index = get_region_index(tables['regions'], 'auckland', DATE_INDEX, '2999-06-01')
+    assert index['version'] == pointer.version
+    assert [session['title'] for session in index['sessions']] == ['current']
+
+
+def test_migrate_showtimes_event_packs_list_encoded_movies(fake_table, monkeypatch):
+    movie = _movie('auckland')
+    movies_table = fake_table(items=[_to_item(movie, SHOWTIMES_LIST)])
+    monkeypatch.setattr(handler, 'tables', {'movies': movies_table})
+    monkeypatch.setenv('MOVIE_SHOWTIMES_ENCODING', 'packed')
+
+    result = handler.lambda_handler({'migrate_showtimes': ['auckland']}, None)
+
+    assert result == {'statusCode': 200, 'body': json.dumps({'auckland': 1})}
+    (item,) = movies_table.items.values()
+    assert BITMAP_FIELD in item and 'showtimes' not in item
+    assert get_movies_by_region(movies_table, 'auckland', 'Pacific/Auckland') == [movie]
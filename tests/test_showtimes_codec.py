@@ -0,0 +1,116 @@
+from decimal import Decimal
+
+from boto3.dynamodb.types import Binary
+import pytest
+from repositories.movie_repository import migrate_movie_showtimes
+from repositories.showtimes_codec import (
+    BASE_FIELD,
+    BITMAP_FIELD,
+    SHOWTIMES_LIST,
+    SHOWTIMES_PACKED,
+    decode_showtimes,
+    encode_showtimes,
+    get_showtimes_encoding,
+    pack_showtimes,
+    trim_showtimes,
+    unpack_showtimes,
+)
+
+SHOWTIMES = ['2025-05-30', '2025-06-01', '2025-06-02', '2025-06-09', '2025-06-27']
+
+
+def _item(**fields) -> dict:
+    return {
+        'region_code': 'auckland',
+        'id': 'cannery-row',
+        'release_year': Decimal(1982),
+        'last_showtime': SHOWTIMES[-1],
+        **fields,
+    }
+
+
+def test_pack_round_trip():
+    base, bitmap = pack_showtimes(SHOWTIMES)
+
+    assert base == '2025-05-30'
+    # 28 days of offsets fit in 4 bytes
+    assert len(bitmap) == 4
+    assert unpack_showtimes(base, bitmap) == SHOWTIMES
+
+
+def test_pack_across_month_and_year_boundaries():
+    showtimes = ['2025-12-30', '2025-12-31', '2026-01-01', '2026-03-02']
+
+    assert unpack_showtimes(*pack_showtimes(showtimes)) == showtimes
+
+
+def test_unpack_skips_days_before_since():
+    base, bitmap = pack_showtimes(SHOWTIMES)
+
+    assert unpack_showtimes(base, bitmap, since='2025-06-02') == SHOWTIMES[2:]
+    assert unpack_showtimes(base, bitmap, since='2025-06-10') == SHOWTIMES[4:]
+    assert unpack_showtimes(base, bitmap, since='2025-05-01') == SHOWTIMES
+    assert unpack_showtimes(base, bitmap, since='2025-07-01') == []
+
+
+def test_encode_keeps_last_showtime_and_drops_list():
+    item = encode_showtimes(_item(showtimes=SHOWTIMES), SHOWTIMES_PACKED)
+
+    assert 'showtimes' not in item
+    assert item['last_showtime'] == SHOWTIMES[-1]
+    assert item[BASE_FIELD] == SHOWTIMES[0]
+    assert encode_showtimes(_item(showtimes=SHOWTIMES), SHOWTIMES_LIST) == _item(
+        showtimes=SHOWTIMES
+    )
+
+
+def test_decode_reads_both_encodings():
+    packed = encode_showtimes(_item(showtimes=SHOWTIMES), SHOWTIMES_PACKED)
+    # boto3 resources hand binary attributes back wrapped in Binary
+    stored = {**packed, BITMAP_FIELD: Binary(packed[BITMAP_FIELD])}
+
+    assert decode_showtimes(stored) == _item(showtimes=SHOWTIMES)
+    assert decode_showtimes(_item(showtimes=SHOWTIMES)) == _item(showtimes=SHOWTIMES)
+    assert decode_showtimes(stored, since='2025-06-05')['showtimes'] == SHOWTIMES[3:]
+    assert (
+        decode_showtimes(_item(showtimes=SHOWTIMES), since='2025-06-05')['showtimes']
+        == SHOWTIMES[3:]
+    )
+
+
+def test_showtimes_encoding_from_env(monkeypatch):
+    monkeypatch.delenv('MOVIE_SHOWTIMES_ENCODING', raising=False)
+    assert get_showtimes_encoding() == SHOWTIMES_PACKED
+
+    monkeypatch.setenv('MOVIE_SHOWTIMES_ENCODING', 'LIST')
+    assert get_showtimes_encoding() == SHOWTIMES_LIST
+
+    monkeypatch.setenv('MOVIE_SHOWTIMES_ENCODING', 'csv')
+    with pytest.raises(ValueError):
+        get_showtimes_encoding()
+
+
+def test_migrate_rewrites_only_items_in_the_old_encoding(fake_table):
+    packed = encode_showtimes(_item(showtimes=SHOWTIMES), SHOWTIMES_PACKED)
+    table = fake_table(
+        items=[
+            _item(showtimes=SHOWTIMES),
+            {**packed, 'id': 'mr-baseball', BITMAP_FIELD: Binary(packed[BITMAP_FIELD])},
+        ]
+    )
+
+    assert migrate_movie_showtimes(table, 'auckland', SHOWTIMES_PACKED) == 1
+    assert table.puts == [packed]
+
+
+def test_unpack_and_trim_stop_at_until():
+    base, bitmap = pack_showtimes(SHOWTIMES)
+
+    assert unpack_showtimes(base, bitmap, until='2025-06-02') == SHOWTIMES[:3]
+    assert (
+        unpack_showtimes(base, bitmap, since='2025-06-01', until='2025-06-09')
+        == SHOWTIMES[1:4]
+    )
+    assert unpack_showtimes(base, bitmap, until='2025-05-29') == []
+    assert trim_showtimes(SHOWTIMES, '2025-06-01', '2025-06-09') == SHOWTIMES[1:4]
+    assert trim_showtimes(SHOWTIMES, until='2025-06-01') == SHOWTIMES[:2]
@@ -1,6 +1,74 @@
+from collections import Counter
 from pathlib import Path
 
+from aiohttp import web
+from scrape_sessions.scraper import (
+    MOVIE_DETAILS_END,
+    MOVIE_DETAILS_START,
+    MOVIES_END,
+    MOVIES_START,
+)
+
 
 def load_html_fixture(filename):
     path = Path(__file__).parent / 'fixtures' / filename
     return path.read_text()
+
+
+class FixtureSite:
+    # serves the html fixtures at the paths scrape_sessions requests, with the sections
+    # wrapped in their markers. details pages answer with details_status
+    def __init__(self):
+        self.details_status = 200
+        self.requests = Counter()
+        self.host = None
+        self._runner = None
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_get('/now-playing/{region_slug}', self._now_showing)
+        app.router.add_get('/movie/{movie_slug}/', self._movie_details)
+        app.router.add_get(
+            '/movie/times/{movie_slug}/{region_slug}', self._movie_showtimes
+        )
+        app.router.add_get(
+            '/movie/sessions/{movie_slug}/{showtime}/region/', self._movie_venues
+        )
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        self.host = f'http://127.0.0.1:{self._runner.addresses[0][1]}'
+        return self.host
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _respond(self, page: str, body: str, status: int = 200) -> web.Response:
+        self.requests[page] += 1
+        if status != 200:
+            return web.Response(status=status)
+        return web.Response(text=body, content_type='text/html')
+
+    async def _now_showing(self, request: web.Request) -> web.Response:
+        movies = load_html_fixture('now_showing.html')
+        return self._respond('now_showing', f'{MOVIES_START}{movies}{MOVIES_END}')
+
+    async def _movie_details(self, request: web.Request) -> web.Response:
+        # Movie needs an absolute image url, the parser fixture is fine without one
+        details = load_html_fixture('movie_details.html').replace(
+            'src="img-store.com', 'src="https://img-store.com'
+        )
+        return self._respond(
+            'details',
+            f'{MOVIE_DETAILS_START}{details}{MOVIE_DETAILS_END}',
+            self.details_status,
+        )
+
+    async def _movie_showtimes(self, request: web.Request) -> web.Response:
+        return self._respond('showtimes', load_html_fixture('movie_showtimes.html'))
+
+    async def _movie_venues(self, request: web.Request) -> web.Response:
+        return self._respond('venues', load_html_fixture('movie_venues.html'))
@@ -0,0 +1,115 @@
+from aiohttp import web
+import pytest
+from web_utils import (
+    ACCEPT_ENCODING,
+    HtmlSectionExtractor,
+    WarmClient,
+    fetch_bytes,
+    prewarm_connections,
+)
+
+PAGE = (
+    b'<html><head></head><body><header>nav</header>'
+    b'<main><h1>Cannery Row</h1></main><footer>end</footer></body></html>'
+)
+
+
+def _extract(page: bytes, chunk_size: int) -> tuple[bytes, bool]:
+    extractor = HtmlSectionExtractor(b'<main>', b'</main>')
+    for i in range(0, len(page), chunk_size):
+        if extractor.feed(page[i : i + chunk_size]):
+            return bytes(extractor.section), True
+    return bytes(extractor.section), False
+
+
+@pytest.mark.parametrize('chunk_size', range(1, len(PAGE) + 1))
+def test_extract_section_across_chunk_boundaries(chunk_size):
+    section, ended = _extract(PAGE, chunk_size)
+
+    assert section == b'<main><h1>Cannery Row</h1>'
+    assert ended
+
+
+def test_extract_section_without_end_marker():
+    section, ended = _extract(b'<body><main><h1>Cannery Row</h1>', 4)
+
+    assert section == b'<main><h1>Cannery Row</h1>'
+    assert not ended
+
+
+def test_extract_section_without_start_marker():
+    section, ended = _extract(b'<body><h1>Cannery Row</h1></main>', 4)
+
+    assert section == b''
+    assert not ended
+
+
+@pytest.mark.parametrize('chunk_size', range(1, 10))
+def test_extract_section_with_overlapping_markers(chunk_size):
+    # '-->' also matches the last bytes of '<!--', the end is only searched after it
+    page = b'<p><!-->comment-->tail</p>'
+    extractor = HtmlSectionExtractor(b'<!--', b'-->')
+    ended = False
+    for i in range(0, len(page), chunk_size):
+        if extractor.feed(page[i : i + chunk_size]):
+            ended = True
+            break
+
+    assert bytes(extractor.section) == b'<!-->comment'
+    assert ended
+
+
+def test_reset_discards_partial_section():
+    extractor = HtmlSectionExtractor(b'<main>', b'</main>')
+    extractor.feed(b'<main>partial')
+
+    extractor.reset()
+    extractor.feed(b'<ma')
+    ended = extractor.feed(b'in>full</main>')
+
+    assert bytes(extractor.section) == b'<main>full'
+    assert ended
+
+
+def test_warm_client_reuses_session_and_connections():
+    accept_encodings = []
+
+    async def _page(request: web.Request) -> web.Response:
+        accept_encodings.append(request.headers.get('Accept-Encoding'))
+        return web.Response(text='movie')
+
+    async def _start_server() -> web.AppRunner:
+        app = web.Application()
+        app.router.add_route('*', '/', _page)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', 0).start()
+        return runner
+
+    client = WarmClient()
+    runner = client.run(lambda session: _start_server())
+    url = f'http://127.0.0.1:{runner.addresses[0][1]}/'
+    try:
+
+        async def _first(session):
+            warmed = await prewarm_connections(session, [url, url + 'page'])
+            body = await fetch_bytes(session, url)
+            return session, warmed, body, client.stats.summary()
+
+        async def _second(session):
+            return session, await fetch_bytes(session, url), client.stats.summary()
+
+        first_session, warmed, first_body, first_stats = client.run(_first)
+        second_session, second_body, second_stats = client.run(_second)
+    finally:
+        client.run(lambda session: runner.cleanup())
+        client.close()
+
+    assert first_session is second_session
+    assert warmed == 1
+    assert first_body == second_body == b'movie'
+    assert first_stats['connections_created'] == 1
+    assert first_stats['connections_reused'] == 1
+    assert second_stats['connections_created'] == 0
+    assert second_stats['connections_reused'] == 1
+    assert accept_encodings == [ACCEPT_ENCODING] * 3